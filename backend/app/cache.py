@@ -0,0 +1,146 @@
+"""Caches em memória (por processo): TTL com descarte LRU e stale-while-revalidate"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Cache chave -> valor com tempo de vida (ttl, em segundos) e tamanho máximo.
+
+    Quando cheio, descarta o item usado há mais tempo (LRU).
+    Thread-safe: as rotas síncronas rodam no threadpool do Starlette.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Obter valor se presente e não expirado"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > self._clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """Gravar valor (renova o tempo de vida)"""
+        with self._lock:
+            self._data[key] = (self._clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        """Remover uma chave (se existir)"""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remover todas as chaves"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Contadores de uso do cache"""
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class StaleWhileRevalidate:
+    """
+    Valor único recalculado periodicamente (stale-while-revalidate).
+
+    A primeira leitura chama o loader na hora. Depois do ttl, a leitura
+    devolve imediatamente o valor antigo e dispara o recálculo em segundo
+    plano (no máximo um por vez), então nenhuma requisição espera pelo loader.
+    """
+
+    def __init__(self, ttl: float = 600.0, clock=time.monotonic, background: bool = True):
+        self.ttl = ttl
+        self.background = background
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._value = None
+        self._loaded_at = None
+        self._refreshing = False
+        self.refreshes = 0
+        self.stale_reads = 0
+
+    def get(self, loader):
+        """Obter o valor; loader() (sem argumentos) calcula um valor novo"""
+        with self._lock:
+            if self._loaded_at is None:
+                self._store(loader())
+                return self._value
+            value = self._value
+            if self._clock() - self._loaded_at < self.ttl:
+                return value
+            self.stale_reads += 1
+            if self._refreshing:
+                return value
+            self._refreshing = True
+
+        if self.background:
+            threading.Thread(target=self._refresh, args=(loader,), daemon=True).start()
+        else:
+            self._refresh(loader)
+        return value
+
+    def _store(self, value):
+        self._value = value
+        self._loaded_at = self._clock()
+        self.refreshes += 1
+
+    def _refresh(self, loader):
+        try:
+            value = loader()
+        except Exception:
+            # Mantém o valor antigo; o próximo acesso tenta de novo
+            with self._lock:
+                self._refreshing = False
+            return
+        with self._lock:
+            self._store(value)
+            self._refreshing = False
+
+    def peek(self):
+        """Valor atual sem carregar nem recalcular (None se ainda não carregado)"""
+        with self._lock:
+            return self._value
+
+    def clear(self):
+        """Descartar o valor (a próxima leitura recalcula na hora)"""
+        with self._lock:
+            self._value = None
+            self._loaded_at = None
+
+    def stats(self) -> dict:
+        """Contadores de uso"""
+        return {
+            "ttl": self.ttl,
+            "age": None if self._loaded_at is None else self._clock() - self._loaded_at,
+            "refreshes": self.refreshes,
+            "stale_reads": self.stale_reads,
+        }
@@ -1,6 +1,19 @@
-from sqlalchemy.orm import Session
-from . import models, schemas
-from .utils import hash_password
+import hashlib
+import math
+import os
+import time
+import unicodedata
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy import and_, or_, insert, update
+from sqlalchemy.orm import Session, aliased, joinedload, selectinload
+from . import models, schemas, tokens
+from .cache import TTLCache, StaleWhileRevalidate
+from .money import ZERO, money_abs
+from .utils import hash_password, decode_image_data_url
+
+# Linhas por INSERT na importação em lote (executemany)
+BULK_INSERT_BATCH_SIZE = int(os.getenv("BULK_INSERT_BATCH_SIZE", "1000"))
 
 # ========================
 # USER OPERATIONS
@@ -22,9 +35,15 @@ def get_all_users(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.User).offset(skip).limit(limit).all()
 
 
-def create_user(db: Session, user: schemas.UserCreate):
-    """Create a new user"""
-    hashed_password = hash_password(user.password)
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: str = None):
+    """
+    Create a new user
+
+    hashed_password: hash já calculado (ex.: no pool de app.hashing); sem ele,
+    o hash é calculado aqui mesmo.
+    """
+    if hashed_password is None:
+        hashed_password = hash_password(user.password)
     db_user = models.User(
         username=user.username,
         hashed_password=hashed_password,
@@ -32,6 +51,8 @@ def create_user(db: Session, user: schemas.UserCreate):
         full_name=user.full_name
     )
     db.add(db_user)
+    db.flush()
+    db.add(_empty_user_summary(db_user.id))
     db.commit()
     db.refresh(db_user)
     return db_user
@@ -50,12 +71,23 @@ def update_user(db: Session, user_id: int, user: schemas.UserCreate):
     return db_user
 
 
+def set_user_password_hash(db: Session, db_user: models.User, hashed_password: str):
+    """Gravar novo hash de senha (troca de senha ou atualização transparente no login)"""
+    db_user.hashed_password = hashed_password
+    db.commit()
+    return db_user
+
+
 def delete_user(db: Session, user_id: int):
     """Delete user by ID"""
     db_user = get_user(db, user_id)
     if db_user:
+        db.query(models.UserSummary).filter(
+            models.UserSummary.user_id == user_id
+        ).delete(synchronize_session=False)
         db.delete(db_user)
         db.commit()
+        revoke_user_tokens(db, user_id)
     return db_user
 
 
@@ -68,7 +100,11 @@ def update_user_profile(db: Session, user_id: int, user: schemas.UserUpdate):
         if user.full_name is not None:
             db_user.full_name = user.full_name
         if user.avatar is not None:
-            db_user.avatar = user.avatar
+            if user.avatar == '':
+                db_user.avatar_hash = None
+            else:
+                data, content_type = decode_image_data_url(user.avatar)
+                db_user.avatar_hash = store_avatar(db, data, content_type)
         if user.cpf is not None:
             db_user.cpf = user.cpf
         if user.phone is not None:
@@ -82,6 +118,29 @@ def update_user_profile(db: Session, user_id: int, user: schemas.UserUpdate):
     return db_user
 
 
+def store_avatar(db: Session, data: bytes, content_type: str):
+    """
+    Guardar imagem no armazenamento endereçado por conteúdo.
+    Imagens idênticas são armazenadas uma única vez. Retorna o hash.
+    """
+    avatar_hash = hashlib.sha256(data).hexdigest()
+    if db.get(models.Avatar, avatar_hash) is None:
+        db.add(models.Avatar(hash=avatar_hash, content_type=content_type, data=data))
+    return avatar_hash
+
+
+def get_avatar(db: Session, avatar_hash: str):
+    """Get avatar image by hash"""
+    return db.get(models.Avatar, avatar_hash)
+
+
+def get_user_avatar_hash(db: Session, user_id: int):
+    """Get only the avatar hash of a user (sem carregar o restante da linha)"""
+    return db.query(models.User.avatar_hash).filter(
+        models.User.id == user_id
+    ).scalar()
+
+
 # ========================
 # ACCOUNT OPERATIONS
 # ========================
@@ -117,29 +176,23 @@ def create_account(db: Session, account: schemas.AccountCreate, user_id: int):
         user_id=user_id
     )
     db.add(db_account)
+    _adjust_user_summary(
+        db, user_id, total_accounts=1, total_balance=account.initial_balance
+    )
     db.commit()
     db.refresh(db_account)
     return db_account
 
 
 def get_account_suggestions(db: Session, user_id: int, limit: int = 10):
-    """Get account name suggestions from other users (most popular)"""
-    from sqlalchemy import func
-
-    # Buscar nomes de contas de outros usuários, agrupadas por nome, ordenadas por frequência
-    suggestions = db.query(
-        models.Account.name,
-        func.count(models.Account.name).label('count')
-    ).filter(
-        models.Account.user_id != user_id  # Excluir contas do próprio usuário
-    ).group_by(
-        models.Account.name
-    ).order_by(
-        func.count(models.Account.name).desc()  # Mais populares primeiro
-    ).limit(limit).all()
+    """
+    Get account name suggestions from other users (most popular)
 
-    # Retornar apenas os nomes
-    return [suggestion.name for suggestion in suggestions]
+    Lê o top global em cache (popular_account_names) e remove os nomes que o
+    usuário já usa: o custo não depende do tamanho da tabela de contas.
+    """
+    popular = popular_account_names.get(_popular_names_loader(db, models.Account))
+    return _subtract_own_names(db, models.Account, user_id, popular, limit)
 
 
 def update_account(db: Session, account_id: int, account: schemas.AccountUpdate):
@@ -151,6 +204,13 @@ def update_account(db: Session, account_id: int, account: schemas.AccountUpdate)
         if account.account_type is not None:
             db_account.account_type = account.account_type
         if account.is_active is not None:
+            if bool(account.is_active) != bool(db_account.is_active):
+                sign = 1 if account.is_active else -1
+                _adjust_user_summary(
+                    db, db_account.user_id,
+                    total_accounts=sign,
+                    total_balance=sign * db_account.balance
+                )
             db_account.is_active = account.is_active
         db.commit()
         db.refresh(db_account)
@@ -161,6 +221,11 @@ def delete_account(db: Session, account_id: int, soft_delete: bool = True):
     """Delete account by ID (soft delete por padrão)"""
     db_account = get_account(db, account_id)
     if db_account:
+        if db_account.is_active:
+            _adjust_user_summary(
+                db, db_account.user_id,
+                total_accounts=-1, total_balance=-db_account.balance
+            )
         if soft_delete:
             # Soft delete: apenas marca como inativa
             db_account.is_active = False
@@ -191,41 +256,63 @@ def calculate_account_balance(db: Session, account_id: int):
         models.Transaction.account_id == account_id
     ).first()
 
-    total_amount = result[0] if result[0] is not None else 0.0
+    total_amount = result[0] if result[0] is not None else ZERO
     total_transactions = result[1] if result[1] is not None else 0
 
     calculated_balance = account.initial_balance + total_amount
     return calculated_balance, total_transactions
 
 
-def audit_account_balance(db: Session, account_id: int):
+def _account_audit_query(db: Session):
     """
-    Audita o saldo da conta comparando balance vs calculated_balance
-    Retorna dict com informações detalhadas
+    Auditoria de contas em um único SELECT: contas LEFT JOIN transações com
+    GROUP BY conta (contas sem transações entram com soma 0).
+    Filtrar com .filter() por conta ou por usuário.
     """
-    account = get_account(db, account_id)
-    if not account:
-        return None
+    from sqlalchemy import func
 
-    calculated_balance, total_transactions = calculate_account_balance(
-        db, account_id
+    return db.query(
+        models.Account.id,
+        models.Account.name,
+        models.Account.initial_balance,
+        models.Account.balance,
+        func.coalesce(func.sum(models.Transaction.amount), 0).label("total_amount"),
+        func.count(models.Transaction.id).label("total_transactions"),
+    ).outerjoin(
+        models.Transaction, models.Transaction.account_id == models.Account.id
+    ).group_by(
+        models.Account.id, models.Account.name,
+        models.Account.initial_balance, models.Account.balance
     )
 
-    difference = account.balance - calculated_balance
-    is_consistent = abs(difference) < 0.01  # Tolerância de 1 centavo
+
+def _account_audit(row):
+    """Montar o resultado da auditoria a partir de uma linha de _account_audit_query"""
+    calculated_balance = row.initial_balance + row.total_amount
+    # Centavos inteiros: comparação exata, sem tolerância
+    difference = row.balance - calculated_balance
 
     return {
-        "account_id": account.id,
-        "account_name": account.name,
-        "initial_balance": account.initial_balance,
-        "current_balance": account.balance,
+        "account_id": row.id,
+        "account_name": row.name,
+        "initial_balance": row.initial_balance,
+        "current_balance": row.balance,
         "calculated_balance": calculated_balance,
-        "total_transactions": total_transactions,
-        "is_consistent": is_consistent,
+        "total_transactions": row.total_transactions,
+        "is_consistent": difference == 0,
         "difference": difference
     }
 
 
+def audit_account_balance(db: Session, account_id: int):
+    """
+    Audita o saldo da conta comparando balance vs calculated_balance
+    Retorna dict com informações detalhadas
+    """
+    row = _account_audit_query(db).filter(models.Account.id == account_id).first()
+    return _account_audit(row) if row else None
+
+
 def recalculate_account_balance(db: Session, account_id: int):
     """
     Recalcula e corrige o saldo da conta baseado nas transações
@@ -239,6 +326,11 @@ def recalculate_account_balance(db: Session, account_id: int):
     if account:
         old_balance = account.balance
         account.balance = calculated_balance
+        if account.is_active:
+            _adjust_user_summary(
+                db, account.user_id,
+                total_balance=calculated_balance - old_balance
+            )
         db.commit()
         db.refresh(account)
 
@@ -253,18 +345,106 @@ def recalculate_account_balance(db: Session, account_id: int):
 
 def audit_all_user_accounts(db: Session, user_id: int):
     """
-    Audita todas as contas de um usuário
-    Retorna lista com status de cada conta
+    Audita todas as contas de um usuário (inclusive inativas)
+    Retorna lista com status de cada conta; uma única query para todas
+    """
+    rows = _account_audit_query(db).filter(
+        models.Account.user_id == user_id
+    ).order_by(models.Account.id)
+    return [_account_audit(row) for row in rows]
+
+
+def audit_accounts_chunk(db: Session, after_id: int = 0, limit: int = 500):
+    """
+    Auditar as próximas `limit` contas (de todos os usuários) com id > after_id,
+    em ordem de id. Uma query por lote; usado pela verificação em segundo plano
+    (check_balances.py), que retoma a partir do último id visto.
     """
-    accounts = get_user_accounts(db, user_id, include_inactive=True)
-    audits = []
+    rows = _account_audit_query(db).filter(
+        models.Account.id > after_id
+    ).order_by(models.Account.id).limit(limit)
+    return [_account_audit(row) for row in rows]
 
-    for account in accounts:
-        audit = audit_account_balance(db, account.id)
-        if audit:
-            audits.append(audit)
 
-    return audits
+def recalculate_user_accounts(db: Session, user_id: int):
+    """
+    Corrigir de uma vez o saldo de todas as contas inconsistentes do usuário.
+    Retorna a lista de correções no formato de recalculate_account_balance.
+    """
+    account_ids = [
+        audit["account_id"]
+        for audit in audit_all_user_accounts(db, user_id)
+        if not audit["is_consistent"]
+    ]
+    return recalculate_accounts(db, account_ids)
+
+
+def recalculate_accounts(db: Session, account_ids: list):
+    """
+    Gravar o saldo calculado nas contas informadas que divergem dele.
+
+    As contas são travadas (FOR UPDATE no PostgreSQL) antes do cálculo: uma
+    transação concorrente que ainda não ajustou o saldo espera o commit e
+    aplica o seu delta sobre o valor corrigido. Um único UPDATE ... FROM
+    (mesmo LEFT JOIN/GROUP BY da auditoria) corrige todas; o resumo de cada
+    usuário recebe a diferença das contas ativas. Faz commit.
+    """
+    from sqlalchemy import func
+
+    if not account_ids:
+        return []
+
+    before = {
+        row.id: row.balance
+        for row in db.query(models.Account.id, models.Account.balance)
+        .filter(models.Account.id.in_(account_ids))
+        .with_for_update()
+    }
+
+    account = aliased(models.Account)
+    calculated = db.query(
+        account.id.label("account_id"),
+        (account.initial_balance
+         + func.coalesce(func.sum(models.Transaction.amount), 0)).label("balance")
+    ).outerjoin(
+        models.Transaction, models.Transaction.account_id == account.id
+    ).filter(
+        account.id.in_(account_ids)
+    ).group_by(
+        account.id, account.initial_balance
+    ).subquery()
+
+    rows = db.execute(
+        update(models.Account)
+        .where(
+            models.Account.id == calculated.c.account_id,
+            models.Account.balance != calculated.c.balance
+        )
+        .values(balance=calculated.c.balance)
+        .returning(models.Account.id, models.Account.balance,
+                   models.Account.is_active, models.Account.user_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    corrections = []
+    summary_deltas = {}
+    for row in sorted(rows):
+        old_balance = before[row.id]
+        if row.is_active:
+            summary_deltas[row.user_id] = (
+                summary_deltas.get(row.user_id, 0) + row.balance - old_balance
+            )
+        corrections.append({
+            "account_id": row.id,
+            "balance_before": old_balance,
+            "balance_after": row.balance,
+            "corrected": True
+        })
+    for user_id, delta in summary_deltas.items():
+        if delta:
+            _adjust_user_summary(db, user_id, total_balance=delta)
+    db.commit()
+    return corrections
 
 
 # ========================
@@ -310,29 +490,21 @@ def create_category(db: Session, category: schemas.CategoryCreate, user_id: int)
         user_id=user_id
     )
     db.add(db_category)
+    _adjust_user_summary(db, user_id, total_categories=1)
     db.commit()
     db.refresh(db_category)
     return db_category
 
 
 def get_category_suggestions(db: Session, user_id: int, limit: int = 10):
-    """Get category name suggestions from other users (most popular)"""
-    from sqlalchemy import func
-
-    # Buscar categorias de outros usuários, agrupadas por nome, ordenadas por frequência
-    suggestions = db.query(
-        models.Category.name,
-        func.count(models.Category.name).label('count')
-    ).filter(
-        models.Category.user_id != user_id  # Excluir categorias do próprio usuário
-    ).group_by(
-        models.Category.name
-    ).order_by(
-        func.count(models.Category.name).desc()  # Mais populares primeiro
-    ).limit(limit).all()
+    """
+    Get category name suggestions from other users (most popular)
 
-    # Retornar apenas os nomes
-    return [suggestion.name for suggestion in suggestions]
+    Mesmo esquema das contas: top global em cache (popular_category_names)
+    menos as categorias que o usuário já tem.
+    """
+    popular = popular_category_names.get(_popular_names_loader(db, models.Category))
+    return _subtract_own_names(db, models.Category, user_id, popular, limit)
 
 
 def update_category(db: Session, category_id: int,
@@ -352,6 +524,7 @@ def delete_category(db: Session, category_id: int):
     """Delete category by ID"""
     db_category = get_category(db, category_id)
     if db_category:
+        _adjust_user_summary(db, db_category.user_id, total_categories=-1)
         db.delete(db_category)
         db.commit()
     return db_category
@@ -361,16 +534,149 @@ def delete_category(db: Session, category_id: int):
 # TRANSACTION OPERATIONS
 # ========================
 
-def get_transaction(db: Session, transaction_id: int):
-    """Get transaction by ID"""
-    return db.query(models.Transaction).filter(models.Transaction.id == transaction_id).first()
+# Relacionamentos de Transaction que podem ser carregados junto
+TRANSACTION_RELATIONS = ("category", "account", "user")
+
+
+def _transaction_load_options(relations, loader=joinedload):
+    """
+    Loader options para carregar os relacionamentos pedidos na mesma ida ao
+    banco, em vez de um SELECT lazy por linha (N+1).
+
+    joinedload para leituras de uma linha; selectinload nas listagens, onde
+    várias linhas compartilham o mesmo usuário/categoria/conta e um
+    SELECT ... IN por relacionamento evita repetir colunas em cada linha.
+    """
+    return [loader(getattr(models.Transaction, relation)) for relation in relations]
+
+
+def get_transaction(db: Session, transaction_id: int, load_relations: bool = False):
+    """
+    Get transaction by ID
+    Com load_relations=True carrega category, account e user no mesmo SELECT.
+    """
+    query = db.query(models.Transaction)
+    if load_relations:
+        query = query.options(*_transaction_load_options(TRANSACTION_RELATIONS))
+    return query.filter(models.Transaction.id == transaction_id).first()
+
+
+def user_transactions_query(db: Session, user_id: int, skip: int = 0, limit: int = 100,
+                            cursor: tuple = None, expand=(), **filters):
+    """
+    Query da listagem de transações do usuário (ver get_user_transactions).
+    Separada para permitir inspecionar o plano de execução (EXPLAIN).
+    """
+    query = db.query(models.Transaction).options(
+        *_transaction_load_options(expand, loader=selectinload)
+    ).filter(
+        models.Transaction.user_id == user_id
+    )
+    query = _filter_transactions(query, **filters).order_by(
+        models.Transaction.date.desc(), models.Transaction.id.desc()
+    )
+
+    if cursor is not None:
+        cursor_date, cursor_id = cursor
+        query = query.filter(or_(
+            models.Transaction.date < cursor_date,
+            and_(
+                models.Transaction.date == cursor_date,
+                models.Transaction.id < cursor_id
+            )
+        ))
+    else:
+        query = query.offset(skip)
+
+    return query.limit(limit)
+
+
+def get_user_transactions(db: Session, user_id: int, skip: int = 0, limit: int = 100,
+                          cursor: tuple = None, expand=(), **filters):
+    """
+    Get all transactions for a user ordered by date (newest first)
+
+    Ordena por (date, id) para que linhas com a mesma data tenham ordem estável.
+    Se cursor=(date, id) for informado, faz seek a partir da última linha
+    entregue (keyset) e ignora skip, mantendo o custo constante em qualquer página.
+    expand: relacionamentos a carregar antecipadamente (ver TRANSACTION_RELATIONS).
+    filters: filtros opcionais de _filter_transactions (período, tipo, valor...).
+    """
+    return user_transactions_query(
+        db, user_id, skip=skip, limit=limit, cursor=cursor, expand=expand, **filters
+    ).all()
+
+
+def _filter_transactions(query, start: date = None, end: date = None,
+                         transaction_type: str = None, category_id: int = None,
+                         account_id: int = None, min_amount: float = None,
+                         max_amount: float = None, q: str = None):
+    """
+    Aplicar os filtros opcionais da listagem/exportação.
+
+    min_amount/max_amount comparam o valor absoluto (despesas são negativas).
+    q busca a substring na descrição, sem diferenciar maiúsculas.
+    Tipo, categoria e conta usam os índices compostos de models.Transaction.
+    """
+    if start is not None:
+        query = query.filter(models.Transaction.date >= start)
+    if end is not None:
+        query = query.filter(models.Transaction.date <= end)
+    if transaction_type:
+        query = query.filter(models.Transaction.transaction_type == transaction_type)
+    if category_id is not None:
+        query = query.filter(models.Transaction.category_id == category_id)
+    if account_id is not None:
+        query = query.filter(models.Transaction.account_id == account_id)
+    if min_amount is not None:
+        query = query.filter(money_abs(models.Transaction.amount) >= min_amount)
+    if max_amount is not None:
+        query = query.filter(money_abs(models.Transaction.amount) <= max_amount)
+    if q:
+        pattern = q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        query = query.filter(
+            models.Transaction.description.ilike(f'%{pattern}%', escape='\\')
+        )
+    return query
+
 
+# Colunas da exportação de transações (na ordem do arquivo)
+EXPORT_COLUMNS = (
+    'id', 'date', 'description', 'amount', 'transaction_type',
+    'category_id', 'category_name', 'account_id', 'account_name'
+)
 
-def get_user_transactions(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    """Get all transactions for a user ordered by date (newest first)"""
-    return db.query(models.Transaction).filter(
+
+def iter_user_transactions_for_export(db: Session, user_id: int, batch_size: int = 1000,
+                                      **filters):
+    """
+    Percorrer todas as transações do usuário (mais antigas primeiro) sem
+    carregá-las de uma vez: yield_per busca batch_size linhas por vez de um
+    cursor no servidor. Gera tuplas na ordem de EXPORT_COLUMNS.
+    filters: start, end, transaction_type, category_id.
+    """
+    query = db.query(
+        models.Transaction.id,
+        models.Transaction.date,
+        models.Transaction.description,
+        models.Transaction.amount,
+        models.Transaction.transaction_type,
+        models.Transaction.category_id,
+        models.Category.name,
+        models.Transaction.account_id,
+        models.Account.name,
+    ).outerjoin(
+        models.Category, models.Category.id == models.Transaction.category_id
+    ).outerjoin(
+        models.Account, models.Account.id == models.Transaction.account_id
+    ).filter(
         models.Transaction.user_id == user_id
-    ).order_by(models.Transaction.date.desc()).offset(skip).limit(limit).all()
+    )
+    query = _filter_transactions(query, **filters).order_by(
+        models.Transaction.date, models.Transaction.id
+    )
+    for row in query.yield_per(batch_size):
+        yield tuple(row)
 
 
 def get_all_transactions(db: Session, skip: int = 0, limit: int = 100):
@@ -393,27 +699,33 @@ def create_transaction(db: Session, transaction: schemas.TransactionCreate, user
 
     # Atualizar saldo da conta se account_id foi fornecido
     if transaction.account_id:
-        account = get_account(db, transaction.account_id)
-        if account:
-            account.balance += transaction.amount
+        _apply_account_delta(db, transaction.account_id, transaction.amount)
+
+    _track_transaction(db, user_id, transaction)
 
     db.commit()
-    db.refresh(db_transaction)
-    return db_transaction
+    return get_transaction(db, db_transaction.id, load_relations=True)
 
 
 def update_transaction(db: Session, transaction_id: int, transaction: schemas.TransactionCreate):
     """Update transaction"""
     db_transaction = get_transaction(db, transaction_id)
     if db_transaction:
-        old_account_id = db_transaction.account_id
-        old_amount = db_transaction.amount
+        # Reverter o valor antigo e aplicar o novo: um UPDATE por conta envolvida
+        account_deltas = {}
+        if db_transaction.account_id:
+            account_deltas[db_transaction.account_id] = -db_transaction.amount
+        if transaction.account_id:
+            account_deltas[transaction.account_id] = (
+                account_deltas.get(transaction.account_id, 0) + transaction.amount
+            )
+        for account_id, delta in account_deltas.items():
+            _apply_account_delta(db, account_id, delta)
 
-        # Reverter saldo da conta antiga se houver
-        if old_account_id:
-            old_account = get_account(db, old_account_id)
-            if old_account:
-                old_account.balance -= old_amount
+        # Remover a versão antiga e incluir a nova com um único delta por chave
+        _track_transactions(db, db_transaction.user_id, [
+            (db_transaction, -1), (transaction, 1)
+        ])
 
         # Atualizar campos da transação
         db_transaction.amount = transaction.amount
@@ -423,14 +735,8 @@ def update_transaction(db: Session, transaction_id: int, transaction: schemas.Tr
         db_transaction.account_id = transaction.account_id
         db_transaction.transaction_type = transaction.transaction_type
 
-        # Adicionar valor na nova conta se houver
-        if transaction.account_id:
-            new_account = get_account(db, transaction.account_id)
-            if new_account:
-                new_account.balance += transaction.amount
-
         db.commit()
-        db.refresh(db_transaction)
+        return get_transaction(db, transaction_id, load_relations=True)
     return db_transaction
 
 
@@ -440,60 +746,1019 @@ def delete_transaction(db: Session, transaction_id: int):
     if db_transaction:
         # Reverter saldo da conta se houver
         if db_transaction.account_id:
-            account = get_account(db, db_transaction.account_id)
-            if account:
-                account.balance -= db_transaction.amount
+            _apply_account_delta(db, db_transaction.account_id, -db_transaction.amount)
+
+        _track_transaction(db, db_transaction.user_id, db_transaction, sign=-1)
 
         db.delete(db_transaction)
         db.commit()
     return db_transaction
 
 
+def _get_owners(db: Session, model, ids):
+    """Mapear {id: user_id} para um conjunto de IDs em uma única query"""
+    if not ids:
+        return {}
+    rows = db.query(model.id, model.user_id).filter(model.id.in_(ids)).all()
+    return {row.id: row.user_id for row in rows}
+
+
+def get_category_owners(db: Session, category_ids):
+    """Dono (user_id) de cada categoria informada; IDs inexistentes ficam de fora"""
+    return _get_owners(db, models.Category, category_ids)
+
+
+def get_account_owners(db: Session, account_ids):
+    """Dono (user_id) de cada conta informada; IDs inexistentes ficam de fora"""
+    return _get_owners(db, models.Account, account_ids)
+
+
+def get_max_transaction_id(db: Session, user_id: int):
+    """Maior ID de transação do usuário (0 se não houver)"""
+    from sqlalchemy import func
+    return db.query(func.max(models.Transaction.id)).filter(
+        models.Transaction.user_id == user_id
+    ).scalar() or 0
+
+
+def transaction_key(transaction):
+    """Chave usada para detectar lançamentos duplicados na importação"""
+    return (
+        transaction.date, round(transaction.amount, 2),
+        transaction.description or '', transaction.account_id or 0
+    )
+
+
+def get_existing_transaction_keys(db: Session, user_id: int, keys, max_id: int):
+    """
+    Quais das chaves (ver transaction_key) já existem entre as transações do
+    usuário com id <= max_id. Uma query por lote, filtrando pelas datas do lote.
+    """
+    if not keys or not max_id:
+        return set()
+    rows = db.query(
+        models.Transaction.date, models.Transaction.amount,
+        models.Transaction.description, models.Transaction.account_id
+    ).filter(
+        models.Transaction.user_id == user_id,
+        models.Transaction.id <= max_id,
+        models.Transaction.date.in_({key[0] for key in keys})
+    )
+    return {transaction_key(row) for row in rows} & set(keys)
+
+
+def bulk_create_transactions(db: Session, transactions, user_id: int):
+    """
+    Criar várias transações de uma vez (importação de extrato).
+
+    As linhas são inseridas em lotes de BULK_INSERT_BATCH_SIZE via executemany,
+    e saldos/agregados recebem um único delta por conta e por chave do rollup,
+    tudo em uma só transação. Categorias e contas devem ter sido validadas
+    pelo chamador. Retorna dict {account_id: saldo atualizado}.
+    """
+    rows = []
+    account_deltas = {}
+    summary_deltas = {}
+    monthly_deltas = {}
+    suggestion_deltas = {}
+
+    for transaction in transactions:
+        rows.append({
+            "amount": transaction.amount,
+            "date": transaction.date,
+            "description": transaction.description,
+            "category_id": transaction.category_id,
+            "account_id": transaction.account_id,
+            "transaction_type": transaction.transaction_type,
+            "user_id": user_id,
+        })
+        if transaction.account_id:
+            account_deltas[transaction.account_id] = (
+                account_deltas.get(transaction.account_id, 0) + transaction.amount
+            )
+        for field, delta in _transaction_summary_deltas(
+            transaction.amount, transaction.transaction_type
+        ).items():
+            summary_deltas[field] = summary_deltas.get(field, 0) + delta
+        key, (amount_delta, count_delta) = _monthly_total_delta(transaction)
+        amount, count = monthly_deltas.get(key, (0, 0))
+        monthly_deltas[key] = (amount + amount_delta, count + count_delta)
+        suggestion = _description_suggestion_delta(transaction)
+        if suggestion is not None:
+            key, (_, used) = suggestion
+            count, last_used = suggestion_deltas.get(key, (0, used))
+            suggestion_deltas[key] = (count + 1, max(last_used, used))
+
+    for start in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+        db.execute(
+            insert(models.Transaction),
+            rows[start:start + BULK_INSERT_BATCH_SIZE]
+        )
+
+    balances = {}
+    for account_id, delta in account_deltas.items():
+        balance = _apply_account_delta(db, account_id, delta)
+        if balance is not None:
+            balances[account_id] = balance
+
+    if summary_deltas:
+        _adjust_user_summary(db, user_id, **summary_deltas)
+    _adjust_monthly_totals(db, user_id, monthly_deltas)
+    _adjust_description_suggestions(db, user_id, suggestion_deltas)
+
+    db.commit()
+    return balances
+
+
 def get_transaction_description_suggestions(
     db: Session,
     user_id: int,
     transaction_type: str = None,
     category_id: int = None,
-    limit: int = 10
+    limit: int = 10,
+    q: str = None
 ):
     """
     Get transaction description suggestions - prioritiza do usuário atual, depois outros usuários
 
+    Lê a tabela description_suggestions (mantida pelo crud), nunca a de transações.
+    As descrições do usuário vêm primeiro, ordenadas por frecency_rank; o restante é
+    completado com as mais populares entre todos os usuários (em cache).
+
     Args:
         user_id: ID do usuário atual
         transaction_type: Filtro opcional por tipo ('income' ou 'expense')
-        category_id: Filtro opcional por categoria
+        category_id: Filtro opcional por categoria (vale para as descrições do usuário)
         limit: Número máximo de sugestões (padrão: 10)
+        q: Prefixo digitado (sem diferenciar maiúsculas e acentos)
 
     Returns:
-        Lista de descrições mais populares
+        Lista de descrições
+    """
+    ensure_user_aggregates(db, user_id)
+    prefix = suggestion_key(q or '')
+
+    query = db.query(models.DescriptionSuggestion.description).filter(
+        models.DescriptionSuggestion.user_id == user_id
+    )
+    if prefix:
+        query = query.filter(
+            _prefix_filter(models.DescriptionSuggestion.description_key, prefix)
+        )
+    if transaction_type:
+        query = query.filter(
+            models.DescriptionSuggestion.transaction_type == transaction_type
+        )
+    if category_id:
+        query = query.filter(models.DescriptionSuggestion.category_id == category_id)
+
+    # A mesma descrição pode aparecer em vários tipos/categorias: vale a
+    # primeira (maior frecency). Lê em lotes e para ao completar o limite.
+    suggestions = []
+    for row in query.order_by(
+        models.DescriptionSuggestion.frecency_rank.desc(),
+        models.DescriptionSuggestion.description
+    ).yield_per(limit * 2):
+        if row.description not in suggestions:
+            suggestions.append(row.description)
+            if len(suggestions) >= limit:
+                return suggestions
+
+    own = set(suggestions)
+    for description in get_popular_descriptions(db, transaction_type, prefix):
+        if len(suggestions) >= limit:
+            break
+        if description not in own:
+            suggestions.append(description)
+
+    return suggestions
+
+
+# ========================
+# SUMMARY OPERATIONS
+# ========================
+
+SUMMARY_FIELDS = (
+    'total_accounts', 'total_balance', 'total_categories',
+    'total_transactions', 'total_income', 'total_expense'
+)
+
+
+def _empty_user_summary(user_id: int):
+    """Resumo zerado (colunas preenchidas já no Python para permitir ajustes antes do flush)"""
+    return models.UserSummary(user_id=user_id, **{field: 0 for field in SUMMARY_FIELDS})
+
+
+def _adjust_user_summary(db: Session, user_id: int, **deltas):
+    """
+    Aplicar deltas ao resumo do usuário na mesma transação da alteração.
+
+    A soma é feita pelo banco (UPDATE ... SET campo = campo + delta), como o
+    saldo em _apply_account_delta: lançamentos simultâneos do mesmo usuário
+    não perdem atualizações. Se o resumo ainda não foi materializado (usuário
+    anterior ao resumo), não atualiza nada: ele será calculado do zero no
+    próximo get_user_summary.
     """
     from sqlalchemy import func
 
-    # Query base: buscar descrições não vazias
-    query = db.query(
+    if not deltas:
+        return
+    db.execute(
+        update(models.UserSummary)
+        .where(models.UserSummary.user_id == user_id)
+        .values({
+            field: func.coalesce(getattr(models.UserSummary, field), 0) + delta
+            for field, delta in deltas.items()
+        })
+        # Objeto já carregado na sessão tem os campos expirados (relidos do banco)
+        .execution_options(synchronize_session="fetch")
+    )
+
+
+def _transaction_summary_deltas(amount: Decimal, transaction_type: str, sign: int = 1):
+    """Deltas do resumo para incluir (sign=1) ou remover (sign=-1) uma transação"""
+    deltas = {'total_transactions': sign}
+    if transaction_type == 'income':
+        deltas['total_income'] = sign * amount
+    elif transaction_type == 'expense':
+        deltas['total_expense'] = sign * abs(amount)
+    return deltas
+
+
+def _track_transaction(db: Session, user_id: int, transaction, sign: int = 1):
+    """
+    Incluir (sign=1) ou remover (sign=-1) uma transação dos agregados materializados.
+    transaction pode ser o modelo ou o schema (usa amount, date, tipo e categoria).
+    """
+    _track_transactions(db, user_id, [(transaction, sign)])
+
+
+def _track_transactions(db: Session, user_id: int, changes):
+    """
+    Aplicar aos agregados uma lista de (transação, sign).
+
+    Os deltas são somados por chave antes de tocar as linhas: numa edição que
+    mantém mês, categoria e tipo (ou descrição), remover e incluir viram um
+    único ajuste da mesma linha do rollup (ou da sugestão), que não pode ser
+    apagada e reaproveitada antes do flush.
+    """
+    summary_deltas = {}
+    monthly_deltas = {}
+    suggestion_deltas = {}
+    for transaction, sign in changes:
+        for field, delta in _transaction_summary_deltas(
+            transaction.amount, transaction.transaction_type, sign
+        ).items():
+            summary_deltas[field] = summary_deltas.get(field, 0) + delta
+        key, (amount_delta, count_delta) = _monthly_total_delta(transaction, sign)
+        amount, count = monthly_deltas.get(key, (0, 0))
+        monthly_deltas[key] = (amount + amount_delta, count + count_delta)
+        suggestion = _description_suggestion_delta(transaction, sign)
+        if suggestion is not None:
+            key, (count_delta, used) = suggestion
+            count, last_used = suggestion_deltas.get(key, (0, None))
+            if used is not None and (last_used is None or used > last_used):
+                last_used = used
+            suggestion_deltas[key] = (count + count_delta, last_used)
+
+    _adjust_user_summary(db, user_id, **summary_deltas)
+    _adjust_monthly_totals(db, user_id, monthly_deltas)
+    _adjust_description_suggestions(db, user_id, suggestion_deltas)
+
+
+def _apply_account_delta(db: Session, account_id: int, delta: Decimal):
+    """
+    Somar delta ao saldo da conta e ao saldo total do resumo (se a conta estiver ativa).
+    Retorna o novo saldo (None se a conta não existir).
+
+    A soma é feita pelo banco num único UPDATE ... RETURNING, na transação do
+    chamador: lançamentos simultâneos na mesma conta (outros workers) não
+    perdem atualizações, e a conta não precisa ser lida antes.
+    """
+    row = db.execute(
+        update(models.Account)
+        .where(models.Account.id == account_id)
+        .values(balance=models.Account.balance + delta)
+        .returning(models.Account.balance, models.Account.is_active, models.Account.user_id)
+    ).first()
+    if row is None:
+        return None
+    if row.is_active:
+        _adjust_user_summary(db, row.user_id, total_balance=delta)
+    return row.balance
+
+
+def compute_user_summary(db: Session, user_id: int):
+    """
+    Calcular o resumo do zero a partir das tabelas de origem.
+    Retorna dict com os campos de SUMMARY_FIELDS.
+
+    Um único SELECT juntando três agregados de uma linha cada: uma ida ao
+    banco em vez de cinco.
+    """
+    from sqlalchemy import func, select, case, true
+
+    accounts = select(
+        func.count(models.Account.id).label("total_accounts"),
+        func.sum(models.Account.balance).label("total_balance")
+    ).where(
+        models.Account.user_id == user_id,
+        models.Account.is_active == True
+    ).subquery()
+
+    categories = select(
+        func.count(models.Category.id).label("total_categories")
+    ).where(
+        models.Category.user_id == user_id
+    ).subquery()
+
+    is_income = models.Transaction.transaction_type == 'income'
+    is_expense = models.Transaction.transaction_type == 'expense'
+    transactions = select(
+        func.count(models.Transaction.id).label("total_transactions"),
+        func.sum(case((is_income, models.Transaction.amount))).label("total_income"),
+        func.sum(case((is_expense, money_abs(models.Transaction.amount)))).label("total_expense")
+    ).where(
+        models.Transaction.user_id == user_id
+    ).subquery()
+
+    (total_accounts, total_balance, total_categories,
+     total_transactions, total_income, total_expense) = db.execute(
+        select(accounts, categories, transactions).select_from(
+            accounts.join(categories, true()).join(transactions, true())
+        )
+    ).one()
+
+    return {
+        "total_accounts": total_accounts or 0,
+        "total_balance": total_balance or ZERO,
+        "total_categories": total_categories or 0,
+        "total_transactions": total_transactions or 0,
+        "total_income": total_income or ZERO,
+        "total_expense": total_expense or ZERO,
+    }
+
+
+def rebuild_user_summary(db: Session, user_id: int):
+    """Recalcular e gravar o resumo do usuário do zero"""
+    values = compute_user_summary(db, user_id)
+    summary = db.get(models.UserSummary, user_id)
+    if summary is None:
+        summary = models.UserSummary(user_id=user_id)
+        db.add(summary)
+    for field, value in values.items():
+        setattr(summary, field, value)
+    db.commit()
+    db.refresh(summary)
+    return summary
+
+
+def get_user_summary(db: Session, user_id: int):
+    """
+    Get dashboard summary (leitura por chave primária).
+    Materializa o resumo na primeira leitura se ainda não existir.
+    """
+    summary = db.get(models.UserSummary, user_id)
+    if summary is None:
+        rebuild_monthly_totals(db, user_id)
+        rebuild_description_suggestions(db, user_id)
+        summary = rebuild_user_summary(db, user_id)
+    return summary
+
+
+def ensure_user_aggregates(db: Session, user_id: int):
+    """
+    Garantir que resumo e totais mensais do usuário estejam materializados.
+
+    A existência da linha em user_summaries marca o usuário como materializado:
+    a partir dela todos os agregados passam a ser mantidos pelo crud.
+    """
+    get_user_summary(db, user_id)
+
+
+def diff_user_summary(summary, values: dict):
+    """
+    Comparar resumo armazenado com valores calculados.
+    Retorna dict {campo: (armazenado, calculado)} apenas com divergências.
+    """
+    differences = {}
+    for field in SUMMARY_FIELDS:
+        stored = getattr(summary, field) or 0
+        expected = values[field]
+        if stored != expected:  # Valores em centavos exatos
+            differences[field] = (stored, expected)
+    return differences
+
+
+# ========================
+# MONTHLY TOTALS (ROLLUP)
+# ========================
+
+def _year_month(value: date) -> str:
+    """Chave do mês no formato 'YYYY-MM'"""
+    return f"{value.year:04d}-{value.month:02d}"
+
+
+def _monthly_total_delta(transaction, sign: int = 1):
+    """
+    Chave e delta de uma transação no rollup mensal.
+    Retorna ((year_month, category_id, transaction_type), (amount_delta, count_delta)).
+    """
+    key = (_year_month(transaction.date), transaction.category_id or 0,
+           transaction.transaction_type or '')
+    return key, (sign * abs(transaction.amount), sign)
+
+
+def _adjust_monthly_totals(db: Session, user_id: int, deltas: dict):
+    """
+    Aplicar deltas às linhas (usuário, mês, categoria, tipo) do rollup mensal.
+    deltas: {(year_month, category_id, transaction_type): (amount_delta, count_delta)},
+    um único delta por chave.
+
+    Segue a mesma regra do resumo: só mantém usuários já materializados.
+    Com uma chave só busca a linha pela PK; com várias carrega as existentes
+    em uma query e deixa inserts/updates para o flush.
+    """
+    if not deltas or db.get(models.UserSummary, user_id) is None:
+        return
+
+    single = len(deltas) == 1
+    if single:
+        key = next(iter(deltas))
+        row = db.get(models.TransactionMonthlyTotal, {
+            "user_id": user_id, "year_month": key[0],
+            "category_id": key[1], "transaction_type": key[2],
+        })
+        existing = {key: row} if row is not None else {}
+    else:
+        existing = {
+            (row.year_month, row.category_id, row.transaction_type): row
+            for row in db.query(models.TransactionMonthlyTotal).filter(
+                models.TransactionMonthlyTotal.user_id == user_id,
+                models.TransactionMonthlyTotal.year_month.in_(
+                    {year_month for year_month, _, _ in deltas}
+                )
+            )
+        }
+    for key, (amount_delta, count_delta) in deltas.items():
+        row = existing.get(key)
+        if row is None:
+            if count_delta <= 0:
+                continue
+            year_month, category_id, transaction_type = key
+            row = models.TransactionMonthlyTotal(
+                user_id=user_id, year_month=year_month, category_id=category_id,
+                transaction_type=transaction_type,
+                total_amount=amount_delta, transaction_count=count_delta
+            )
+            db.add(row)
+            if single:
+                db.flush([row])  # Visível para db.get no restante da transação
+            continue
+        row.total_amount += amount_delta
+        row.transaction_count += count_delta
+        if row.transaction_count <= 0:
+            db.delete(row)
+
+
+def compute_monthly_totals(db: Session, user_id: int):
+    """
+    Calcular o rollup mensal do zero.
+    Retorna dict {(year_month, category_id, transaction_type): (total_amount, count)}.
+
+    Agrupa por dia no banco (portável entre SQLite e PostgreSQL) e
+    consolida os dias em meses no Python.
+    """
+    from sqlalchemy import func
+
+    rows = db.query(
+        models.Transaction.date,
+        models.Transaction.category_id,
+        models.Transaction.transaction_type,
+        func.sum(money_abs(models.Transaction.amount)),
+        func.count(models.Transaction.id)
+    ).filter(
+        models.Transaction.user_id == user_id
+    ).group_by(
+        models.Transaction.date,
+        models.Transaction.category_id,
+        models.Transaction.transaction_type
+    ).all()
+
+    totals = {}
+    for row_date, category_id, transaction_type, amount, count in rows:
+        key = (_year_month(row_date), category_id or 0, transaction_type or '')
+        total_amount, total_count = totals.get(key, (ZERO, 0))
+        totals[key] = (total_amount + (amount or ZERO), total_count + count)
+    return totals
+
+
+def rebuild_monthly_totals(db: Session, user_id: int):
+    """Recalcular e gravar o rollup mensal do usuário do zero"""
+    totals = compute_monthly_totals(db, user_id)
+
+    db.query(models.TransactionMonthlyTotal).filter(
+        models.TransactionMonthlyTotal.user_id == user_id
+    ).delete(synchronize_session=False)
+
+    for (year_month, category_id, transaction_type), (amount, count) in totals.items():
+        db.add(models.TransactionMonthlyTotal(
+            user_id=user_id,
+            year_month=year_month,
+            category_id=category_id,
+            transaction_type=transaction_type,
+            total_amount=amount,
+            transaction_count=count
+        ))
+    db.commit()
+    return totals
+
+
+def diff_monthly_totals(db: Session, user_id: int, totals: dict):
+    """
+    Comparar rollup armazenado com valores calculados.
+    Retorna lista de chaves (year_month, category_id, transaction_type) divergentes.
+    """
+    stored = {
+        (row.year_month, row.category_id, row.transaction_type):
+            (row.total_amount, row.transaction_count)
+        for row in db.query(models.TransactionMonthlyTotal).filter(
+            models.TransactionMonthlyTotal.user_id == user_id
+        )
+    }
+    differences = []
+    for key in set(stored) | set(totals):
+        stored_amount, stored_count = stored.get(key, (ZERO, 0))
+        amount, count = totals.get(key, (ZERO, 0))
+        if stored_count != count or stored_amount != amount:
+            differences.append(key)
+    return sorted(differences)
+
+
+def _type_totals_columns(amount_column, type_column):
+    """Colunas SUM de receitas e despesas para um par (valor, tipo)"""
+    from sqlalchemy import case, func
+
+    return (
+        func.sum(case((type_column == 'income', amount_column), else_=0)),
+        func.sum(case((type_column == 'expense', amount_column), else_=0)),
+    )
+
+
+def get_totals_by_category(db: Session, user_id: int):
+    """
+    Totais por categoria a partir do rollup mensal.
+    Retorna lista de (category_id, category_name, income, expense, count).
+    """
+    from sqlalchemy import func
+
+    ensure_user_aggregates(db, user_id)
+    monthly = models.TransactionMonthlyTotal
+    income, expense = _type_totals_columns(monthly.total_amount, monthly.transaction_type)
+
+    return db.query(
+        monthly.category_id,
+        models.Category.name,
+        income,
+        expense,
+        func.sum(monthly.transaction_count)
+    ).join(
+        models.Category, monthly.category_id == models.Category.id
+    ).filter(
+        monthly.user_id == user_id
+    ).group_by(
+        monthly.category_id, models.Category.name
+    ).all()
+
+
+def _raw_period_totals(db: Session, user_id: int, start: date, end: date):
+    """Totais (income, expense, count) escaneando transações de start a end"""
+    from sqlalchemy import func
+
+    amount = money_abs(models.Transaction.amount)
+    income, expense = _type_totals_columns(amount, models.Transaction.transaction_type)
+    result = db.query(
+        income, expense, func.count(models.Transaction.id)
+    ).filter(
+        models.Transaction.user_id == user_id,
+        models.Transaction.date >= start,
+        models.Transaction.date <= end
+    ).first()
+    return result[0] or ZERO, result[1] or ZERO, result[2] or 0
+
+
+def get_totals_by_period(db: Session, user_id: int, start: date, end: date):
+    """
+    Totais (income, expense, count) de start a end (inclusive).
+
+    Meses inteiros dentro do período vêm do rollup mensal; apenas os meses
+    parciais nas pontas são escaneados na tabela de transações.
+    """
+    from sqlalchemy import func
+
+    if start > end:
+        return ZERO, ZERO, 0
+
+    # Primeiro e último mês completamente contidos no período
+    first_full = start if start.day == 1 else _next_month(start)
+    after_last_full = _next_month(end)
+    if after_last_full - timedelta(days=1) != end:
+        after_last_full = date(end.year, end.month, 1)
+
+    if first_full >= after_last_full:
+        return _raw_period_totals(db, user_id, start, end)
+
+    ensure_user_aggregates(db, user_id)
+    monthly = models.TransactionMonthlyTotal
+    income, expense = _type_totals_columns(monthly.total_amount, monthly.transaction_type)
+    result = db.query(
+        income, expense, func.sum(monthly.transaction_count)
+    ).filter(
+        monthly.user_id == user_id,
+        monthly.year_month >= _year_month(first_full),
+        monthly.year_month <= _year_month(after_last_full - timedelta(days=1))
+    ).first()
+
+    total_income = result[0] or ZERO
+    total_expense = result[1] or ZERO
+    total_count = result[2] or 0
+
+    edges = []
+    if start < first_full:
+        edges.append((start, first_full - timedelta(days=1)))
+    if after_last_full <= end:
+        edges.append((after_last_full, end))
+
+    for edge_start, edge_end in edges:
+        edge_income, edge_expense, edge_count = _raw_period_totals(
+            db, user_id, edge_start, edge_end
+        )
+        total_income += edge_income
+        total_expense += edge_expense
+        total_count += edge_count
+
+    return total_income, total_expense, total_count
+
+
+def _next_month(value: date) -> date:
+    """Primeiro dia do mês seguinte"""
+    if value.month == 12:
+        return date(value.year + 1, 1, 1)
+    return date(value.year, value.month + 1, 1)
+
+
+# ========================
+# DESCRIPTION SUGGESTIONS
+# ========================
+
+# Meia-vida (dias) do peso de recência no ranking por frecency.
+# Alterar exige recalcular as sugestões (rebuild_summaries.py).
+SUGGESTION_HALF_LIFE_DAYS = 30
+
+# Descrições mais usadas entre todos os usuários, por (tipo, prefixo).
+# Completam as sugestões quando o usuário tem poucas descrições próprias.
+popular_descriptions_cache = TTLCache(
+    maxsize=int(os.getenv("POPULAR_DESCRIPTIONS_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("POPULAR_DESCRIPTIONS_CACHE_TTL", "300"))
+)
+POPULAR_DESCRIPTIONS_TOP = 50
+
+
+def suggestion_key(text: str) -> str:
+    """Normalizar texto para busca por prefixo: minúsculas e sem acentos"""
+    normalized = unicodedata.normalize('NFKD', text.strip().lower())
+    return ''.join(char for char in normalized if not unicodedata.combining(char))
+
+
+def _prefix_filter(column, prefix: str):
+    """Prefixo como faixa (column >= p AND column < p + U+FFFF), para usar o índice"""
+    return and_(column >= prefix, column < prefix + '\uffff')
+
+
+def frecency_rank(use_count: int, last_used: date) -> float:
+    """
+    Chave de ordenação por frecency (frequência com decaimento pela idade).
+
+    A pontuação use_count * 0.5 ** (idade / meia-vida) tem a mesma ordem que
+    log2(use_count) + dia_do_último_uso / meia-vida, que não depende da data
+    atual: pode ser gravada na linha e indexada, sem recalcular a cada leitura.
+    """
+    if use_count <= 0:
+        return float('-inf')
+    days = last_used.toordinal() if last_used else 0
+    return math.log2(use_count) + days / SUGGESTION_HALF_LIFE_DAYS
+
+
+def _description_suggestion_delta(transaction, sign: int = 1):
+    """
+    Chave e delta de uma transação nas sugestões, ou None se não tiver descrição.
+    Retorna ((transaction_type, category_id, description), (count_delta, last_used));
+    last_used é None ao remover (a data de uso não volta atrás).
+    """
+    description = (transaction.description or '').strip()
+    if not description:
+        return None
+    key = (transaction.transaction_type or '', transaction.category_id or 0, description)
+    return key, (sign, transaction.date if sign > 0 else None)
+
+
+def _adjust_description_suggestions(db: Session, user_id: int, deltas: dict):
+    """
+    Aplicar deltas às sugestões de descrição do usuário.
+    deltas: {(transaction_type, category_id, description): (count_delta, last_used)},
+    um único delta por chave (last_used None: nenhuma inclusão).
+
+    Segue a regra dos demais agregados: só mantém usuários já materializados.
+    Ao remover uma transação, last_used não volta atrás (o rebuild recalcula).
+    """
+    if not deltas or db.get(models.UserSummary, user_id) is None:
+        return
+
+    single = len(deltas) == 1
+    if single:
+        key = next(iter(deltas))
+        row = db.get(models.DescriptionSuggestion, {
+            "user_id": user_id, "transaction_type": key[0],
+            "category_id": key[1], "description": key[2],
+        })
+        existing = {key: row} if row is not None else {}
+    else:
+        existing = {
+            (row.transaction_type, row.category_id, row.description): row
+            for row in db.query(models.DescriptionSuggestion).filter(
+                models.DescriptionSuggestion.user_id == user_id,
+                models.DescriptionSuggestion.description.in_(
+                    {description for _, _, description in deltas}
+                )
+            )
+        }
+
+    for key, (count_delta, last_used) in deltas.items():
+        row = existing.get(key)
+        if row is None:
+            if count_delta <= 0:
+                continue
+            transaction_type, category_id, description = key
+            row = models.DescriptionSuggestion(
+                user_id=user_id, transaction_type=transaction_type,
+                category_id=category_id, description=description,
+                description_key=suggestion_key(description),
+                use_count=count_delta, last_used=last_used,
+                frecency_rank=frecency_rank(count_delta, last_used)
+            )
+            db.add(row)
+            if single:
+                db.flush([row])  # Visível para db.get no restante da transação
+            continue
+        row.use_count += count_delta
+        if last_used is not None and (row.last_used is None or last_used > row.last_used):
+            row.last_used = last_used
+        if row.use_count <= 0:
+            db.delete(row)
+        else:
+            row.frecency_rank = frecency_rank(row.use_count, row.last_used)
+
+
+def compute_description_suggestions(db: Session, user_id: int):
+    """
+    Calcular as sugestões do usuário do zero.
+    Retorna dict {(transaction_type, category_id, description): (use_count, last_used)}.
+    """
+    from sqlalchemy import func
+
+    rows = db.query(
+        models.Transaction.transaction_type,
+        models.Transaction.category_id,
         models.Transaction.description,
-        func.count(models.Transaction.description).label('count')
+        func.count(models.Transaction.id),
+        func.max(models.Transaction.date)
     ).filter(
-        models.Transaction.description.isnot(None),  # Não nulas
-        models.Transaction.description != ''  # Não vazias
+        models.Transaction.user_id == user_id,
+        models.Transaction.description.isnot(None),
+        models.Transaction.description != ''
+    ).group_by(
+        models.Transaction.transaction_type,
+        models.Transaction.category_id,
+        models.Transaction.description
+    ).all()
+
+    suggestions = {}
+    for transaction_type, category_id, description, count, last_used in rows:
+        description = description.strip()
+        if not description:
+            continue
+        key = (transaction_type or '', category_id or 0, description)
+        stored_count, stored_last = suggestions.get(key, (0, None))
+        suggestions[key] = (
+            stored_count + count,
+            max(filter(None, (stored_last, last_used)), default=None)
+        )
+    return suggestions
+
+
+def rebuild_description_suggestions(db: Session, user_id: int):
+    """Recalcular e gravar as sugestões de descrição do usuário do zero"""
+    suggestions = compute_description_suggestions(db, user_id)
+
+    db.query(models.DescriptionSuggestion).filter(
+        models.DescriptionSuggestion.user_id == user_id
+    ).delete(synchronize_session=False)
+
+    for (transaction_type, category_id, description), (count, last_used) in suggestions.items():
+        db.add(models.DescriptionSuggestion(
+            user_id=user_id,
+            transaction_type=transaction_type,
+            category_id=category_id,
+            description=description,
+            description_key=suggestion_key(description),
+            use_count=count,
+            last_used=last_used,
+            frecency_rank=frecency_rank(count, last_used)
+        ))
+    db.commit()
+    return suggestions
+
+
+def diff_description_suggestions(db: Session, user_id: int, suggestions: dict):
+    """
+    Comparar sugestões armazenadas com valores calculados.
+    Retorna lista de chaves (transaction_type, category_id, description) com
+    contagem divergente (last_used não é comparado: só o rebuild o recua).
+    """
+    stored = {
+        (row.transaction_type, row.category_id, row.description): row.use_count
+        for row in db.query(models.DescriptionSuggestion).filter(
+            models.DescriptionSuggestion.user_id == user_id
+        )
+    }
+    return sorted(
+        key for key in set(stored) | set(suggestions)
+        if stored.get(key, 0) != suggestions.get(key, (0, None))[0]
     )
 
-    # Filtro opcional por tipo de transação
+
+def get_popular_descriptions(db: Session, transaction_type: str = None, prefix: str = ''):
+    """
+    Descrições mais usadas entre todos os usuários (top POPULAR_DESCRIPTIONS_TOP),
+    em cache por popular_descriptions_cache.
+    """
+    from sqlalchemy import func
+
+    cache_key = (transaction_type or '', prefix)
+    cached = popular_descriptions_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    query = db.query(
+        models.DescriptionSuggestion.description,
+        func.sum(models.DescriptionSuggestion.use_count).label('total')
+    )
     if transaction_type:
         query = query.filter(
-            models.Transaction.transaction_type == transaction_type)
+            models.DescriptionSuggestion.transaction_type == transaction_type
+        )
+    if prefix:
+        query = query.filter(
+            _prefix_filter(models.DescriptionSuggestion.description_key, prefix)
+        )
+    popular = [
+        row.description for row in query.group_by(
+            models.DescriptionSuggestion.description
+        ).order_by(
+            func.sum(models.DescriptionSuggestion.use_count).desc(),
+            models.DescriptionSuggestion.description
+        ).limit(POPULAR_DESCRIPTIONS_TOP)
+    ]
+    popular_descriptions_cache.set(cache_key, popular)
+    return popular
 
-    # Filtro opcional por categoria
-    if category_id:
-        query = query.filter(models.Transaction.category_id == category_id)
 
-    # Agrupar, ordenar por popularidade e limitar
-    suggestions = query.group_by(
-        models.Transaction.description
+# ========================
+# POPULAR NAMES (SUGGESTIONS)
+# ========================
+
+# Quantos nomes populares o cache global guarda (limite máximo das sugestões)
+POPULAR_NAMES_TOP = 100
+
+# Top global de nomes de contas e categorias, recalculado em segundo plano
+# a cada POPULAR_NAMES_TTL segundos (as leituras nunca esperam o recálculo)
+popular_account_names = StaleWhileRevalidate(
+    ttl=float(os.getenv("POPULAR_NAMES_TTL", "600"))
+)
+popular_category_names = StaleWhileRevalidate(
+    ttl=float(os.getenv("POPULAR_NAMES_TTL", "600"))
+)
+
+
+def compute_popular_names(db: Session, model, top: int = POPULAR_NAMES_TOP):
+    """Nomes mais usados entre todos os usuários (GROUP BY name na tabela inteira)"""
+    from sqlalchemy import func
+
+    rows = db.query(
+        model.name,
+        func.count(model.name).label('count')
+    ).group_by(
+        model.name
     ).order_by(
-        func.count(models.Transaction.description).desc()
-    ).limit(limit).all()
+        func.count(model.name).desc(),  # Mais populares primeiro
+        model.name
+    ).limit(top).all()
+    return [row.name for row in rows]
+
+
+def _popular_names_loader(db: Session, model):
+    """
+    Loader do cache global. Usa uma sessão própria no mesmo engine, pois o
+    recálculo roda em segundo plano, depois que a requisição já terminou.
+    """
+    bind = db.get_bind()
+
+    def load():
+        with Session(bind=bind) as session:
+            return compute_popular_names(session, model)
+    return load
+
+
+def _subtract_own_names(db: Session, model, user_id: int, popular, limit: int):
+    """Remover dos nomes populares os que o usuário já usa (sem diferenciar maiúsculas)"""
+    own = {
+        row.name.casefold() for row in db.query(model.name).filter(
+            model.user_id == user_id
+        ) if row.name
+    }
+    return [name for name in popular if name and name.casefold() not in own][:limit]
+
 
-    # Retornar apenas as descrições
-    return [suggestion.description for suggestion in suggestions]
+# ========================
+# TOKEN REVOCATION
+# ========================
+
+# Lista de revogação em memória, relida do banco a cada TOKEN_REVOCATION_REFRESH
+# segundos (revogações feitas em outros workers valem depois desse intervalo;
+# as deste processo valem na hora)
+token_revocations = StaleWhileRevalidate(
+    ttl=float(os.getenv("TOKEN_REVOCATION_REFRESH", "30"))
+)
+
+
+def compute_active_revocations(db: Session):
+    """Revogações ainda relevantes: {"jtis": set, "not_before": {user_id: epoch}}"""
+    revocations = {"jtis": set(), "not_before": {}}
+    rows = db.query(
+        models.RevokedToken.jti,
+        models.RevokedToken.user_id,
+        models.RevokedToken.not_before
+    ).filter(models.RevokedToken.expires_at > time.time())
+    for row in rows:
+        _remember_revocation(revocations, row.jti, row.user_id, row.not_before)
+    return revocations
+
+
+def _remember_revocation(revocations, jti, user_id, not_before):
+    if jti:
+        revocations["jtis"].add(jti)
+    if not_before is not None:
+        current = revocations["not_before"].get(user_id, not_before)
+        revocations["not_before"][user_id] = max(current, not_before)
+
+
+def _revocations_loader(db: Session):
+    """Loader da lista de revogação (sessão própria: pode rodar em outra thread)"""
+    bind = db.get_bind()
+
+    def load():
+        with Session(bind=bind) as session:
+            return compute_active_revocations(session)
+    return load
+
+
+def _revoke(db: Session, jti, user_id: int, not_before, expires_at: float):
+    db.add(models.RevokedToken(
+        jti=jti, user_id=user_id, not_before=not_before, expires_at=expires_at
+    ))
+    db.commit()
+    # Vale na hora neste processo; se a lista ainda não foi carregada,
+    # a primeira leitura já traz a linha gravada
+    revocations = token_revocations.peek()
+    if revocations is not None:
+        _remember_revocation(revocations, jti, user_id, not_before)
+
+
+def revoke_token(db: Session, claims: dict):
+    """Revogar um token (claims de tokens.decode_token) até ele expirar"""
+    _revoke(db, claims["jti"], claims["user_id"], None, claims["exp"])
+
+
+def revoke_user_tokens(db: Session, user_id: int):
+    """Revogar todos os tokens já emitidos para o usuário (troca de senha, remoção)"""
+    now = time.time()
+    _revoke(db, None, user_id, now, now + tokens.REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+
+
+def is_token_revoked(db: Session, claims: dict) -> bool:
+    """Consultar a lista em memória (o banco só é lido na carga e nos recálculos)"""
+    revocations = token_revocations.get(_revocations_loader(db))
+    if claims["jti"] in revocations["jtis"]:
+        return True
+    not_before = revocations["not_before"].get(claims["user_id"])
+    return not_before is not None and claims.get("iat", 0) <= not_before
@@ -0,0 +1,94 @@
+"""
+Versões assíncronas das operações do crud (para rotas async def com AsyncSession).
+
+Cada função chama a versão síncrona de crud via AsyncSession.run_sync: a
+regra de negócio (saldos, resumos materializados, sugestões) continua em um
+lugar só, e a espera pelo banco libera o event loop em vez de ocupar uma
+thread do threadpool.
+
+Uso: await crud_async.get_user_categories(db, user_id=1)
+
+get_account_suggestions/get_category_suggestions não têm versão assíncrona:
+o cache de nomes populares recalcula em outra thread com uma sessão síncrona
+no engine da requisição, o que um engine assíncrono não permite.
+"""
+
+import functools
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud
+
+
+def _run_sync(fn):
+    """Adaptar fn(db: Session, ...) para await wrapper(db: AsyncSession, ...)"""
+    @functools.wraps(fn)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(fn, *args, **kwargs)
+    return wrapper
+
+
+# ========================
+# USER OPERATIONS
+# ========================
+
+get_user = _run_sync(crud.get_user)
+get_user_by_username = _run_sync(crud.get_user_by_username)
+get_all_users = _run_sync(crud.get_all_users)
+create_user = _run_sync(crud.create_user)
+update_user = _run_sync(crud.update_user)
+set_user_password_hash = _run_sync(crud.set_user_password_hash)
+revoke_user_tokens = _run_sync(crud.revoke_user_tokens)
+delete_user = _run_sync(crud.delete_user)
+update_user_profile = _run_sync(crud.update_user_profile)
+get_avatar = _run_sync(crud.get_avatar)
+get_user_avatar_hash = _run_sync(crud.get_user_avatar_hash)
+
+# ========================
+# ACCOUNT OPERATIONS
+# ========================
+
+get_account = _run_sync(crud.get_account)
+get_user_accounts = _run_sync(crud.get_user_accounts)
+create_account = _run_sync(crud.create_account)
+update_account = _run_sync(crud.update_account)
+delete_account = _run_sync(crud.delete_account)
+audit_account_balance = _run_sync(crud.audit_account_balance)
+recalculate_account_balance = _run_sync(crud.recalculate_account_balance)
+audit_all_user_accounts = _run_sync(crud.audit_all_user_accounts)
+recalculate_user_accounts = _run_sync(crud.recalculate_user_accounts)
+get_account_owners = _run_sync(crud.get_account_owners)
+
+# ========================
+# CATEGORY OPERATIONS
+# ========================
+
+get_category = _run_sync(crud.get_category)
+get_category_by_name_and_user = _run_sync(crud.get_category_by_name_and_user)
+get_user_categories = _run_sync(crud.get_user_categories)
+create_category = _run_sync(crud.create_category)
+update_category = _run_sync(crud.update_category)
+delete_category = _run_sync(crud.delete_category)
+get_category_owners = _run_sync(crud.get_category_owners)
+
+# ========================
+# TRANSACTION OPERATIONS
+# ========================
+
+get_transaction = _run_sync(crud.get_transaction)
+get_user_transactions = _run_sync(crud.get_user_transactions)
+create_transaction = _run_sync(crud.create_transaction)
+update_transaction = _run_sync(crud.update_transaction)
+delete_transaction = _run_sync(crud.delete_transaction)
+bulk_create_transactions = _run_sync(crud.bulk_create_transactions)
+get_transaction_description_suggestions = _run_sync(
+    crud.get_transaction_description_suggestions
+)
+
+# ========================
+# SUMMARY / REPORT OPERATIONS
+# ========================
+
+get_user_summary = _run_sync(crud.get_user_summary)
+get_totals_by_category = _run_sync(crud.get_totals_by_category)
+get_totals_by_period = _run_sync(crud.get_totals_by_period)
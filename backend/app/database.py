@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -14,23 +15,124 @@ load_dotenv()
 BACKEND_DIR = Path(__file__).parent.parent
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{BACKEND_DIR}/finance.db")
 
-if "sqlite" in DATABASE_URL:
-    # Para SQLite
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"check_same_thread": False}
-    )
-else:
+# Pool de conexões (PostgreSQL). Dimensionar como
+# workers do uvicorn * (DB_POOL_SIZE + DB_MAX_OVERFLOW) <= max_connections do servidor
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+DB_SSLMODE = os.getenv("DB_SSLMODE", "require")
+
+# PRAGMAs aplicados em cada nova conexão SQLite
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+}
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Aplicar SQLITE_PRAGMAS (WAL, synchronous, mmap, busy_timeout) na conexão"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def build_engine(url: str = DATABASE_URL, **engine_kwargs):
+    """Criar o engine com pool e ajustes lidos do ambiente (engine_kwargs: extras do create_engine)"""
+    if "sqlite" in url:
+        # Para SQLite
+        sqlite_engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            **engine_kwargs
+        )
+        event.listen(sqlite_engine, "connect", _set_sqlite_pragmas)
+        return sqlite_engine
+
     # Para PostgreSQL (Railway ou outro servidor remoto)
     # Railway exige SSL
-    engine = create_engine(
-        DATABASE_URL,
-        connect_args={"sslmode": "require"}
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args={
+            "sslmode": DB_SSLMODE,
+            "options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}",
+        },
+        **engine_kwargs
     )
 
+
+def async_database_url(url: str = DATABASE_URL) -> str:
+    """URL equivalente com driver assíncrono (aiosqlite / asyncpg)"""
+    scheme, rest = url.split("://", 1)
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    if scheme.startswith("postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
+
+def build_async_engine(url: str = None, **engine_kwargs):
+    """Criar o engine assíncrono com o mesmo pool e ajustes do engine síncrono"""
+    url = url or os.getenv("ASYNC_DATABASE_URL") or async_database_url()
+    if "sqlite" in url:
+        sqlite_engine = create_async_engine(url, **engine_kwargs)
+        event.listen(sqlite_engine.sync_engine, "connect", _set_sqlite_pragmas)
+        return sqlite_engine
+
+    # asyncpg não entende sslmode/options: mesmos ajustes com os nomes dele
+    return create_async_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args={
+            "ssl": DB_SSLMODE,
+            "server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)},
+        },
+        **engine_kwargs
+    )
+
+
+def pool_stats(target_engine=None) -> dict:
+    """Estado do pool de conexões (para dimensionar contra o nº de workers)"""
+    pool = (target_engine or engine).pool
+    stats = {"pool": type(pool).__name__, "status": pool.status()}
+    # Só QueuePool tem tamanho/overflow; SingletonThreadPool/StaticPool não
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    if hasattr(pool, "_max_overflow"):
+        stats["max_overflow"] = pool._max_overflow
+    return stats
+
+
+engine = build_engine()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Caminho assíncrono: rotas async def usam get_async_db. expire_on_commit=False
+# porque, fora do greenlet da sessão, ler um atributo expirado não pode ir ao banco
+async_engine = build_async_engine()
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession
+)
+
 
 def get_db():
     """
@@ -41,3 +143,11 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Dependency para injetar a sessao assincrona do banco de dados
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,104 @@
+"""
+Hash e verificação de senhas fora do caminho da requisição.
+
+PBKDF2/argon2/bcrypt custam dezenas de ms de CPU por chamada. Em vez de ocupar
+uma thread do threadpool (e o GIL) por login, as rotas de autenticação enviam
+o trabalho para um pool de processos limitado e aguardam com await.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from . import utils
+
+# Processos do pool (0 = calcular na própria thread, sem pool)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Máximo de hashes aguardando ou em execução; acima disso a rota responde 503
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+
+class HashQueueFull(Exception):
+    """Fila de hashes cheia (excesso de logins/cadastros simultâneos)"""
+
+
+class PasswordHasher:
+    """
+    Pool de processos para hash de senha com limite de fila e métricas.
+
+    O pool executa no máximo `workers` hashes ao mesmo tempo; os demais ficam
+    na fila do executor até `max_pending`. O pool é criado no primeiro uso
+    (processos "spawn": não herdam conexões nem threads do servidor).
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS,
+                 max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.max_pending_seen = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=get_context("spawn")
+                )
+            return self._executor
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HashQueueFull()
+            self.pending += 1
+            self.max_pending_seen = max(self.max_pending_seen, self.pending)
+        started = time.perf_counter()
+        try:
+            if self.workers <= 0:
+                return fn(*args)
+            return await asyncio.wrap_future(self._get_executor().submit(fn, *args))
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+                self.total_seconds += time.perf_counter() - started
+
+    async def hash(self, password: str) -> str:
+        """Hash de senha no pool (utils.hash_password)"""
+        return await self._run(utils.hash_password, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> tuple:
+        """Verificar senha no pool (utils.verify_and_update_password)"""
+        return await self._run(utils.verify_and_update_password, password, hashed)
+
+    def stats(self) -> dict:
+        """Métricas de fila (pending inclui os hashes em execução)"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "max_pending_seen": self.max_pending_seen,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_ms": (self.total_seconds / self.completed * 1000) if self.completed else 0.0,
+            }
+
+    def shutdown(self):
+        """Encerrar os processos do pool (o próximo uso cria um novo)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+password_hasher = PasswordHasher()
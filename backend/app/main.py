@@ -1,117 +1,49 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from .routes import auth, users, categories, transactions, accounts
-from .database import engine, Base, SessionLocal, get_db
+from .database import engine, get_async_db, pool_stats
+from .query_counter import count_queries
+from .hashing import password_hasher
+from .ratelimit import login_throttle
 from .models import User
-from .utils import hash_password
-from sqlalchemy import text
+from .proxy_headers import ProxyHeadersMiddleware, TRUSTED_PROXIES
+from .money import ZERO
+from . import migrations, tokens
 import os
 
-# Criar tabelas automaticamente se não existirem
-Base.metadata.create_all(bind=engine)
-
+# Aplicar migrações pendentes ao subir. Com o esquema em dia custa só a
+# leitura da versão; com false o servidor apenas avisa e o esquema fica a
+# cargo do `python init_db.py` (que também cria o usuário padrão)
+DB_AUTO_MIGRATE = os.getenv("DB_AUTO_MIGRATE", "true").lower() in ("1", "true", "yes")
 
 def run_migrations():
-    """Executar migrações do banco de dados"""
+    """Aplicar as migrações pendentes do esquema (ver app/migrations.py)"""
     print("[INFO] Verificando migracoes do banco de dados...")
-
-    # Verificar se estamos usando PostgreSQL ou SQLite
-    db_url = str(engine.url)
-    is_postgres = 'postgresql' in db_url
-
-    print(f"[INFO] Banco de dados detectado: {'PostgreSQL' if is_postgres else 'SQLite'}")
-
-    # Usar tipo correto dependendo do banco
-    float_type = "DOUBLE PRECISION" if is_postgres else "REAL"
-    bool_default = "TRUE" if is_postgres else "1"
-
-    # PostgreSQL suporta IF NOT EXISTS, SQLite não
-    if is_postgres:
-        migrations = [
-            # User migrations
-            ("ALTER TABLE users ADD COLUMN IF NOT EXISTS cpf VARCHAR", "cpf"),
-            ("ALTER TABLE users ADD COLUMN IF NOT EXISTS phone VARCHAR", "phone"),
-            ("ALTER TABLE users ADD COLUMN IF NOT EXISTS birth_date DATE", "birth_date"),
-            ("ALTER TABLE users ADD COLUMN IF NOT EXISTS address VARCHAR", "address"),
-            # Account migrations
-            (f"ALTER TABLE accounts ADD COLUMN IF NOT EXISTS initial_balance {float_type} DEFAULT 0.0", "initial_balance"),
-            (f"ALTER TABLE accounts ADD COLUMN IF NOT EXISTS is_active BOOLEAN DEFAULT {bool_default}", "is_active"),
-            ("ALTER TABLE accounts ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP", "created_at"),
-            ("ALTER TABLE accounts ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP", "updated_at"),
-        ]
-    else:
-        migrations = [
-            # User migrations
-            ("ALTER TABLE users ADD COLUMN cpf VARCHAR", "cpf"),
-            ("ALTER TABLE users ADD COLUMN phone VARCHAR", "phone"),
-            ("ALTER TABLE users ADD COLUMN birth_date DATE", "birth_date"),
-            ("ALTER TABLE users ADD COLUMN address VARCHAR", "address"),
-            # Account migrations
-            (f"ALTER TABLE accounts ADD COLUMN initial_balance {float_type} DEFAULT 0.0", "initial_balance"),
-            (f"ALTER TABLE accounts ADD COLUMN is_active INTEGER DEFAULT {bool_default}", "is_active"),
-            ("ALTER TABLE accounts ADD COLUMN created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP", "created_at"),
-            ("ALTER TABLE accounts ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP", "updated_at"),
-        ]
-
     try:
-        with engine.begin() as conn:
-            for migration_sql, column_name in migrations:
-                try:
-                    conn.execute(text(migration_sql))
-                    print(f"  [OK] Migracao aplicada: {column_name}")
-                except Exception as e:
-                    error_msg = str(e).lower()
-                    if 'already exists' in error_msg or 'duplicate column' in error_msg:
-                        print(f"  [SKIP] Coluna ja existe: {column_name}")
-                    else:
-                        print(f"  [WARN] Erro ao migrar {column_name}: {e}")
-
-            # Migrar dados existentes: initial_balance = balance
-            try:
-                result = conn.execute(text("""
-                    UPDATE accounts
-                    SET initial_balance = balance
-                    WHERE initial_balance IS NULL OR initial_balance = 0.0
-                """))
-                if result.rowcount > 0:
-                    print(f"  [DATA] Migrados {result.rowcount} saldos iniciais")
-            except Exception as e:
-                print(f"  [WARN] Erro ao migrar saldos: {e}")
-
-        print("[OK] Migracoes verificadas com sucesso!")
+        applied = migrations.upgrade(engine)
+        if applied:
+            print(f"[OK] Esquema atualizado para a versao {migrations.LATEST_VERSION}")
+        else:
+            print(f"[OK] Esquema em dia (versao {migrations.LATEST_VERSION})")
     except Exception as e:
-        print(f"[ERRO] Erro ao verificar migracoes: {str(e)}")
+        print(f"[ERRO] Erro ao aplicar migracoes: {str(e)}")
         import traceback
         traceback.print_exc()
 
 
-def init_default_users():
-    """Criar usuário padrão se nenhum usuário existir no banco"""
-    db = SessionLocal()
+def check_schema():
+    """Avisar se o esquema está atrás do código (sem DDL)"""
     try:
-        # Verificar se já existem usuários
-        result = db.execute(text('SELECT COUNT(*) FROM users')).scalar()
-        if result == 0:
-            print("Criando usuários padrão...")
-            # Criar usuário padrão
-            default_user = User(
-                username='bruno',
-                hashed_password=hash_password('123456'),
-                email='bruno@example.com',
-                full_name='Bruno'
-            )
-            db.add(default_user)
-            db.commit()
-            print("Usuario padrao 'bruno' criado com sucesso")
-        else:
-            print(f"Banco de dados contem {result} usuario(s)")
+        with engine.connect() as conn:
+            version = migrations.current_version(conn)
     except Exception as e:
-        print(f"Erro ao inicializar usuários: {e}")
-        db.rollback()
-    finally:
-        db.close()
+        print(f"[ERRO] Erro ao verificar o esquema: {str(e)}")
+        return
+    if version < migrations.LATEST_VERSION:
+        print(f"[WARN] Esquema na versao {version}, esperada {migrations.LATEST_VERSION}: "
+              "execute python init_db.py")
 
 
 # Lifespan context manager
@@ -121,11 +53,15 @@ def init_default_users():
 async def lifespan(app_instance):
     # Startup
     print("Iniciando Finance App...")
-    run_migrations()
-    init_default_users()
+    tokens.check_secret_key()
+    if DB_AUTO_MIGRATE:
+        run_migrations()
+    else:
+        check_schema()
     yield
     # Shutdown
     print("Encerrando Finance App...")
+    password_hasher.shutdown()
 
 app = FastAPI(
     title='Finance App API',
@@ -143,7 +79,20 @@ app.add_middleware(
     allow_credentials=False,  # Deve ser False quando allow_origins=["*"]
     allow_methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
     allow_headers=['*'],
+    expose_headers=['X-Next-Cursor', 'X-Query-Count'],
 )
+# request.client pelo X-Forwarded-For só vindo de TRUSTED_PROXIES (ver app/proxy_headers.py),
+# aplicado no app para valer com qualquer comando de start
+app.add_middleware(ProxyHeadersMiddleware, trusted_proxies=TRUSTED_PROXIES)
+
+
+@app.middleware("http")
+async def query_count_middleware(request, call_next):
+    """Expor no header X-Query-Count quantas queries SQL a requisição executou"""
+    with count_queries() as counter:
+        response = await call_next(request)
+    response.headers["X-Query-Count"] = str(counter.count)
+    return response
 
 # Incluir rotas
 app.include_router(auth.router)
@@ -165,14 +114,35 @@ async def root():
             'categories': '/categories',
             'accounts': '/accounts',
             'transactions': '/transactions',
-            'dashboard': '/dashboard'
+            'dashboard': '/dashboard',
+            'health': '/health/db',
+            'hashing': '/health/hashing',
+            'login_throttle': '/health/login-throttle'
         }
     }
 
 
+@app.get('/health/db')
+async def health_db():
+    """Estado do pool de conexões (em uso, livres e overflow) deste worker"""
+    return pool_stats()
+
+
+@app.get('/health/hashing')
+async def health_hashing():
+    """Fila do pool de hash de senhas (em espera/execução, rejeitados, tempo médio)"""
+    return password_hasher.stats()
+
+
+@app.get('/health/login-throttle')
+async def health_login_throttle():
+    """Contadores do limite de tentativas de login (liberadas, bloqueadas, falhas)"""
+    return login_throttle.stats()
+
+
 @app.get('/dashboard')
 async def dashboard(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(auth.get_current_user)
 ):
     """
@@ -186,49 +156,24 @@ async def dashboard(
     - total_income: Total de receitas
     - total_expense: Total de despesas
     - net_balance: Balanço líquido (receitas - despesas)
+
+    Os valores vêm do resumo materializado (user_summaries), mantido
+    incrementalmente pelo crud: uma única leitura por chave primária.
+    A leitura usa a sessão assíncrona, então um dashboard lento (ex.: primeira
+    materialização) não trava o event loop nem as outras requisições do worker.
     """
-    from sqlalchemy import func
-    from .models import Account, Transaction, Category
-
-    # Contar contas ativas
-    total_accounts = db.query(func.count(Account.id)).filter(
-        Account.user_id == current_user.id,
-        Account.is_active == True
-    ).scalar() or 0
-
-    # Saldo total de todas as contas
-    total_balance = db.query(func.sum(Account.balance)).filter(
-        Account.user_id == current_user.id,
-        Account.is_active == True
-    ).scalar() or 0.0
-
-    # Contar categorias
-    total_categories = db.query(func.count(Category.id)).filter(
-        Category.user_id == current_user.id
-    ).scalar() or 0
-
-    # Contar transações
-    total_transactions = db.query(func.count(Transaction.id)).filter(
-        Transaction.user_id == current_user.id
-    ).scalar() or 0
-
-    # Calcular receitas e despesas
-    income_result = db.query(func.sum(Transaction.amount)).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.transaction_type == 'income'
-    ).scalar() or 0.0
-
-    expense_result = db.query(func.sum(func.abs(Transaction.amount))).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.transaction_type == 'expense'
-    ).scalar() or 0.0
+    from . import crud_async
+
+    summary = await crud_async.get_user_summary(db, current_user.id)
+    total_income = summary.total_income or ZERO
+    total_expense = summary.total_expense or ZERO
 
     return {
-        "total_accounts": total_accounts,
-        "total_categories": total_categories,
-        "total_transactions": total_transactions,
-        "total_balance": float(total_balance),
-        "total_income": float(income_result),
-        "total_expense": float(expense_result),
-        "net_balance": float(income_result) - float(expense_result)
+        "total_accounts": summary.total_accounts or 0,
+        "total_categories": summary.total_categories or 0,
+        "total_transactions": summary.total_transactions or 0,
+        "total_balance": float(summary.total_balance or ZERO),
+        "total_income": float(total_income),
+        "total_expense": float(total_expense),
+        "net_balance": float(total_income - total_expense)
     }
@@ -0,0 +1,282 @@
+"""
+Migrações versionadas do esquema do banco.
+
+Cada passo tem um número de versão e roda uma única vez por banco: a tabela
+schema_migrations guarda as versões já aplicadas. Os passos conferem colunas
+e índices antes do DDL, então um banco criado antes desta tabela existir (com
+parte das colunas já adicionadas pelos scripts antigos) é atualizado sem erro.
+
+upgrade() roda na inicialização: com o esquema em dia só lê a versão atual,
+sem DDL. Passos pendentes rodam numa única transação sob lock
+(pg_advisory_xact_lock no PostgreSQL, BEGIN IMMEDIATE no SQLite), então
+vários workers subindo juntos aplicam cada passo uma vez só.
+"""
+
+import hashlib
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.types import Integer as IntegerType
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import Base
+from .utils import decode_image_data_url
+
+# Chave do pg_advisory_xact_lock das migrações (inteiro fixo do app)
+MIGRATION_LOCK_KEY = 7405313
+
+# Fora do Base.metadata: create_all/drop_all dos modelos não tocam nela
+schema_migrations = Table(
+    "schema_migrations", MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+Migration = namedtuple("Migration", "version name apply")
+
+
+def _add_missing_columns(conn, table: str, columns: list) -> list:
+    """ALTER TABLE ADD COLUMN só para as colunas que ainda não existem"""
+    existing = {column["name"] for column in inspect(conn).get_columns(table)}
+    added = []
+    for name, ddl in columns:
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}"))
+            added.append(name)
+    return added
+
+
+def _create_tables(conn):
+    """Tabelas que ainda não existem (bancos novos ficam completos aqui)"""
+    Base.metadata.create_all(bind=conn)
+
+
+def _user_profile_columns(conn):
+    """Campos de perfil e avatar_hash (antigo migrate_user_fields.py)"""
+    _add_missing_columns(conn, "users", [
+        ("cpf", "VARCHAR"),
+        ("phone", "VARCHAR"),
+        ("birth_date", "DATE"),
+        ("address", "VARCHAR"),
+        ("avatar_hash", "VARCHAR(64)"),
+    ])
+
+
+def _account_lifecycle_columns(conn):
+    """Saldo inicial, soft delete e auditoria das contas (antigo migrate_accounts.py)"""
+    is_postgres = conn.dialect.name == "postgresql"
+    # SQLite não aceita ADD COLUMN com default não constante (CURRENT_TIMESTAMP):
+    # lá as colunas de auditoria ficam nulas nas contas antigas
+    timestamp = "TIMESTAMP DEFAULT CURRENT_TIMESTAMP" if is_postgres else "TIMESTAMP"
+    added = _add_missing_columns(conn, "accounts", [
+        ("initial_balance", "DOUBLE PRECISION DEFAULT 0.0" if is_postgres else "REAL DEFAULT 0.0"),
+        ("is_active", "BOOLEAN DEFAULT TRUE" if is_postgres else "INTEGER DEFAULT 1"),
+        ("created_at", timestamp),
+        ("updated_at", timestamp),
+    ])
+    # Contas anteriores ao saldo inicial: o saldo atual vira o inicial.
+    # Só quando a coluna acabou de ser criada; contas novas com saldo
+    # inicial 0 não podem ser sobrescritas
+    if "initial_balance" in added:
+        conn.execute(text("UPDATE accounts SET initial_balance = balance"))
+
+
+def _transaction_indexes(conn):
+    """Índices de transactions em bancos anteriores a eles (antigo add_indexes.py)"""
+    indexes = [
+        ("ix_transactions_user_id", "user_id"),
+        ("ix_transactions_date", "date"),
+        ("ix_transactions_transaction_type", "transaction_type"),
+        ("ix_transactions_category_id", "category_id"),
+        ("ix_transactions_account_id", "account_id"),
+        ("ix_transactions_description", "description"),
+        # Compostos: os mesmos de models.Transaction.__table_args__
+        ("ix_transactions_user_date_id", "user_id, date, id"),
+        ("ix_transactions_user_type_date", "user_id, transaction_type, date, id"),
+        ("ix_transactions_user_category_date", "user_id, category_id, date, id"),
+        ("ix_transactions_user_account_date", "user_id, account_id, date, id"),
+    ]
+    for name, columns in indexes:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON transactions ({columns})"))
+
+
+# Colunas de valor que passaram de float (reais) a inteiro (centavos)
+MONEY_COLUMNS = [
+    ("transactions", "amount"),
+    ("accounts", "initial_balance"),
+    ("accounts", "balance"),
+    ("user_summaries", "total_balance"),
+    ("user_summaries", "total_income"),
+    ("user_summaries", "total_expense"),
+    ("transaction_monthly_totals", "total_amount"),
+]
+
+
+def _money_cents(conn):
+    """
+    Valores em centavos inteiros (models.Money).
+
+    Colunas já inteiras (bancos criados depois desta versão) ficam como estão.
+    No PostgreSQL a coluna vira BIGINT; no SQLite, que não altera tipo de
+    coluna, os valores viram centavos e a coluna antiga mantém afinidade REAL
+    (exata até 2^53 centavos).
+    """
+    is_postgres = conn.dialect.name == "postgresql"
+    inspector = inspect(conn)
+    for table, column in MONEY_COLUMNS:
+        types = {info["name"]: info["type"] for info in inspector.get_columns(table)}
+        if isinstance(types.get(column), IntegerType):
+            continue
+        if is_postgres:
+            conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} DROP DEFAULT"))
+            conn.execute(text(
+                f"ALTER TABLE {table} ALTER COLUMN {column} TYPE BIGINT "
+                f"USING ROUND(({column} * 100)::numeric)::bigint"
+            ))
+            conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT 0"))
+        else:
+            conn.execute(text(f"UPDATE {table} SET {column} = ROUND({column} * 100)"))
+
+
+def _legacy_avatars(conn):
+    migrate_legacy_avatars(conn)
+
+
+def _description_suggestions_backfill(conn):
+    backfill_description_suggestions(conn)
+
+
+MIGRATIONS = [
+    Migration(1, "create_tables", _create_tables),
+    Migration(2, "user_profile_columns", _user_profile_columns),
+    Migration(3, "account_lifecycle_columns", _account_lifecycle_columns),
+    Migration(4, "transaction_indexes", _transaction_indexes),
+    Migration(5, "legacy_avatars", _legacy_avatars),
+    Migration(6, "description_suggestions_backfill", _description_suggestions_backfill),
+    Migration(7, "money_cents", _money_cents),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def migrate_legacy_avatars(conn, batch_size: int = 100):
+    """
+    Mover avatares da antiga coluna users.avatar (base64) para a tabela avatars.
+
+    Cada imagem é gravada uma única vez (chave = sha256 do conteúdo) e a
+    coluna antiga é limpa. Imagens inválidas são apenas descartadas.
+    Retorna o número de usuários migrados.
+    """
+    columns = {column['name'] for column in inspect(conn).get_columns('users')}
+    if 'avatar' not in columns:
+        return 0
+
+    avatars = models.Avatar.__table__
+    moved = 0
+    while True:
+        rows = conn.execute(text(
+            "SELECT id, avatar FROM users WHERE avatar IS NOT NULL LIMIT :limit"
+        ), {"limit": batch_size}).fetchall()
+        if not rows:
+            return moved
+
+        for user_id, legacy_avatar in rows:
+            avatar_hash = None
+            try:
+                data, content_type = decode_image_data_url(legacy_avatar)
+            except ValueError:
+                data = None
+            if data:
+                avatar_hash = hashlib.sha256(data).hexdigest()
+                exists = conn.execute(text(
+                    "SELECT 1 FROM avatars WHERE hash = :hash"
+                ), {"hash": avatar_hash}).first()
+                if not exists:
+                    conn.execute(avatars.insert().values(
+                        hash=avatar_hash, content_type=content_type, data=data
+                    ))
+                moved += 1
+            conn.execute(text(
+                "UPDATE users SET avatar = NULL, avatar_hash = COALESCE(:hash, avatar_hash) WHERE id = :id"
+            ), {"hash": avatar_hash, "id": user_id})
+
+
+def backfill_description_suggestions(conn):
+    """
+    Gerar description_suggestions para usuários já materializados.
+
+    Usuários sem resumo ganham as sugestões junto com os demais agregados
+    na primeira leitura; os que já tinham resumo antes da tabela existir
+    precisam ser preenchidos aqui. Só roda enquanto a tabela estiver vazia.
+    Usa a conexão da migração (a sessão não faz commit dela).
+    Retorna o número de usuários processados.
+    """
+    from . import crud
+
+    db = Session(bind=conn)
+    try:
+        if db.query(models.DescriptionSuggestion.user_id).first() is not None:
+            return 0
+        user_ids = [row.user_id for row in db.query(models.UserSummary.user_id)]
+        for user_id in user_ids:
+            crud.rebuild_description_suggestions(db, user_id)
+        return len(user_ids)
+    finally:
+        db.close()
+
+
+def current_version(conn) -> int:
+    """Última versão aplicada (0 = banco sem schema_migrations)"""
+    if not inspect(conn).has_table(schema_migrations.name):
+        return 0
+    return conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+
+
+def pending_migrations(conn) -> list:
+    version = current_version(conn)
+    return [migration for migration in MIGRATIONS if migration.version > version]
+
+
+@contextmanager
+def _migration_lock(engine):
+    """Conexão numa transação exclusiva entre processos; commit ao sair sem erro"""
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            # Liberado sozinho no fim da transação
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        elif conn.dialect.name == "sqlite":
+            # Reserva a escrita já no BEGIN: outro processo espera o busy_timeout
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        yield conn
+        conn.commit()
+
+
+def upgrade(engine=None, log=print) -> list:
+    """
+    Aplicar as migrações pendentes. Retorna as versões aplicadas.
+
+    Sem pendências não abre o lock nem executa DDL. Com pendências a versão
+    é relida dentro do lock: outro worker pode ter acabado de aplicá-las.
+    """
+    if engine is None:
+        from .database import engine
+
+    with engine.connect() as conn:
+        if current_version(conn) >= LATEST_VERSION:
+            return []
+
+    applied = []
+    with _migration_lock(engine) as conn:
+        schema_migrations.create(conn, checkfirst=True)
+        for migration in pending_migrations(conn):
+            migration.apply(conn)
+            conn.execute(schema_migrations.insert().values(
+                version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+            ))
+            applied.append(migration.version)
+            log(f"  [OK] Migracao {migration.version:03d} aplicada: {migration.name}")
+    return applied
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Text, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Boolean, DateTime, Index, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
+from .money import Money
 
 
 class User(Base):
@@ -11,12 +12,28 @@ class User(Base):
     hashed_password = Column(String)
     email = Column(String, nullable=True)
     full_name = Column(String, nullable=True)
-    avatar = Column(Text, nullable=True)  # Base64 encoded image
+    avatar_hash = Column(String(64), nullable=True)  # Chave em avatars (sha256 do conteúdo)
     cpf = Column(String, nullable=True)  # CPF do usuário
     phone = Column(String, nullable=True)  # Telefone
     birth_date = Column(Date, nullable=True)  # Data de nascimento
     address = Column(String, nullable=True)  # Endereço
 
+    @property
+    def avatar_url(self):
+        """URL do avatar, versionada pelo hash (permite cache imutável no navegador)"""
+        if not self.avatar_hash:
+            return None
+        return f"/users/{self.id}/avatar?v={self.avatar_hash[:16]}"
+
+
+class Avatar(Base):
+    """Imagens de avatar, armazenadas uma única vez por hash do conteúdo"""
+    __tablename__ = 'avatars'
+    hash = Column(String(64), primary_key=True)  # sha256 hex
+    content_type = Column(String, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 
 class Category(Base):
     __tablename__ = 'categories'
@@ -32,8 +49,8 @@ class Account(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     account_type = Column(String)  # 'checking', 'savings', 'credit_card', etc
-    initial_balance = Column(Float, default=0.0)  # Saldo inicial imutável
-    balance = Column(Float, default=0.0)  # Saldo atual calculado
+    initial_balance = Column(Money, default=0)  # Saldo inicial imutável (centavos no banco)
+    balance = Column(Money, default=0)  # Saldo atual calculado
     currency = Column(String, default='BRL')
     is_active = Column(Boolean, default=True)  # Soft delete
     created_at = Column(DateTime, default=datetime.utcnow, nullable=True)  # Auditoria (opcional para SQLite)
@@ -45,7 +62,7 @@ class Account(Base):
 class Transaction(Base):
     __tablename__ = 'transactions'
     id = Column(Integer, primary_key=True, index=True)
-    amount = Column(Float)
+    amount = Column(Money)  # Centavos no banco, Decimal em reais no Python
     date = Column(Date, index=True)  # Índice para ordenação e filtros
     description = Column(String, index=True)  # Índice para sugestões
     transaction_type = Column(String, index=True)  # Índice para filtros
@@ -53,6 +70,79 @@ class Transaction(Base):
     account_id = Column(Integer, ForeignKey('accounts.id'), nullable=True, index=True)
     user_id = Column(Integer, ForeignKey('users.id'), index=True)  # Índice crítico
 
+    __table_args__ = (
+        # Paginação por keyset: WHERE user_id = ? AND (date, id) < (?, ?)
+        # Também atende filtros de período (user_id + date)
+        Index('ix_transactions_user_date_id', 'user_id', 'date', 'id'),
+        # Filtros da listagem: igualdade no filtro + ordenação por (date, id)
+        Index('ix_transactions_user_type_date', 'user_id', 'transaction_type', 'date', 'id'),
+        Index('ix_transactions_user_category_date', 'user_id', 'category_id', 'date', 'id'),
+        Index('ix_transactions_user_account_date', 'user_id', 'account_id', 'date', 'id'),
+    )
+
     category = relationship("Category")
     account = relationship("Account")
     user = relationship("User")
+
+
+class UserSummary(Base):
+    """Resumo do dashboard por usuário, mantido incrementalmente pelo crud"""
+    __tablename__ = 'user_summaries'
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    total_accounts = Column(Integer, default=0)  # Contas ativas
+    total_balance = Column(Money, default=0)  # Soma dos saldos das contas ativas
+    total_categories = Column(Integer, default=0)
+    total_transactions = Column(Integer, default=0)
+    total_income = Column(Money, default=0)
+    total_expense = Column(Money, default=0)  # Soma de abs(amount) das despesas
+
+
+class TransactionMonthlyTotal(Base):
+    """Totais mensais por categoria e tipo, mantidos incrementalmente pelo crud"""
+    __tablename__ = 'transaction_monthly_totals'
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    year_month = Column(String(7), primary_key=True)  # 'YYYY-MM'
+    category_id = Column(Integer, primary_key=True)  # 0 para transações sem categoria
+    transaction_type = Column(String, primary_key=True)
+    total_amount = Column(Money, default=0)  # Soma de abs(amount)
+    transaction_count = Column(Integer, default=0)
+
+
+class DescriptionSuggestion(Base):
+    """
+    Descrições já usadas pelo usuário (por tipo e categoria), mantidas pelo crud.
+    Alimenta o autocomplete de descrições com busca por prefixo.
+    """
+    __tablename__ = 'description_suggestions'
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    transaction_type = Column(String, primary_key=True)
+    category_id = Column(Integer, primary_key=True)  # 0 para transações sem categoria
+    description = Column(String, primary_key=True)
+    description_key = Column(String, nullable=False)  # Minúsculas, sem acentos (busca)
+    use_count = Column(Integer, default=0)
+    last_used = Column(Date)  # Data da transação mais recente com a descrição
+    frecency_rank = Column(Float)  # Ver crud.frecency_rank
+
+    __table_args__ = (
+        # Busca por prefixo: WHERE user_id = ? AND description_key >= ? AND < ?
+        Index('ix_description_suggestions_user_key', 'user_id', 'description_key'),
+        # Sugestões sem prefixo: as de maior frecency do usuário
+        Index('ix_description_suggestions_user_rank', 'user_id', 'frecency_rank'),
+        # Sugestões populares entre todos os usuários
+        Index('ix_description_suggestions_key', 'description_key'),
+    )
+
+
+class RevokedToken(Base):
+    """
+    Tokens JWT revogados antes de expirar (logout, refresh já usado, troca de senha).
+
+    jti preenchido revoga um token; jti nulo revoga todos os tokens do usuário
+    emitidos até not_before. Horários em segundos desde a epoch, como no JWT.
+    """
+    __tablename__ = 'revoked_tokens'
+    id = Column(Integer, primary_key=True)
+    jti = Column(String(64), unique=True, nullable=True)
+    user_id = Column(Integer, nullable=False, index=True)  # Sem FK: usuário removido também revoga
+    not_before = Column(Float, nullable=True)
+    expires_at = Column(Float, nullable=False, index=True)  # Depois disso o token já expirou
@@ -0,0 +1,63 @@
+"""
+Valores monetários exatos: reais em Decimal no Python, centavos inteiros no banco.
+
+As colunas de valor usam o tipo Money (BIGINT de centavos). SUMs, deltas de
+saldo e comparações rodam em aritmética inteira no banco; o Python só vê
+Decimal com duas casas, e a API continua respondendo números JSON.
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from sqlalchemy import BigInteger, func
+from sqlalchemy.types import TypeDecorator
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0.00")
+# Maior valor gravável: BIGINT de centavos
+MAX_CENTS = 2 ** 63 - 1
+MAX_AMOUNT = Decimal(MAX_CENTS).scaleb(-2)
+
+
+def quantize(value) -> Decimal:
+    """Arredondar para centavos (meio centavo para cima, em valor absoluto)"""
+    if isinstance(value, float):
+        value = str(value)  # 0.1 -> '0.1', não 0.1000000000000000055...
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def bounded_amount(value) -> Decimal:
+    """quantize() recusando (ValueError) valores não finitos ou fora do BIGINT de centavos"""
+    amount = Decimal(str(value)) if isinstance(value, float) else Decimal(value)
+    if amount.is_finite() and abs(amount) <= MAX_AMOUNT:
+        amount = quantize(amount)
+        if abs(amount) <= MAX_AMOUNT:
+            return amount
+    raise ValueError(f"Valor fora do limite de ±{MAX_AMOUNT}")
+
+
+def to_cents(value) -> int:
+    """Reais -> centavos inteiros"""
+    return int(quantize(value).scaleb(2))
+
+
+def from_cents(cents) -> Decimal:
+    """Centavos -> reais. Aceita o float de colunas SQLite antigas (REAL)"""
+    return Decimal(int(round(cents))).scaleb(-2)
+
+
+class Money(TypeDecorator):
+    """Valor em reais (Decimal) gravado como BIGINT de centavos"""
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else from_cents(value)
+
+
+def money_abs(column):
+    """abs() no banco mantendo o tipo Money (func.abs não tem tipo de retorno)"""
+    return func.abs(column, type_=Money())
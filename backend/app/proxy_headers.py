@@ -0,0 +1,75 @@
+"""
+IP real do cliente atrás de proxy reverso (X-Forwarded-For / X-Forwarded-Proto).
+
+Só vale o header quando a conexão vem de um proxy confiável (TRUSTED_PROXIES:
+IPs/CIDRs separados por vírgula, ou "*"). O cliente é a entrada mais à direita
+do X-Forwarded-For que não é um proxy confiável: as entradas à esquerda vêm do
+próprio cliente e podem ser forjadas. Com "*" qualquer conexão direta é tratada
+como o único proxy, e vale a última entrada (a que ele acrescentou).
+
+Diferente do ProxyHeadersMiddleware do uvicorn, que com "*" usa a entrada mais
+à esquerda, escolhida pelo cliente.
+"""
+
+import ipaddress
+import os
+
+# Não usa FORWARDED_ALLOW_IPS: o uvicorn lê essa variável e aplicaria a própria
+# regra (mais à esquerda com "*") antes do app
+TRUSTED_PROXIES = os.getenv("TRUSTED_PROXIES", "127.0.0.1")
+
+
+class TrustedProxies:
+    """Conjunto de proxies confiáveis (IPs, CIDRs ou "*")"""
+
+    def __init__(self, value: str):
+        hosts = [host.strip() for host in value.split(",") if host.strip()]
+        self.any_peer = "*" in hosts
+        self.networks = []
+        for host in hosts:
+            if host != "*":
+                self.networks.append(ipaddress.ip_network(host, strict=False))
+
+    def __contains__(self, host) -> bool:
+        try:
+            ip = ipaddress.ip_address(host)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.networks)
+
+    def client_host(self, peer: str, forwarded_for: str) -> str:
+        """IP do cliente dado o peer da conexão e o header X-Forwarded-For"""
+        if not (self.any_peer or peer in self):
+            return peer
+        hosts = [host.strip() for host in forwarded_for.split(",") if host.strip()]
+        if not hosts:
+            return peer
+        for host in reversed(hosts):
+            if host not in self:
+                return host
+        return hosts[0]  # Todos são proxies: o mais distante
+
+
+class ProxyHeadersMiddleware:
+    """Middleware ASGI: ajusta scope["client"] e scope["scheme"] pelos headers do proxy"""
+
+    def __init__(self, app, trusted_proxies: str = TRUSTED_PROXIES):
+        self.app = app
+        self.trusted = TrustedProxies(trusted_proxies)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket") and scope.get("client"):
+            peer = scope["client"][0]
+            if self.trusted.any_peer or peer in self.trusted:
+                headers = dict(scope["headers"])
+                proto = headers.get(b"x-forwarded-proto")
+                if proto:
+                    proto = proto.decode("latin1").split(",")[-1].strip()
+                    if scope["type"] == "websocket":
+                        proto = proto.replace("http", "ws")
+                    scope["scheme"] = proto
+                forwarded_for = headers.get(b"x-forwarded-for")
+                if forwarded_for:
+                    host = self.trusted.client_host(peer, forwarded_for.decode("latin1"))
+                    scope["client"] = (host, 0)
+        return await self.app(scope, receive, send)
@@ -0,0 +1,41 @@
+"""Contador de queries SQL por requisição (detecta regressões N+1)"""
+
+import contextvars
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_current_counter = contextvars.ContextVar("query_counter", default=None)
+
+
+class QueryCounter:
+    """Queries executadas dentro de um bloco count_queries()"""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+
+@contextmanager
+def count_queries():
+    """
+    Contar as queries executadas no contexto atual.
+
+    O contador é um objeto mutável guardado em um ContextVar, então
+    continua visível no threadpool onde rodam as rotas síncronas.
+    """
+    counter = QueryCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.count += 1
+        counter.statements.append(statement)
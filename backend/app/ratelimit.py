@@ -0,0 +1,152 @@
+"""
+Limite de tentativas de login com janela deslizante (em memória, por processo).
+
+Cada chave (IP ou username) guarda os horários das tentativas dentro da
+janela. O backend é plugável: qualquer objeto com count/add/reset/clear
+(ex.: um backend Redis para limitar entre workers) pode substituir o
+InMemoryBackend.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+# Tentativas por IP (todas) e falhas por username dentro da janela
+LOGIN_RATE_LIMIT_IP = int(os.getenv("LOGIN_RATE_LIMIT_IP", "20"))
+LOGIN_RATE_LIMIT_USER = int(os.getenv("LOGIN_RATE_LIMIT_USER", "5"))
+LOGIN_RATE_WINDOW = float(os.getenv("LOGIN_RATE_WINDOW", "60"))
+# Máximo de chaves guardadas; acima disso as menos recentes são descartadas
+LOGIN_RATE_MAX_KEYS = int(os.getenv("LOGIN_RATE_MAX_KEYS", "100000"))
+
+
+class InMemoryBackend:
+    """Horários das tentativas por chave, com descarte LRU das chaves"""
+
+    def __init__(self, max_keys: int = LOGIN_RATE_MAX_KEYS):
+        self.max_keys = max_keys
+        self._hits = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count(self, key: str, now: float, window: float) -> tuple:
+        """(tentativas na janela, horário da mais antiga ou None)"""
+        with self._lock:
+            hits = self._hits.get(key)
+            if not hits:
+                return 0, None
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            if not hits:
+                del self._hits[key]
+                return 0, None
+            return len(hits), hits[0]
+
+    def add(self, key: str, now: float):
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits is None:
+                hits = self._hits[key] = deque()
+                while len(self._hits) > self.max_keys:
+                    self._hits.popitem(last=False)
+            else:
+                self._hits.move_to_end(key)
+            hits.append(now)
+
+    def reset(self, key: str):
+        with self._lock:
+            self._hits.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._hits.clear()
+
+
+class SlidingWindowLimiter:
+    """No máximo `limit` tentativas por chave em qualquer intervalo de `window` segundos"""
+
+    def __init__(self, limit: int, window: float, backend=None, clock=time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.backend = backend or InMemoryBackend()
+        self._clock = clock
+
+    def retry_after(self, key: str) -> float:
+        """Segundos até a chave poder tentar de novo (0 = liberada)"""
+        now = self._clock()
+        count, oldest = self.backend.count(key, now, self.window)
+        if count < self.limit:
+            return 0.0
+        return max(oldest + self.window - now, 0.0)
+
+    def hit(self, key: str):
+        """Registrar uma tentativa"""
+        self.backend.add(key, self._clock())
+
+    def reset(self, key: str):
+        self.backend.reset(key)
+
+
+class LoginThrottle:
+    """
+    Limites do /auth/login: todas as tentativas por IP e as falhas por username.
+
+    check() roda antes da consulta ao banco e do hash da senha; uma tentativa
+    bloqueada não custa nada de CPU além do próprio check.
+    """
+
+    def __init__(self, ip_limit: int = LOGIN_RATE_LIMIT_IP,
+                 user_limit: int = LOGIN_RATE_LIMIT_USER,
+                 window: float = LOGIN_RATE_WINDOW, backend=None, clock=time.monotonic):
+        self.by_ip = SlidingWindowLimiter(ip_limit, window, backend, clock)
+        self.by_user = SlidingWindowLimiter(user_limit, window, self.by_ip.backend, clock)
+        self._lock = threading.Lock()
+        self.counters = {"allowed": 0, "rejected_ip": 0, "rejected_user": 0, "failures": 0}
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def check(self, ip: str, username: str) -> float:
+        """
+        Registrar a tentativa do IP e verificar os limites.
+        Retorna 0 se liberada ou os segundos para o Retry-After.
+        """
+        wait = self.by_ip.retry_after(f"ip:{ip}")
+        if wait:
+            self._count("rejected_ip")
+            return wait
+        self.by_ip.hit(f"ip:{ip}")
+        wait = self.by_user.retry_after(f"user:{username.lower()}")
+        if wait:
+            self._count("rejected_user")
+            return wait
+        self._count("allowed")
+        return 0.0
+
+    def failure(self, username: str):
+        """Senha errada (ou usuário inexistente): conta para o limite do username"""
+        self._count("failures")
+        self.by_user.hit(f"user:{username.lower()}")
+
+    def success(self, username: str):
+        """Login correto zera as falhas do username"""
+        self.by_user.reset(f"user:{username.lower()}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.counters,
+                "ip_limit": self.by_ip.limit,
+                "user_limit": self.by_user.limit,
+                "window": self.by_ip.window,
+            }
+
+    def clear(self):
+        """Zerar tentativas e contadores"""
+        self.by_ip.backend.clear()
+        with self._lock:
+            for name in self.counters:
+                self.counters[name] = 0
+
+
+login_throttle = LoginThrottle()
@@ -196,3 +196,15 @@ def audit_all_accounts(
     """
     audits = crud.audit_all_user_accounts(db, current_user.id)
     return audits
+
+
+@router.post("/recalculate/all")
+def recalculate_all_accounts(
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user)
+):
+    """
+    Recalcular e corrigir o saldo de todas as contas inconsistentes do usuário
+    Retorna apenas as contas corrigidas
+    """
+    return crud.recalculate_user_accounts(db, current_user.id)
@@ -1,10 +1,15 @@
 """Autenticação - Rotas de registro e login"""
 
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+import math
+
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from .. import crud, schemas
-from ..database import get_db
-from ..utils import verify_password
+from .. import crud, crud_async, schemas
+from ..database import get_db, get_async_db
+from .. import tokens
+from ..hashing import password_hasher, HashQueueFull
+from ..ratelimit import login_throttle
 
 router = APIRouter(
     prefix="/auth",
@@ -12,129 +17,206 @@ router = APIRouter(
 )
 
 
-def get_current_user(
+def get_token_claims(
     authorization: str = Header(None),
     db: Session = Depends(get_db)
-) -> schemas.User:
+) -> dict:
     """
-    Extrair usuário atual do header Authorization.
-    
-    Esperado: Authorization: Bearer token_1_bruno
+    Validar o JWT de acesso do header Authorization.
+
+    Esperado: Authorization: Bearer <jwt>
+
+    Só a assinatura e a lista de revogação em memória são verificadas:
+    o banco não é consultado (exceto na carga da lista de revogação).
     """
     if not authorization:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token não fornecido"
         )
-    
+
+    parts = authorization.split(' ')
     try:
-        # Formato esperado: Bearer token_1_bruno
-        parts = authorization.split(' ')
         if len(parts) != 2 or parts[0] != 'Bearer':
-            raise ValueError("Token inválido")
-        
-        token = parts[1]
-        token_parts = token.split('_')
-        
-        if len(token_parts) < 3 or token_parts[0] != 'token':
-            raise ValueError("Token inválido")
-        
-        user_id = int(token_parts[1])
-        user = crud.get_user(db, user_id=user_id)
-        
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Usuário não encontrado"
-            )
-        
-        return user
-    except (ValueError, IndexError):
+            raise tokens.InvalidToken("Token inválido")
+        claims = tokens.decode_token(parts[1])
+    except tokens.InvalidToken:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido"
         )
 
+    if crud.is_token_revoked(db, claims):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revogado"
+        )
+    return claims
+
+
+async def get_current_user(claims: dict = Depends(get_token_claims)) -> schemas.Principal:
+    """
+    Principal (id, username) do usuário atual, a partir das claims do token.
+    async: não faz I/O, então não precisa de uma ida ao threadpool.
+    """
+    return schemas.Principal(id=claims["user_id"], username=claims["username"])
+
+
+async def _hashing(operation):
+    """Aguardar operação do pool de hash; fila cheia vira 503"""
+    try:
+        return await operation
+    except HashQueueFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado, tente novamente",
+            headers={"Retry-After": "1"}
+        )
+
 
 @router.post("/register", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Registrar novo usuário.
 
     - username: nome de usuário único
     - password: senha (será criptografada)
     """
-    db_user = crud.get_user_by_username(db, username=user.username)
+    db_user = await crud_async.get_user_by_username(db, username=user.username)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username já está em uso"
         )
-    return crud.create_user(db=db, user=user)
+    hashed_password = await _hashing(password_hasher.hash(user.password))
+    return await crud_async.create_user(db, user=user, hashed_password=hashed_password)
 
 
 @router.post("/login", response_model=schemas.Token)
-def login(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def login(
+    user: schemas.UserCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
     """
     Login de usuário.
 
     Retorna token e dados do usuário se credenciais forem válidas.
+    Hashes em formato antigo ou com parâmetros desatualizados são refeitos aqui.
+    Tentativas acima do limite por IP ou por username recebem 429 antes de
+    qualquer consulta ou hash.
     """
-    db_user = crud.get_user_by_username(db, username=user.username)
+    # Atrás de proxy, request.client vem do X-Forwarded-For (TRUSTED_PROXIES)
+    client_ip = request.client.host if request.client else "desconhecido"
+    wait = login_throttle.check(client_ip, user.username)
+    if wait:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Muitas tentativas de login, tente novamente mais tarde",
+            headers={"Retry-After": str(math.ceil(wait))}
+        )
+
+    db_user = await crud_async.get_user_by_username(db, username=user.username)
     if not db_user:
+        login_throttle.failure(user.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Username ou password inválidos"
         )
 
-    if not verify_password(user.password, db_user.hashed_password):
+    valid, new_hash = await _hashing(
+        password_hasher.verify_and_update(user.password, db_user.hashed_password)
+    )
+    if not valid:
+        login_throttle.failure(user.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Username ou password inválidos"
         )
+    login_throttle.success(user.username)
+    if new_hash:
+        await crud_async.set_user_password_hash(db, db_user, new_hash)
 
-    # Gerar token simples (em produção seria JWT)
-    token = f"token_{db_user.id}_{db_user.username}"
+    return {**tokens.create_token_pair(db_user.id, db_user.username), "user": db_user}
 
-    return {
-        "token": token,
-        "token_type": "bearer",
-        "user": db_user
-    }
+
+@router.post("/refresh", response_model=schemas.TokenPair)
+def refresh(request: schemas.RefreshRequest, db: Session = Depends(get_db)):
+    """
+    Trocar um refresh token válido por um novo par de tokens.
+
+    O refresh token usado é revogado (rotação): cada um vale uma única vez.
+    """
+    try:
+        claims = tokens.decode_token(request.refresh_token, tokens.REFRESH)
+    except tokens.InvalidToken:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token inválido"
+        )
+    if crud.is_token_revoked(db, claims):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token revogado"
+        )
+
+    crud.revoke_token(db, claims)
+    return tokens.create_token_pair(claims["user_id"], claims["username"])
+
+
+@router.post("/logout")
+def logout(
+    request: schemas.LogoutRequest = None,
+    claims: dict = Depends(get_token_claims),
+    db: Session = Depends(get_db)
+):
+    """Revogar o token de acesso atual e, se enviado, o refresh token"""
+    crud.revoke_token(db, claims)
+    if request and request.refresh_token:
+        try:
+            refresh_claims = tokens.decode_token(request.refresh_token, tokens.REFRESH)
+        except tokens.InvalidToken:
+            refresh_claims = None
+        if refresh_claims and refresh_claims["user_id"] == claims["user_id"]:
+            crud.revoke_token(db, refresh_claims)
+    return {"message": "Logout realizado com sucesso"}
 
 
 @router.post("/change-password")
-def change_password(
+async def change_password(
     password_data: dict,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.Principal = Depends(get_current_user)
 ):
     """
-    Alterar senha do usuário.
+    Alterar senha do usuário logado.
 
     Requer: current_password, new_password
+    Revoga todos os tokens emitidos antes da troca e retorna um novo par.
     """
-    # Em um caso real, você pegaria o user_id do token JWT
-    user_id = 1
-
-    db_user = crud.get_user(db, user_id=user_id)
+    db_user = await crud_async.get_user(db, user_id=current_user.id)
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Usuário não encontrado"
         )
 
-    if not verify_password(
+    valid, _ = await _hashing(password_hasher.verify_and_update(
         password_data.get('current_password'),
         db_user.hashed_password
-    ):
+    ))
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Senha atual incorreta"
         )
 
     # Atualizar com nova senha
-    from ..utils import hash_password
-    db_user.hashed_password = hash_password(password_data.get('new_password'))
-    db.commit()
+    new_hash = await _hashing(password_hasher.hash(password_data.get('new_password')))
+    await crud_async.set_user_password_hash(db, db_user, new_hash)
+    await crud_async.revoke_user_tokens(db, db_user.id)
 
-    return {"message": "Senha alterada com sucesso"}
+    return {
+        "message": "Senha alterada com sucesso",
+        **tokens.create_token_pair(db_user.id, db_user.username)
+    }
@@ -1,10 +1,11 @@
-"""Gerenciamento de Categorias"""
+"""Gerenciamento de Categorias (rotas assíncronas: AsyncSession + crud_async)"""
 
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
-from .. import crud, schemas
-from ..database import get_db
+from .. import crud, crud_async, schemas
+from ..database import get_db, get_async_db
 from .auth import get_current_user
 
 router = APIRouter(
@@ -13,6 +14,8 @@ router = APIRouter(
 )
 
 
+# Síncrona de propósito: lê do cache de nomes populares (crud), que recalcula
+# em segundo plano com uma sessão síncrona no mesmo engine
 @router.get("/suggestions", response_model=List[str])
 def get_category_suggestions(
     db: Session = Depends(get_db),
@@ -29,10 +32,10 @@ def get_category_suggestions(
 
 
 @router.get("/", response_model=List[schemas.Category])
-def list_categories(
+async def list_categories(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_user)
 ):
     """
@@ -41,7 +44,7 @@ def list_categories(
     - skip: número de registros a pular (padrão: 0)
     - limit: número máximo de registros (padrão: 100)
     """
-    categories = crud.get_user_categories(
+    categories = await crud_async.get_user_categories(
         db, user_id=current_user.id, skip=skip, limit=limit
     )
     return categories
@@ -51,14 +54,14 @@ def list_categories(
     "/", response_model=schemas.Category,
     status_code=status.HTTP_201_CREATED
 )
-def create_category(
+async def create_category(
     category: schemas.CategoryCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_user)
 ):
     """Criar uma nova categoria"""
     # Verificar se já existe uma categoria com esse nome para este usuário
-    db_category = crud.get_category_by_name_and_user(
+    db_category = await crud_async.get_category_by_name_and_user(
         db, name=category.name, user_id=current_user.id
     )
     if db_category:
@@ -66,19 +69,19 @@ def create_category(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Você já possui uma categoria com esse nome"
         )
-    return crud.create_category(
+    return await crud_async.create_category(
         db=db, category=category, user_id=current_user.id
     )
 
 
 @router.get("/{category_id}", response_model=schemas.Category)
-def get_category(
+async def get_category(
     category_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_user)
 ):
     """Obter dados de uma categoria específica"""
-    db_category = crud.get_category(db, category_id=category_id)
+    db_category = await crud_async.get_category(db, category_id=category_id)
     if not db_category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -93,14 +96,14 @@ def get_category(
 
 
 @router.put("/{category_id}", response_model=schemas.Category)
-def update_category(
+async def update_category(
     category_id: int,
     category: schemas.CategoryCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_user)
 ):
     """Atualizar uma categoria"""
-    db_category = crud.get_category(db, category_id=category_id)
+    db_category = await crud_async.get_category(db, category_id=category_id)
     if not db_category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -113,7 +116,7 @@ def update_category(
         )
 
     # Verificar se já existe outra categoria com esse nome para este usuário
-    existing_category = crud.get_category_by_name_and_user(
+    existing_category = await crud_async.get_category_by_name_and_user(
         db, name=category.name, user_id=current_user.id
     )
     if existing_category and existing_category.id != category_id:
@@ -122,19 +125,19 @@ def update_category(
             detail="Você já possui outra categoria com esse nome"
         )
 
-    return crud.update_category(
+    return await crud_async.update_category(
         db=db, category_id=category_id, category=category
     )
 
 
 @router.delete("/{category_id}", response_model=schemas.Category)
-def delete_category(
+async def delete_category(
     category_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: schemas.User = Depends(get_current_user)
 ):
     """Deletar uma categoria"""
-    db_category = crud.get_category(db, category_id=category_id)
+    db_category = await crud_async.get_category(db, category_id=category_id)
     if not db_category:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -145,4 +148,4 @@ def delete_category(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Acesso negado"
         )
-    return crud.delete_category(db=db, category_id=category_id)
+    return await crud_async.delete_category(db=db, category_id=category_id)
@@ -1,14 +1,19 @@
 """Gerenciamento de Transações"""
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import json
+from fastapi import (
+    APIRouter, Depends, HTTPException, status, Query, Response,
+    UploadFile, File, Form
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import date
-from sqlalchemy import and_
-from .. import crud, schemas
+from .. import crud, schemas, statements
 from ..database import get_db
+from ..money import ZERO
 from .auth import get_current_user
-from ..models import Transaction
+from ..utils import encode_cursor, decode_cursor
 
 router = APIRouter(
     prefix="/transactions",
@@ -21,16 +26,21 @@ def get_transaction_description_suggestions(
     transaction_type: str = None,
     category_id: int = None,
     limit: int = 10,
+    q: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: schemas.User = Depends(get_current_user)
 ):
     """
     Obter sugestões de descrições baseadas em transações.
 
+    As descrições já usadas pelo usuário vêm primeiro (mais frequentes e
+    recentes antes); as mais populares entre todos completam a lista.
+
     Parâmetros opcionais:
     - transaction_type: Filtrar por tipo ('income' ou 'expense')
     - category_id: Filtrar por categoria específica
     - limit: Número máximo de sugestões (padrão: 10)
+    - q: Prefixo digitado (ex.: ?q=mer encontra "Mercado")
 
     Exemplos:
     - GET /transactions/suggestions/descriptions
@@ -38,21 +48,68 @@ def get_transaction_description_suggestions(
     - GET /transactions/suggestions/descriptions?category_id=5
     - GET /transactions/suggestions/descriptions?
       transaction_type=income&category_id=3&limit=20
+    - GET /transactions/suggestions/descriptions?q=mer&transaction_type=expense
     """
     suggestions = crud.get_transaction_description_suggestions(
         db,
         user_id=current_user.id,
         transaction_type=transaction_type,
         category_id=category_id,
-        limit=limit
+        limit=limit,
+        q=q
     )
     return suggestions
 
 
-@router.get("/", response_model=List[schemas.Transaction])
+def _parse_expand(expand: Optional[str]) -> List[str]:
+    """Validar ?expand=category,account,user"""
+    if not expand:
+        return []
+    requested = [item.strip() for item in expand.split(",") if item.strip()]
+    invalid = [item for item in requested if item not in crud.TRANSACTION_RELATIONS]
+    if invalid:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"expand inválido: {', '.join(invalid)} "
+                   f"(opções: {', '.join(crud.TRANSACTION_RELATIONS)})"
+        )
+    return requested
+
+
+def _to_list_item(transaction, expand: List[str]) -> schemas.TransactionListItem:
+    """Montar item compacto; só lê os relacionamentos pedidos em expand"""
+    fields = {
+        "id": transaction.id,
+        "amount": transaction.amount,
+        "date": transaction.date,
+        "description": transaction.description,
+        "transaction_type": transaction.transaction_type,
+        "category_id": transaction.category_id,
+        "account_id": transaction.account_id,
+    }
+    for relation in expand:
+        fields[relation] = getattr(transaction, relation)
+    return schemas.TransactionListItem.model_validate(fields, from_attributes=True)
+
+
+@router.get(
+    "/", response_model=List[schemas.TransactionListItem],
+    response_model_exclude_unset=True
+)
 def list_transactions(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    expand: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    transaction_type: Optional[str] = None,
+    category_id: Optional[int] = None,
+    account_id: Optional[int] = None,
+    min_amount: Optional[float] = Query(None, ge=0),
+    max_amount: Optional[float] = Query(None, ge=0),
+    q: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: schemas.User = Depends(get_current_user)
 ):
@@ -61,11 +118,45 @@ def list_transactions(
 
     - skip: número de registros a pular (padrão: 0)
     - limit: número máximo de registros (padrão: 100)
+    - cursor: cursor opaco retornado no header X-Next-Cursor da página anterior
+      (quando informado, skip é ignorado)
+    - expand: relacionamentos a incluir, separados por vírgula
+      (category, account, user). Sem expand, retorna apenas category_id e account_id.
+
+    Filtros (opcionais, combináveis, aplicados no banco):
+    - start / end: período (YYYY-MM-DD, inclusivo)
+    - transaction_type: 'income' ou 'expense'
+    - category_id / account_id
+    - min_amount / max_amount: faixa de valor absoluto
+    - q: trecho da descrição (sem diferenciar maiúsculas)
+
+    Se a página vier cheia, o header X-Next-Cursor traz o cursor da próxima página.
     """
+    expand_fields = _parse_expand(expand)
+
+    decoded_cursor = None
+    if cursor:
+        try:
+            decoded_cursor = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor inválido"
+            )
+
     transactions = crud.get_user_transactions(
-        db, user_id=current_user.id, skip=skip, limit=limit
+        db, user_id=current_user.id, skip=skip, limit=limit,
+        cursor=decoded_cursor, expand=expand_fields,
+        start=start, end=end, transaction_type=transaction_type,
+        category_id=category_id, account_id=account_id,
+        min_amount=min_amount, max_amount=max_amount, q=q
     )
-    return transactions
+
+    if transactions and len(transactions) == limit:
+        last = transactions[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.date, last.id)
+
+    return [_to_list_item(t, expand_fields) for t in transactions]
 
 
 @router.post(
@@ -104,6 +195,175 @@ def create_transaction(
     )
 
 
+# Limite de linhas por requisição de importação em lote
+MAX_BULK_TRANSACTIONS = 10000
+
+
+def _check_owned(owners: Dict[int, int], ids, user_id: int, not_found: str):
+    """Validar que todos os IDs existem e pertencem ao usuário"""
+    missing = sorted(set(ids) - set(owners))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"{not_found}: {', '.join(map(str, missing))}"
+        )
+    if any(owner != user_id for owner in owners.values()):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acesso negado"
+        )
+
+
+@router.post(
+    "/bulk", response_model=schemas.TransactionBulkResult,
+    status_code=status.HTTP_201_CREATED
+)
+def bulk_create_transactions(
+    payload: schemas.TransactionBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user)
+):
+    """
+    Importar várias transações em uma única requisição (ex.: histórico do extrato).
+
+    - transactions: lista no mesmo formato de POST /transactions/
+      (máximo de MAX_BULK_TRANSACTIONS por requisição)
+
+    Categorias e contas são validadas uma única vez para o lote inteiro;
+    se alguma não existir ou não pertencer ao usuário, nada é gravado.
+    Retorna a quantidade criada e o saldo atualizado de cada conta afetada.
+    """
+    transactions = payload.transactions
+    if not transactions:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Nenhuma transação informada"
+        )
+    if len(transactions) > MAX_BULK_TRANSACTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo de {MAX_BULK_TRANSACTIONS} transações por requisição"
+        )
+
+    category_ids = {t.category_id for t in transactions}
+    _check_owned(
+        crud.get_category_owners(db, category_ids), category_ids,
+        current_user.id, "Categoria não encontrada"
+    )
+    account_ids = {t.account_id for t in transactions if t.account_id}
+    _check_owned(
+        crud.get_account_owners(db, account_ids), account_ids,
+        current_user.id, "Conta não encontrada"
+    )
+
+    balances = crud.bulk_create_transactions(db, transactions, current_user.id)
+    return {"created": len(transactions), "account_balances": balances}
+
+
+@router.get("/export")
+def export_transactions(
+    export_format: str = Query("csv", alias="format"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    transaction_type: Optional[str] = None,
+    category_id: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user)
+):
+    """
+    Exportar o histórico completo de transações do usuário em streaming.
+
+    - format: 'csv' (padrão) ou 'jsonl'
+    - start / end: período (YYYY-MM-DD, inclusivo)
+    - transaction_type: 'income' ou 'expense'
+    - category_id: apenas uma categoria
+
+    As linhas são lidas do banco em lotes (yield_per) e enviadas conforme
+    são geradas, então o uso de memória não depende do tamanho do histórico.
+    """
+    if export_format not in statements.EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato não suportado (opções: "
+                   f"{', '.join(statements.EXPORT_FORMATS)})"
+        )
+    serializer, media_type = statements.EXPORT_FORMATS[export_format]
+
+    rows = crud.iter_user_transactions_for_export(
+        db, current_user.id, start=start, end=end,
+        transaction_type=transaction_type, category_id=category_id
+    )
+    return StreamingResponse(
+        serializer(rows, crud.EXPORT_COLUMNS),
+        media_type=media_type,
+        headers={
+            "Content-Disposition":
+                f'attachment; filename="transacoes.{export_format}"'
+        }
+    )
+
+
+# Linhas gravadas por transação do banco na importação de extrato
+IMPORT_CHUNK_SIZE = 500
+
+
+@router.post("/import")
+def import_statement(
+    file: UploadFile = File(...),
+    category_id: int = Form(...),
+    account_id: Optional[int] = Form(None),
+    file_format: Optional[str] = Form(None, alias="format"),
+    chunk_size: int = Form(IMPORT_CHUNK_SIZE, ge=1, le=crud.BULK_INSERT_BATCH_SIZE),
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user)
+):
+    """
+    Importar extrato bancário (CSV ou OFX) enviado como multipart/form-data.
+
+    - file: arquivo do extrato
+    - category_id: categoria aplicada a todos os lançamentos
+    - account_id: conta (opcional); o saldo é ajustado a cada lote
+    - format: 'csv' ou 'ofx' (padrão: deduzido da extensão do arquivo)
+    - chunk_size: lançamentos gravados por transação (padrão: 500)
+
+    CSV: cabeçalho com data/date, valor/amount e opcionalmente
+    descricao/description e tipo/type; separador ',' ou ';'.
+    Sem coluna de tipo, valores negativos viram despesa.
+
+    O arquivo é lido em streaming e a resposta é NDJSON, uma linha por evento:
+    {"event": "error"|"duplicate", "line": n, ...},
+    {"event": "progress", "processed", "created", "duplicates", "errors"} a cada
+    lote gravado, e {"event": "done", ...} no final.
+    """
+    file_format = (file_format or (file.filename or "").rsplit(".", 1)[-1]).lower()
+    parser = statements.STATEMENT_PARSERS.get(file_format)
+    if parser is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato não suportado (opções: "
+                   f"{', '.join(statements.STATEMENT_PARSERS)})"
+        )
+
+    _check_owned(
+        crud.get_category_owners(db, {category_id}), {category_id},
+        current_user.id, "Categoria não encontrada"
+    )
+    if account_id:
+        _check_owned(
+            crud.get_account_owners(db, {account_id}), {account_id},
+            current_user.id, "Conta não encontrada"
+        )
+
+    events = statements.import_statement(
+        db, current_user.id, parser(statements.iter_text_lines(file.file)),
+        category_id=category_id, account_id=account_id, chunk_size=chunk_size
+    )
+    return StreamingResponse(
+        (json.dumps(event, ensure_ascii=False) + "\n" for event in events),
+        media_type="application/x-ndjson"
+    )
+
+
 @router.get("/{transaction_id}", response_model=schemas.Transaction)
 def get_transaction(
     transaction_id: int,
@@ -111,7 +371,9 @@ def get_transaction(
     current_user: schemas.User = Depends(get_current_user)
 ):
     """Obter dados de uma transação específica"""
-    db_transaction = crud.get_transaction(db, transaction_id=transaction_id)
+    db_transaction = crud.get_transaction(
+        db, transaction_id=transaction_id, load_relations=True
+    )
     if not db_transaction:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -201,48 +463,21 @@ def get_totals_by_category(
     - balance: Saldo (receitas - despesas)
     - transaction_count: Número de transações
     """
-    from sqlalchemy import func
-    from ..models import Category
-
-    # Query otimizada com agregação SQL nativa
-    results = db.query(
-        Transaction.category_id,
-        Category.name.label('category_name'),
-        func.sum(
-            func.case(
-                (Transaction.transaction_type == 'income',
-                 func.abs(Transaction.amount)),
-                else_=0
-            )
-        ).label('total_income'),
-        func.sum(
-            func.case(
-                (Transaction.transaction_type == 'expense',
-                 func.abs(Transaction.amount)),
-                else_=0
-            )
-        ).label('total_expense'),
-        func.count(Transaction.id).label('transaction_count')
-    ).join(
-        Category, Transaction.category_id == Category.id
-    ).filter(
-        Transaction.user_id == current_user.id
-    ).group_by(
-        Transaction.category_id, Category.name
-    ).all()
-
-    # Formatar resposta
+    # Agregação sobre o rollup mensal (transaction_monthly_totals)
+    results = crud.get_totals_by_category(db, current_user.id)
+
+    # Formatar resposta (saldo calculado em Decimal, float só no JSON)
     totals = []
-    for row in results:
-        total_income = float(row.total_income or 0)
-        total_expense = float(row.total_expense or 0)
+    for category_id, category_name, income, expense, count in results:
+        total_income = income or ZERO
+        total_expense = expense or ZERO
         totals.append({
-            "category_id": row.category_id,
-            "category_name": row.category_name,
-            "total_income": total_income,
-            "total_expense": total_expense,
-            "balance": total_income - total_expense,
-            "transaction_count": row.transaction_count
+            "category_id": category_id,
+            "category_name": category_name,
+            "total_income": float(total_income),
+            "total_expense": float(total_expense),
+            "balance": float(total_income - total_expense),
+            "transaction_count": count or 0
         })
 
     return totals
@@ -270,41 +505,17 @@ def get_totals_by_period(
     - period_start: Data inicial
     - period_end: Data final
     """
-    from sqlalchemy import func
-
-    # Query otimizada com agregação SQL
-    result = db.query(
-        func.sum(
-            func.case(
-                (Transaction.transaction_type == 'income',
-                 func.abs(Transaction.amount)),
-                else_=0
-            )
-        ).label('total_income'),
-        func.sum(
-            func.case(
-                (Transaction.transaction_type == 'expense',
-                 func.abs(Transaction.amount)),
-                else_=0
-            )
-        ).label('total_expense'),
-        func.count(Transaction.id).label('transaction_count')
-    ).filter(
-        and_(
-            Transaction.user_id == current_user.id,
-            Transaction.date >= start,
-            Transaction.date <= end
-        )
-    ).first()
-
-    total_income = float(result.total_income or 0)
-    total_expense = float(result.total_expense or 0)
+    # Meses inteiros vêm do rollup mensal; só as pontas parciais
+    # são escaneadas na tabela de transações
+    total_income, total_expense, transaction_count = crud.get_totals_by_period(
+        db, current_user.id, start, end
+    )
 
     return {
-        "total_income": total_income,
-        "total_expense": total_expense,
-        "balance": total_income - total_expense,
-        "transaction_count": result.transaction_count or 0,
+        "total_income": float(total_income),
+        "total_expense": float(total_expense),
+        "balance": float(total_income - total_expense),
+        "transaction_count": transaction_count,
         "period_start": start.isoformat(),
         "period_end": end.isoformat()
     }
@@ -1,10 +1,11 @@
 """Gerenciamento de Usuários"""
 
-from fastapi import APIRouter, Depends, HTTPException, status, Body
+from fastapi import APIRouter, Depends, HTTPException, status, Body, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any
 from .. import crud, schemas
 from ..database import get_db
+from ..utils import detect_image_type
 from .auth import get_current_user
 import json
 
@@ -33,7 +34,13 @@ def get_profile(
     current_user: schemas.User = Depends(get_current_user)
 ):
     """Obter perfil do usuário autenticado"""
-    return current_user
+    db_user = crud.get_user(db, user_id=current_user.id)
+    if not db_user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuário não encontrado"
+        )
+    return db_user
 
 
 @router.put("/profile", response_model=schemas.User)
@@ -56,6 +63,12 @@ def update_profile(
     try:
         updated_user = crud.update_user_profile(db=db, user_id=current_user.id, user=user)
         return updated_user
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         print(f"Erro ao atualizar perfil: {str(e)}")
         raise HTTPException(
@@ -76,6 +89,50 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
     return db_user
 
 
+@router.get("/{user_id}/avatar")
+def get_user_avatar(user_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    Obter imagem do avatar de um usuário.
+
+    A ETag é o hash do conteúdo. Pela URL versionada (?v=..., como em
+    avatar_url) a resposta pode ser guardada indefinidamente pelo navegador;
+    sem versão, o cliente revalida com If-None-Match e recebe 304.
+
+    O Content-Type vem dos magic bytes (só png, jpeg, gif e webp), com
+    nosniff: nada gravado antes da validação é servido como SVG/HTML.
+    """
+    avatar_hash = crud.get_user_avatar_hash(db, user_id)
+    if not avatar_hash:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Avatar não encontrado"
+        )
+
+    etag = f'"{avatar_hash}"'
+    if request.query_params.get("v") == avatar_hash[:16]:
+        cache_control = "public, max-age=31536000, immutable"
+    else:
+        cache_control = "public, no-cache"
+    headers = {
+        "ETag": etag,
+        "Cache-Control": cache_control,
+        "X-Content-Type-Options": "nosniff",
+        "Content-Disposition": "inline",
+    }
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    avatar = crud.get_avatar(db, avatar_hash)
+    content_type = detect_image_type(avatar.data) if avatar else None
+    if not content_type:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Avatar não encontrado"
+        )
+    return Response(content=avatar.data, media_type=content_type, headers=headers)
+
+
 @router.put("/{user_id}", response_model=schemas.User)
 def update_user(
     user_id: int,
@@ -1,6 +1,16 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, AfterValidator, PlainSerializer
+from typing import Optional, List, Dict, Annotated
 from datetime import date, datetime
+from decimal import Decimal
+from .money import bounded_amount
+
+# Valor monetário: Decimal com duas casas no Python, número no JSON; fora do
+# BIGINT de centavos das colunas Money é 422, não estouro ao gravar
+Money = Annotated[
+    Decimal,
+    AfterValidator(bounded_amount),
+    PlainSerializer(float, return_type=float, when_used="json"),
+]
 
 
 class UserCreate(BaseModel):
@@ -15,7 +25,7 @@ class User(BaseModel):
     username: str
     email: Optional[str] = None
     full_name: Optional[str] = None
-    avatar: Optional[str] = None
+    avatar_url: Optional[str] = None
     cpf: Optional[str] = None
     phone: Optional[str] = None
     birth_date: Optional[date] = None
@@ -25,10 +35,16 @@ class User(BaseModel):
         orm_mode = True
 
 
+class Principal(BaseModel):
+    """Usuário autenticado: apenas o necessário para autorizar as rotas"""
+    id: int
+    username: str
+
+
 class UserUpdate(BaseModel):
     email: Optional[str] = None
     full_name: Optional[str] = None
-    avatar: Optional[str] = None
+    avatar: Optional[str] = None  # Data URL (base64) da nova imagem; "" remove o avatar
     cpf: Optional[str] = None
     phone: Optional[str] = None
     birth_date: Optional[date] = None
@@ -39,12 +55,25 @@ class UserUpdate(BaseModel):
         validate_assignment = True
 
 
-class Token(BaseModel):
-    token: str
+class TokenPair(BaseModel):
+    token: str  # JWT de acesso (Authorization: Bearer ...)
+    refresh_token: str
     token_type: str = "bearer"
+    expires_in: int  # Validade do token de acesso, em segundos
+
+
+class Token(TokenPair):
     user: User
 
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+
 class CategoryCreate(BaseModel):
     name: str
     icon: Optional[str] = None
@@ -62,7 +91,7 @@ class Category(BaseModel):
 class AccountCreate(BaseModel):
     name: str
     account_type: str
-    initial_balance: float = 0.0
+    initial_balance: Money = Decimal("0.00")
     currency: str = "BRL"
 
 
@@ -76,8 +105,8 @@ class Account(BaseModel):
     id: int
     name: str
     account_type: str
-    initial_balance: float
-    balance: float
+    initial_balance: Money
+    balance: Money
     currency: str
     is_active: bool
     created_at: Optional[datetime] = None
@@ -90,16 +119,16 @@ class Account(BaseModel):
 class AccountBalanceAudit(BaseModel):
     account_id: int
     account_name: str
-    initial_balance: float
-    current_balance: float
-    calculated_balance: float
+    initial_balance: Money
+    current_balance: Money
+    calculated_balance: Money
     total_transactions: int
     is_consistent: bool
-    difference: float
+    difference: Money
 
 
 class TransactionCreate(BaseModel):
-    amount: float
+    amount: Money
     date: date
     description: Optional[str] = None
     transaction_type: str
@@ -107,9 +136,38 @@ class TransactionCreate(BaseModel):
     account_id: Optional[int] = None
 
 
+class TransactionBulkCreate(BaseModel):
+    transactions: List[TransactionCreate]
+
+
+class TransactionBulkResult(BaseModel):
+    created: int
+    account_balances: Dict[int, Money]  # Saldo atualizado por conta
+
+
+class TransactionListItem(BaseModel):
+    """
+    Item compacto da listagem: relacionamentos apenas como IDs.
+    category, account e user só aparecem quando pedidos via ?expand=.
+    """
+    id: int
+    amount: Money
+    date: date
+    description: Optional[str] = None
+    transaction_type: str
+    category_id: Optional[int] = None
+    account_id: Optional[int] = None
+    category: Optional[Category] = None
+    account: Optional[Account] = None
+    user: Optional[User] = None
+
+    class Config:
+        orm_mode = True
+
+
 class Transaction(BaseModel):
     id: int
-    amount: float
+    amount: Money
     date: date
     description: Optional[str]
     transaction_type: str
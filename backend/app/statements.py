@@ -0,0 +1,281 @@
+"""Importação de extratos bancários (CSV e OFX) e exportação de transações em streaming"""
+
+import codecs
+import csv
+import io
+import itertools
+import json
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from . import crud, schemas
+from .money import bounded_amount
+
+# Nomes de coluna aceitos no cabeçalho do CSV (comparados em minúsculas)
+CSV_COLUMNS = {
+    "date": ("date", "data"),
+    "description": ("description", "descricao", "descrição", "historico", "histórico", "memo"),
+    "amount": ("amount", "valor"),
+    "transaction_type": ("transaction_type", "type", "tipo"),
+}
+
+# Valores da coluna de tipo que indicam receita/despesa
+INCOME_TYPES = {"income", "receita", "credito", "crédito", "credit", "c"}
+EXPENSE_TYPES = {"expense", "despesa", "debito", "débito", "debit", "d"}
+
+_OFX_TAG = re.compile(r"<(/?)(\w+)>([^<\r\n]*)")
+
+
+def parse_amount(value: str) -> Decimal:
+    """
+    Converter valor monetário do extrato para Decimal com duas casas.
+    Aceita '1234.56', '-1.234,56', '1234,56' e 'R$ 10,00'; 'nan', 'inf' e
+    valores fora do BIGINT de centavos levantam ValueError (erro da linha).
+    """
+    text = value.strip().replace("R$", "").replace(" ", "")
+    if "," in text:
+        if "." in text and text.rfind(".") > text.rfind(","):
+            text = text.replace(",", "")  # 1,234.56
+        else:
+            text = text.replace(".", "").replace(",", ".")  # 1.234,56
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"Valor inválido: {value!r}")
+    if not amount.is_finite():
+        raise ValueError(f"Valor inválido: {value!r}")
+    return bounded_amount(amount)
+
+
+def parse_date(value: str) -> date:
+    """Converter data do extrato: YYYY-MM-DD, DD/MM/YYYY ou YYYYMMDD[hhmmss...] (OFX)"""
+    text = value.strip()
+    for fmt, size in (("%Y-%m-%d", 10), ("%d/%m/%Y", 10), ("%Y%m%d", 8)):
+        try:
+            return datetime.strptime(text[:size], fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Data inválida: {value!r}")
+
+
+def _signed_row(day: str, amount: str, description: str, kind: str = None) -> dict:
+    """Montar campos da transação; despesas ficam com valor negativo"""
+    value = parse_amount(amount)
+    kind = (kind or "").strip().lower()
+    if kind in INCOME_TYPES:
+        transaction_type = "income"
+    elif kind in EXPENSE_TYPES:
+        transaction_type = "expense"
+    elif not kind:
+        transaction_type = "expense" if value < 0 else "income"
+    else:
+        raise ValueError(f"Tipo inválido: {kind!r}")
+
+    return {
+        "date": parse_date(day),
+        "amount": -abs(value) if transaction_type == "expense" else abs(value),
+        "description": (description or "").strip() or None,
+        "transaction_type": transaction_type,
+    }
+
+
+def iter_csv_rows(lines):
+    """
+    Ler linhas de um CSV de extrato sob demanda.
+
+    Gera (nº da linha, campos, erro): campos é None quando a linha é inválida.
+    O separador (',' ou ';') é detectado pelo cabeçalho.
+    """
+    lines = iter(lines)
+    header_line = next(lines, None)
+    if header_line is None:
+        return
+    delimiter = ";" if header_line.count(";") > header_line.count(",") else ","
+    reader = csv.reader(itertools.chain([header_line], lines), delimiter=delimiter)
+
+    header = [name.strip().lower() for name in next(reader)]
+    positions = {}
+    for field, aliases in CSV_COLUMNS.items():
+        positions[field] = next((header.index(a) for a in aliases if a in header), None)
+    missing = [f for f in ("date", "amount") if positions[f] is None]
+    if missing:
+        yield 1, None, f"Cabeçalho sem coluna obrigatória: {', '.join(missing)}"
+        return
+
+    def column(row, field):
+        index = positions[field]
+        return row[index] if index is not None and index < len(row) else None
+
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        try:
+            yield reader.line_num, _signed_row(
+                column(row, "date") or "", column(row, "amount") or "",
+                column(row, "description"), column(row, "transaction_type")
+            ), None
+        except ValueError as e:
+            yield reader.line_num, None, str(e)
+
+
+def iter_ofx_rows(lines):
+    """
+    Ler lançamentos (<STMTTRN>) de um arquivo OFX sob demanda.
+
+    Funciona tanto com OFX 1.x (SGML, tags sem fechamento) quanto 2.x (XML).
+    Gera (nº da linha do <STMTTRN>, campos, erro).
+    """
+    current = None
+    start_line = 0
+    for line_number, line in enumerate(lines, start=1):
+        for closing, tag, value in _OFX_TAG.findall(line):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if not closing:
+                    current, start_line = {}, line_number
+                elif current is not None:
+                    try:
+                        yield start_line, _signed_row(
+                            current.get("DTPOSTED", ""), current.get("TRNAMT", ""),
+                            current.get("MEMO") or current.get("NAME"),
+                        ), None
+                    except ValueError as e:
+                        yield start_line, None, str(e)
+                    current = None
+            elif current is not None and not closing:
+                current[tag] = value.strip()
+
+
+STATEMENT_PARSERS = {
+    "csv": iter_csv_rows,
+    "ofx": iter_ofx_rows,
+}
+
+
+def iter_text_lines(binary_file, encoding: str = "utf-8-sig"):
+    """
+    Decodificar arquivo binário linha a linha (sem carregar tudo na memória).
+    Bytes inválidos no encoding viram '�' em vez de abortar a importação.
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    pending = ""
+    while True:
+        block = binary_file.read(64 * 1024)
+        pending += decoder.decode(block, final=not block)
+        *complete, pending = pending.split("\n")
+        for line in complete:
+            yield line.rstrip("\r") + "\n"
+        if not block:
+            break
+    if pending:
+        yield pending
+
+
+def import_statement(db: Session, user_id: int, rows, category_id: int,
+                     account_id: int = None, chunk_size: int = 500):
+    """
+    Gravar os lançamentos de um extrato em lotes de chunk_size.
+
+    rows: gerador de (linha, campos, erro) vindo de um parser de STATEMENT_PARSERS.
+    Cada lote é gravado em uma transação própria via crud.bulk_create_transactions.
+    Lançamentos iguais (data, valor, descrição, conta) a transações que já existiam
+    antes da importação são ignorados como duplicados.
+
+    Gera eventos (dict) de progresso, erro por linha, duplicado e resumo final.
+    """
+    last_existing_id = crud.get_max_transaction_id(db, user_id)
+    totals = {"processed": 0, "created": 0, "duplicates": 0, "errors": 0}
+
+    def write_chunk(chunk):
+        """Gravar um lote; gera eventos de duplicado e levanta SQLAlchemyError se falhar"""
+        keys = {crud.transaction_key(t) for _, t in chunk}
+        existing = crud.get_existing_transaction_keys(db, user_id, keys, last_existing_id)
+        new = []
+        for line, transaction in chunk:
+            if crud.transaction_key(transaction) in existing:
+                totals["duplicates"] += 1
+                yield {"event": "duplicate", "line": line}
+            else:
+                new.append(transaction)
+        if new:
+            crud.bulk_create_transactions(db, new, user_id)
+            totals["created"] += len(new)
+
+    chunk = []
+    for line, fields, error in itertools.chain(rows, [(None, None, None)]):
+        at_end = line is None
+        if not at_end:
+            totals["processed"] += 1
+            if error is None:
+                try:
+                    chunk.append((line, schemas.TransactionCreate(
+                        category_id=category_id, account_id=account_id, **fields
+                    )))
+                except ValidationError as e:
+                    error = "; ".join(detail["msg"] for detail in e.errors())
+            if error is not None:
+                totals["errors"] += 1
+                yield {"event": "error", "line": line, "detail": error}
+
+        if chunk and (len(chunk) >= chunk_size or at_end):
+            try:
+                yield from write_chunk(chunk)
+            except SQLAlchemyError:
+                db.rollback()
+                yield {"event": "error", "line": chunk[0][0],
+                       "detail": "Falha ao gravar lote; importação interrompida"}
+                break
+            chunk = []
+            yield {"event": "progress", **totals}
+
+    yield {"event": "done", **totals}
+
+
+def _export_value(value):
+    """Converter valor da linha para texto/JSON (datas em ISO 8601, valores como número)"""
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def iter_csv_export(rows, columns, batch_size: int = 1000):
+    """
+    Gerar o CSV em pedaços de batch_size linhas (cabeçalho incluso).
+    rows: iterável de tuplas na ordem de columns.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([_export_value(value) for value in row])
+        if count % batch_size == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_jsonl_export(rows, columns, batch_size: int = 1000):
+    """Gerar JSON Lines (um objeto por transação) em pedaços de batch_size linhas"""
+    lines = []
+    for row in rows:
+        record = {column: _export_value(value) for column, value in zip(columns, row)}
+        lines.append(json.dumps(record, ensure_ascii=False))
+        if len(lines) >= batch_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+EXPORT_FORMATS = {
+    "csv": (iter_csv_export, "text/csv; charset=utf-8"),
+    "jsonl": (iter_jsonl_export, "application/x-ndjson"),
+}
@@ -0,0 +1,90 @@
+"""
+Tokens JWT assinados (python-jose): acesso de curta duração e refresh.
+
+O token de acesso carrega o id (sub) e o username do usuário, então as rotas
+autorizam sem ir ao banco; só a lista de revogação (em memória, ver
+crud.is_token_revoked) é consultada a cada requisição.
+"""
+
+import os
+import time
+import uuid
+
+from jose import JWTError, jwt
+
+# Chave fixa só em desenvolvimento/testes: fora deles, sem SECRET_KEY
+# qualquer um forjaria tokens, então o servidor não sobe (check_secret_key)
+DEV_ENVIRONMENTS = ("development", "test")
+ENVIRONMENT = os.getenv("ENVIRONMENT", "production")
+SECRET_KEY = os.getenv("SECRET_KEY") or (
+    "dev-secret-mude-em-producao" if ENVIRONMENT in DEV_ENVIRONMENTS else None
+)
+ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+
+class InvalidToken(ValueError):
+    """Token malformado, com assinatura inválida, expirado ou do tipo errado"""
+
+
+def check_secret_key():
+    """Chamado na inicialização: levanta RuntimeError se não houver SECRET_KEY"""
+    if not SECRET_KEY:
+        raise RuntimeError(
+            f"SECRET_KEY nao definida (ENVIRONMENT={ENVIRONMENT}). Defina SECRET_KEY; "
+            f"a chave de desenvolvimento so vale com ENVIRONMENT em {DEV_ENVIRONMENTS}"
+        )
+
+
+def _create_token(user_id: int, username: str, token_type: str, lifetime: float) -> str:
+    # iat com fração de segundo: revogações por usuário comparam com ele
+    # (crud.revoke_user_tokens), e um login logo depois precisa ficar de fora
+    now = time.time()
+    claims = {
+        "sub": str(user_id),
+        "username": username,
+        "type": token_type,
+        "jti": uuid.uuid4().hex,
+        "iat": now,
+        "exp": int(now + lifetime),
+    }
+    return jwt.encode(claims, SECRET_KEY, algorithm=ALGORITHM)
+
+
+def create_access_token(user_id: int, username: str) -> str:
+    """Token de acesso (Authorization: Bearer ...)"""
+    return _create_token(user_id, username, ACCESS, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
+def create_refresh_token(user_id: int, username: str) -> str:
+    """Token de refresh (só serve para POST /auth/refresh)"""
+    return _create_token(user_id, username, REFRESH, REFRESH_TOKEN_EXPIRE_DAYS * 86400)
+
+
+def create_token_pair(user_id: int, username: str) -> dict:
+    """Campos de token da resposta de login/refresh"""
+    return {
+        "token": create_access_token(user_id, username),
+        "refresh_token": create_refresh_token(user_id, username),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+def decode_token(token: str, expected_type: str = ACCESS) -> dict:
+    """Validar assinatura, expiração e tipo. Retorna as claims"""
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError as e:
+        raise InvalidToken(str(e)) from e
+    if claims.get("type") != expected_type or not claims.get("jti"):
+        raise InvalidToken("Tipo de token inválido")
+    try:
+        claims["user_id"] = int(claims["sub"])
+    except (KeyError, ValueError) as e:
+        raise InvalidToken("Token sem usuário") from e
+    return claims
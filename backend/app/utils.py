@@ -1,32 +1,158 @@
 """Utilitários para aplicação Finance App"""
 
+import base64
 import hashlib
+import hmac
 import os
+from datetime import date
+
+from passlib.context import CryptContext
+
+# Algoritmos de hash de senha (passlib), o primeiro é o usado para hashes novos.
+# argon2/bcrypt exigem os pacotes argon2-cffi/bcrypt instalados.
+PASSWORD_SCHEMES = [
+    scheme.strip()
+    for scheme in os.getenv("PASSWORD_SCHEMES", "pbkdf2_sha256").split(",")
+    if scheme.strip()
+]
+PASSWORD_PBKDF2_ROUNDS = int(os.getenv("PASSWORD_PBKDF2_ROUNDS", "100000"))
+
+# deprecated="auto": hashes de outro algoritmo ou com menos iterações que o
+# configurado são refeitos no próximo login (verify_and_update_password)
+pwd_context = CryptContext(
+    schemes=PASSWORD_SCHEMES,
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=PASSWORD_PBKDF2_ROUNDS,
+    pbkdf2_sha256__min_rounds=PASSWORD_PBKDF2_ROUNDS,
+)
+
+# Formato antigo: salt (32 bytes) + PBKDF2-SHA256 com 100.000 iterações, em hex
+LEGACY_HASH_LENGTH = 128
+LEGACY_PBKDF2_ROUNDS = 100000
+
+
+def _is_legacy_hash(hashed: str) -> bool:
+    return len(hashed) == LEGACY_HASH_LENGTH and not hashed.startswith('$')
+
+
+def _verify_legacy_password(password: str, hashed: str) -> bool:
+    """Verificar hash no formato antigo (salt hex + hash hex)"""
+    salt = bytes.fromhex(hashed[:64])
+    pwd_hash = hashlib.pbkdf2_hmac(
+        'sha256', password.encode('utf-8'), salt, LEGACY_PBKDF2_ROUNDS
+    )
+    return hmac.compare_digest(pwd_hash.hex(), hashed[64:])
 
 
 def hash_password(password: str) -> str:
     """
-    Hash uma senha usando SHA-256.
+    Hash de senha com o algoritmo configurado (PASSWORD_SCHEMES).
 
-    NOTA: Em produção, usar bcrypt ou argon2!
-    Esta é apenas para desenvolvimento.
+    Custa dezenas de ms de CPU: nas rotas, usar app.hashing.password_hasher,
+    que roda fora do caminho da requisição.
     """
-    salt = os.urandom(32)
-    pwd_hash = hashlib.pbkdf2_hmac(
-        'sha256', password.encode('utf-8'), salt, 100000
-    )
-    return salt.hex() + pwd_hash.hex()
+    return pwd_context.hash(password)
+
+
+def verify_and_update_password(password: str, hashed: str) -> tuple:
+    """
+    Verificar senha e indicar se o hash precisa ser refeito.
+
+    Retorna (válida, novo_hash): novo_hash só vem preenchido quando a senha
+    confere e o hash está no formato antigo ou com parâmetros desatualizados.
+    """
+    if not password or not hashed:
+        return False, None
+    if _is_legacy_hash(hashed):
+        if _verify_legacy_password(password, hashed):
+            return True, hash_password(password)
+        return False, None
+    try:
+        return pwd_context.verify_and_update(password, hashed)
+    except ValueError:
+        # Hash em formato desconhecido
+        return False, None
 
 
 def verify_password(password: str, hashed: str) -> bool:
+    """Verificar se uma senha corresponde ao hash"""
+    return verify_and_update_password(password, hashed)[0]
+
+
+# Assinaturas (magic bytes) dos formatos de imagem aceitos
+IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+)
+
+# Tamanho máximo do avatar decodificado
+AVATAR_MAX_BYTES = int(os.getenv("AVATAR_MAX_BYTES", str(2 * 1024 * 1024)))
+
+
+def detect_image_type(data: bytes):
+    """Tipo da imagem pelos magic bytes (png, jpeg, gif ou webp), ou None"""
+    for signature, content_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return content_type
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def decode_image_data_url(value: str) -> tuple:
     """
-    Verificar se uma senha corresponde ao hash.
+    Decodificar imagem enviada como data URL (data:image/png;base64,...)
+    ou base64 puro.
 
-    NOTA: Em produção, usar bcrypt ou argon2!
+    O tipo vem sempre do conteúdo, nunca do media type declarado: só
+    png, jpeg, gif e webp são aceitos (SVG, que pode conter script, não).
+    Retorna (bytes, content_type). Levanta ValueError se inválida.
     """
-    salt = bytes.fromhex(hashed[:64])
-    stored_hash = hashed[64:]
-    pwd_hash = hashlib.pbkdf2_hmac(
-        'sha256', password.encode('utf-8'), salt, 100000
-    )
-    return pwd_hash.hex() == stored_hash
+    payload = value.strip()
+    if payload.startswith('data:'):
+        header, _, payload = payload.partition(',')
+        media_type = header[5:].split(';')[0]
+        if not header.endswith(';base64') or not media_type.startswith('image/'):
+            raise ValueError("Avatar inválido")
+
+    # base64 ocupa 4/3 do tamanho: recusar antes de decodificar
+    if len(payload) > (AVATAR_MAX_BYTES + 2) // 3 * 4:
+        raise ValueError("Avatar muito grande")
+    try:
+        data = base64.b64decode(payload, validate=True)
+    except ValueError as e:
+        raise ValueError("Avatar inválido") from e
+    if len(data) > AVATAR_MAX_BYTES:
+        raise ValueError("Avatar muito grande")
+
+    content_type = detect_image_type(data)
+    if content_type is None:
+        raise ValueError("Avatar inválido")
+    return data, content_type
+
+
+def encode_cursor(cursor_date: date, cursor_id: int) -> str:
+    """
+    Gerar cursor opaco para paginação por keyset.
+
+    O cursor aponta para a última linha entregue (data, id).
+    """
+    raw = f"{cursor_date.isoformat()}|{cursor_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Decodificar cursor gerado por encode_cursor.
+
+    Levanta ValueError se o cursor for inválido.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+        date_part, id_part = raw.split('|')
+        return date.fromisoformat(date_part), int(id_part)
+    except (UnicodeError, ValueError, TypeError) as e:
+        raise ValueError("Cursor inválido") from e
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark: vazão da rota assíncrona (AsyncSession) contra a mesma consulta síncrona.
+
+Dispara requisições concorrentes em GET /categories/ (async def + crud_async)
+e em uma cópia síncrona da rota (def + Session, roda no threadpool). Com
+--latency-ms cada query espera esse tempo, simulando a ida e volta até um
+PostgreSQL remoto; --threads limita o threadpool do Starlette.
+
+A rota síncrona fica limitada a threads / latência; a assíncrona só pelo
+custo de CPU por requisição. Com latência baixa as duas empatam (ou a
+síncrona ganha, pelo custo extra do aiosqlite); a diferença aparece quando
+a espera pelo banco domina, ex.: --latency-ms 50 --threads 8 → ~100 x ~200 req/s.
+
+Uso:
+    python bench_async_routes.py [--requests 400] [--concurrency 100] [--latency-ms 50] [--threads 8]
+
+Usa um banco SQLite temporário próprio; não toca no finance.db.
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+from typing import List
+
+import anyio.to_thread
+import httpx
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.util import await_only
+
+# Chave de desenvolvimento do tokens.py (o benchmark gera os próprios JWTs)
+os.environ.setdefault("ENVIRONMENT", "development")
+
+from app import crud, schemas, tokens
+from app.database import Base, build_engine, build_async_engine, get_db, get_async_db
+from app.main import app
+from app.routes.auth import get_current_user
+
+
+@app.get("/bench/categories-sync", response_model=List[schemas.Category])
+def list_categories_sync(
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user)
+):
+    """Mesma consulta de GET /categories/, em rota síncrona"""
+    return crud.get_user_categories(db, user_id=current_user.id)
+
+
+def seed(session_factory, categories: int) -> str:
+    """Criar usuário com categorias. Retorna o token"""
+    db = session_factory()
+    try:
+        user = crud.create_user(db, schemas.UserCreate(username="bench", password="bench123"))
+        for i in range(categories):
+            crud.create_category(db, schemas.CategoryCreate(name=f"Categoria {i}"), user.id)
+        return tokens.create_access_token(user.id, user.username)
+    finally:
+        db.close()
+
+
+async def run(url: str, headers: dict, requests: int, concurrency: int):
+    """Disparar requests requisições com no máximo concurrency simultâneas"""
+    transport = httpx.ASGITransport(app=app)
+    limit = asyncio.Semaphore(concurrency)
+    timings = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one():
+            async with limit:
+                started = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                timings.append((time.perf_counter() - started) * 1000)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    timings.sort()
+    return requests / elapsed, statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+
+def main(requests: int, concurrency: int, latency_ms: float, threads: int):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    # Pool do tamanho da concorrência: o gargalo medido é o threadpool, não o pool
+    # (com pool menor que o threadpool, a rota síncrona pode travar esperando
+    # conexões que só voltam ao pool quando o get_db fecha, também no threadpool)
+    engine = build_engine(f"sqlite:///{path}", pool_size=concurrency)
+    async_engine = build_async_engine(f"sqlite+aiosqlite:///{path}", pool_size=concurrency)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    async_session_factory = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession
+    )
+    Base.metadata.create_all(bind=engine)
+    token = seed(session_factory, 20)
+
+    if latency_ms:
+        # Espera dentro do sqlite3, na thread que executa o comando: thread do
+        # threadpool (síncrona) ou a thread da conexão aiosqlite (assíncrona)
+        def network_latency(statement):
+            time.sleep(latency_ms / 1000)
+
+        def add_latency(dbapi_connection, connection_record):
+            if isinstance(dbapi_connection, sqlite3.Connection):
+                dbapi_connection.set_trace_callback(network_latency)
+            else:
+                driver = dbapi_connection.driver_connection
+                await_only(driver.set_trace_callback(network_latency))
+
+        event.listen(engine, "connect", add_latency)
+        event.listen(async_engine.sync_engine, "connect", add_latency)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def bench():
+        anyio.to_thread.current_default_thread_limiter().total_tokens = threads
+        results = []
+        for label, url in (("síncrona (threadpool)", "/bench/categories-sync"),
+                           ("assíncrona (AsyncSession)", "/categories/")):
+            await run(url, headers, concurrency, concurrency)  # aquecimento (abre as conexões)
+            results.append((label, *await run(url, headers, requests, concurrency)))
+        return results
+
+    print(f"{requests} requisições, {concurrency} simultâneas, "
+          f"latência simulada {latency_ms} ms/query, threadpool {threads}\n")
+    print(f"{'rota':<28} {'req/s':>8} {'mediana ms':>11} {'p99 ms':>8}")
+    for label, throughput, median, p99 in asyncio.run(bench()):
+        print(f"{label:<28} {throughput:>8.1f} {median:>11.2f} {p99:>8.2f}")
+
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de rotas síncronas x assíncronas")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+    main(args.requests, args.concurrency, args.latency_ms, args.threads)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark: custo da autenticação por requisição em GET /transactions/ e GET /accounts/.
+
+Compara o JWT assinado (sem ida ao banco para autorizar) com o esquema antigo
+token_{id}_{username}, que buscava o usuário no banco a cada requisição.
+Mostra latência e queries por requisição (X-Query-Count); --latency-ms simula
+a ida e volta até o banco.
+
+Uso:
+    python bench_auth_overhead.py [--runs 300] [--latency-ms 1]
+
+Usa um banco SQLite em memória próprio; não toca no finance.db.
+"""
+
+import argparse
+import os
+import statistics
+import time
+from datetime import date, timedelta
+
+from fastapi import Depends, Header, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Chave de desenvolvimento do tokens.py (o benchmark gera os próprios JWTs)
+os.environ.setdefault("ENVIRONMENT", "development")
+
+from app import crud, models, schemas, tokens
+from app.database import Base, get_db
+from app.main import app
+from app.routes.auth import get_current_user
+
+ENDPOINTS = ["/transactions/?limit=20", "/accounts/"]
+
+
+def legacy_current_user(authorization: str = Header(None), db: Session = Depends(get_db)):
+    """Esquema antigo: Bearer token_{id}_{username} + busca do usuário no banco"""
+    try:
+        user_id = int(authorization.split(" ")[1].split("_")[1])
+    except (AttributeError, IndexError, ValueError):
+        raise HTTPException(status_code=401, detail="Token inválido")
+    row = db.query(models.User.id, models.User.username).filter(
+        models.User.id == user_id
+    ).first()
+    if not row:
+        raise HTTPException(status_code=401, detail="Usuário não encontrado")
+    return schemas.Principal(id=row.id, username=row.username)
+
+
+def seed(session_factory, rows: int):
+    """Criar usuário com conta, categoria e transações. Retorna o usuário"""
+    db = session_factory()
+    try:
+        user = crud.create_user(db, schemas.UserCreate(username="bench", password="bench123"))
+        category = crud.create_category(db, schemas.CategoryCreate(name="Mercado"), user.id)
+        account = crud.create_account(db, schemas.AccountCreate(
+            name="Conta Corrente", account_type="checking", initial_balance=1000.0
+        ), user.id)
+        crud.bulk_create_transactions(db, [schemas.TransactionCreate(
+            amount=-(10.0 + i), date=date(2025, 1, 1) + timedelta(days=i % 365),
+            description=f"Compra {i}", transaction_type="expense",
+            category_id=category.id, account_id=account.id
+        ) for i in range(rows)], user.id)
+        return user.id, user.username
+    finally:
+        db.close()
+
+
+def main(runs: int, latency_ms: float):
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    user_id, username = seed(session_factory, 200)
+
+    if latency_ms:
+        @event.listens_for(engine, "before_cursor_execute")
+        def network_latency(*args):
+            time.sleep(latency_ms / 1000)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+
+    jwt_headers = {"Authorization": f"Bearer {tokens.create_access_token(user_id, username)}"}
+    legacy_headers = {"Authorization": f"Bearer token_{user_id}_{username}"}
+    variants = [
+        ("antigo (busca no banco)", legacy_headers, True),
+        ("JWT assinado", jwt_headers, False),
+    ]
+
+    print(f"{runs} requisições por variante, latência simulada {latency_ms} ms/query\n")
+    print(f"{'endpoint':<26} {'autenticação':<36} {'média ms':>9} {'p95 ms':>8} {'queries':>8}")
+    for url in ENDPOINTS:
+        for label, headers, legacy in variants:
+            if legacy:
+                app.dependency_overrides[get_current_user] = legacy_current_user
+            else:
+                app.dependency_overrides.pop(get_current_user, None)
+            client.get(url, headers=headers).raise_for_status()  # aquecimento
+            timings, queries = [], []
+            for _ in range(runs):
+                started = time.perf_counter()
+                response = client.get(url, headers=headers)
+                timings.append((time.perf_counter() - started) * 1000)
+                queries.append(int(response.headers["X-Query-Count"]))
+            p95 = sorted(timings)[int(len(timings) * 0.95) - 1]
+            print(f"{url:<26} {label:<36} {statistics.mean(timings):>9.2f} "
+                  f"{p95:>8.2f} {statistics.mean(queries):>8.1f}")
+
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do custo de autenticação")
+    parser.add_argument("--runs", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+    main(args.runs, args.latency_ms)
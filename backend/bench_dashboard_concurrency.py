@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latência de rotas não relacionadas enquanto dashboards carregam.
+
+Mantém --dashboards requisições de dashboard em andamento o tempo todo e mede
+a latência (mediana e p99) de GET /health/db, que não toca no banco. Compara:
+
+- bloqueante: async def chamando o crud síncrono (forma antiga do /dashboard),
+  que segura o event loop durante cada query;
+- GET /dashboard atual: AsyncSession + crud_async, o loop segue livre.
+
+Com --latency-ms cada query espera esse tempo (ida e volta até o banco).
+
+Uso:
+    python bench_dashboard_concurrency.py [--dashboards 10] [--probes 200] [--latency-ms 20]
+
+Usa um banco SQLite temporário próprio; não toca no finance.db.
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import httpx
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.util import await_only
+
+# Chave de desenvolvimento do tokens.py (o benchmark gera os próprios JWTs)
+os.environ.setdefault("ENVIRONMENT", "development")
+
+from app import crud, schemas, tokens
+from app.database import Base, build_engine, build_async_engine, get_db, get_async_db
+from app.main import app
+from app.routes.auth import get_current_user
+
+
+@app.get("/bench/dashboard-blocking")
+async def dashboard_blocking(
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user)
+):
+    """Forma antiga: async def com query síncrona dentro do event loop"""
+    summary = crud.get_user_summary(db, current_user.id)
+    return {"total_transactions": summary.total_transactions}
+
+
+def seed(session_factory, rows: int) -> str:
+    """Criar usuário com conta, categoria e transações. Retorna o token"""
+    db = session_factory()
+    try:
+        user = crud.create_user(db, schemas.UserCreate(username="bench", password="bench123"))
+        category = crud.create_category(db, schemas.CategoryCreate(name="Mercado"), user.id)
+        account = crud.create_account(db, schemas.AccountCreate(
+            name="Conta Corrente", account_type="checking", initial_balance=1000.0
+        ), user.id)
+        crud.bulk_create_transactions(db, [schemas.TransactionCreate(
+            amount=-(10.0 + i), date="2025-01-01", description=f"Compra {i}",
+            transaction_type="expense", category_id=category.id, account_id=account.id
+        ) for i in range(rows)], user.id)
+        return tokens.create_access_token(user.id, user.username)
+    finally:
+        db.close()
+
+
+async def measure(client, dashboard_url: str, headers: dict, dashboards: int, probes: int):
+    """Latências (ms) de /health/db com dashboards carregando em paralelo"""
+    stop = asyncio.Event()
+
+    async def load_dashboards():
+        while not stop.is_set():
+            (await client.get(dashboard_url, headers=headers)).raise_for_status()
+
+    loaders = [asyncio.create_task(load_dashboards()) for _ in range(dashboards)]
+    await asyncio.sleep(0.1)
+    timings = []
+    for _ in range(probes):
+        started = time.perf_counter()
+        (await client.get("/health/db")).raise_for_status()
+        timings.append((time.perf_counter() - started) * 1000)
+    stop.set()
+    await asyncio.gather(*loaders)
+
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+
+def main(dashboards: int, probes: int, latency_ms: float):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = build_engine(f"sqlite:///{path}", pool_size=dashboards)
+    async_engine = build_async_engine(f"sqlite+aiosqlite:///{path}", pool_size=dashboards)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    async_session_factory = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession
+    )
+    Base.metadata.create_all(bind=engine)
+    token = seed(session_factory, 1000)
+
+    if latency_ms:
+        # Espera dentro do sqlite3, na thread que executa o comando
+        def network_latency(statement):
+            time.sleep(latency_ms / 1000)
+
+        def add_latency(dbapi_connection, connection_record):
+            if isinstance(dbapi_connection, sqlite3.Connection):
+                dbapi_connection.set_trace_callback(network_latency)
+            else:
+                driver = dbapi_connection.driver_connection
+                await_only(driver.set_trace_callback(network_latency))
+
+        event.listen(engine, "connect", add_latency)
+        event.listen(async_engine.sync_engine, "connect", add_latency)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def bench():
+        transport = httpx.ASGITransport(app=app)
+        results = []
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            idle = await measure(client, "/health/db", headers, 0, probes)
+            results.append(("sem dashboards", *idle))
+            for label, url in (("dashboard bloqueante", "/bench/dashboard-blocking"),
+                               ("GET /dashboard (async)", "/dashboard")):
+                results.append((label, *await measure(client, url, headers, dashboards, probes)))
+        return results
+
+    print(f"GET /health/db com {dashboards} dashboards em paralelo, "
+          f"latência simulada {latency_ms} ms/query ({probes} medições)\n")
+    print(f"{'cenário':<26} {'mediana ms':>11} {'p99 ms':>8}")
+    for label, median, p99 in asyncio.run(bench()):
+        print(f"{label:<26} {median:>11.2f} {p99:>8.2f}")
+
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de concorrência do dashboard")
+    parser.add_argument("--dashboards", type=int, default=10)
+    parser.add_argument("--probes", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    main(args.dashboards, args.probes, args.latency_ms)
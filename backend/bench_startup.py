@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: custo de inicialização de um worker (cold start).
+
+Cada medição roda num processo novo e separa:
+- import: `import app.main` (o que cada worker do uvicorn e cada sessão de
+  testes pagam);
+- startup: o lifespan até o servidor aceitar requisições.
+
+O banco é um SQLite temporário já inicializado (caso comum: o esquema está
+em dia). Com --importtime lista os módulos mais caros (python -X importtime).
+
+Uso:
+    python bench_startup.py [--runs 10] [--importtime]
+
+Não toca no finance.db.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = """
+import time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(app.main.app)
+ready = time.perf_counter()
+with client:
+    up = time.perf_counter()
+print("BENCH", imported - started, up - ready)
+"""
+
+
+def run_child(env: dict, *python_args) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *python_args, "-c", CHILD],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+
+
+def measure(env: dict) -> tuple:
+    """(import ms, startup ms) de um processo novo"""
+    for line in run_child(env).stdout.splitlines():
+        if line.startswith("BENCH"):
+            _, imported, started = line.split()
+            return float(imported) * 1000, float(started) * 1000
+    raise RuntimeError("processo filho não reportou tempos")
+
+
+def show_importtime(env: dict, top: int = 15):
+    """Módulos com maior tempo acumulado de import"""
+    rows = []
+    for line in run_child(env, "-X", "importtime").stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        rows.append((int(cumulative), module.strip()))
+    print(f"\n{'módulo':<40} {'acumulado ms':>13}")
+    for cumulative, module in sorted(rows, reverse=True)[:top]:
+        print(f"{module:<40} {cumulative / 1000:>13.1f}")
+
+
+def main(runs: int, importtime: bool):
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    env = {"ENVIRONMENT": "development", **os.environ, "DATABASE_URL": f"sqlite:///{path}"}
+    measure(env)  # inicializa o banco; não entra na conta
+
+    imports, startups = [], []
+    for _ in range(runs):
+        imported, started = measure(env)
+        imports.append(imported)
+        startups.append(started)
+
+    print(f"{runs} processos, banco com esquema em dia\n")
+    print(f"{'fase':<10} {'mediana ms':>11} {'mín ms':>8} {'máx ms':>8}")
+    for label, timings in (("import", imports), ("startup", startups)):
+        print(f"{label:<10} {statistics.median(timings):>11.1f} "
+              f"{min(timings):>8.1f} {max(timings):>8.1f}")
+
+    if importtime:
+        show_importtime(env)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--importtime", action="store_true")
+    args = parser.parse_args()
+    main(args.runs, args.importtime)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: tamanho e latência da listagem de transações (GET /transactions/).
+
+Compara a listagem compacta (apenas IDs) com as variantes expandidas,
+incluindo a forma antiga com category, account e user completos em cada item.
+
+Uso:
+    python bench_transaction_payload.py [--rows 100] [--runs 50]
+
+Usa um banco SQLite em memória próprio; não toca no finance.db.
+"""
+
+import argparse
+import os
+import statistics
+import time
+from datetime import date, timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Chave de desenvolvimento do tokens.py (o benchmark gera os próprios JWTs)
+os.environ.setdefault("ENVIRONMENT", "development")
+
+from app import crud, schemas, tokens
+from app.database import Base, get_db
+from app.main import app
+
+VARIANTS = [
+    ("compacta (padrão)", ""),
+    ("expand=category", "&expand=category"),
+    ("expand=category,account,user (formato antigo)", "&expand=category,account,user"),
+]
+
+
+def seed(session_factory, rows: int) -> str:
+    """Criar usuário com perfil completo, conta, categoria e transações. Retorna o token"""
+    db = session_factory()
+    try:
+        user = crud.create_user(db, schemas.UserCreate(
+            username="bench", password="bench123",
+            email="bench@example.com", full_name="Usuário Benchmark"
+        ))
+        crud.update_user_profile(db, user.id, schemas.UserUpdate(
+            cpf="12345678901", phone="11999999999",
+            address="Rua das Transações, 100 - São Paulo/SP"
+        ))
+        category = crud.create_category(
+            db, schemas.CategoryCreate(name="Mercado", icon="🛒"), user.id
+        )
+        account = crud.create_account(db, schemas.AccountCreate(
+            name="Conta Corrente", account_type="checking", initial_balance=1000.0
+        ), user.id)
+
+        start = date(2025, 1, 1)
+        for i in range(rows):
+            crud.create_transaction(db, schemas.TransactionCreate(
+                amount=-(10.0 + i), date=start + timedelta(days=i % 365),
+                description=f"Compra {i}", transaction_type="expense",
+                category_id=category.id, account_id=account.id
+            ), user.id)
+        return tokens.create_access_token(user.id, user.username)
+    finally:
+        db.close()
+
+
+def main(rows: int, runs: int):
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    token = seed(session_factory, rows)
+    client = TestClient(app)
+    headers = {"Authorization": f"Bearer {token}"}
+
+    print(f"GET /transactions/?limit={rows} ({runs} execuções por variante)\n")
+    print(f"{'variante':<48} {'bytes':>9} {'média ms':>9} {'p95 ms':>8}")
+    for label, query in VARIANTS:
+        url = f"/transactions/?limit={rows}{query}"
+        client.get(url, headers=headers)  # aquecimento
+        timings = []
+        size = 0
+        for _ in range(runs):
+            started = time.perf_counter()
+            response = client.get(url, headers=headers)
+            timings.append((time.perf_counter() - started) * 1000)
+            size = len(response.content)
+        p95 = sorted(timings)[int(len(timings) * 0.95) - 1]
+        print(f"{label:<48} {size:>9} {statistics.mean(timings):>9.2f} {p95:>8.2f}")
+
+    app.dependency_overrides.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da listagem de transações")
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+    main(args.rows, args.runs)
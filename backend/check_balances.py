@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Script para verificar (e opcionalmente corrigir) o saldo de todas as contas.
+
+Percorre as contas de todos os usuários em lotes ordenados por id; cada lote
+é uma única query (initial_balance + SUM(amount) com GROUP BY) numa transação
+curta. Entre os lotes o script grava um checkpoint com o último id visto e
+dorme --pause segundos, para não disputar o banco com o tráfego da API.
+Interrompido (Ctrl+C, deploy, --max-chunks), retoma do checkpoint na próxima
+execução; ao terminar a varredura o checkpoint é removido.
+
+Uso:
+    python check_balances.py                    # apenas verifica
+    python check_balances.py --repair           # corrige as contas divergentes
+    python check_balances.py --chunk-size 1000 --pause 0.2
+    python check_balances.py --max-chunks 50    # para depois de 50 lotes
+    python check_balances.py --restart          # ignora o checkpoint
+
+Sem --repair sai com código 1 se houver alguma divergência.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from app import crud
+from app.database import SessionLocal
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CHECKPOINT = os.path.join(BACKEND_DIR, "check_balances.checkpoint.json")
+
+
+def load_checkpoint(path: str) -> dict:
+    """Progresso da última execução interrompida (vazio = começar do início)"""
+    try:
+        with open(path) as checkpoint_file:
+            return json.load(checkpoint_file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_checkpoint(path: str, state: dict):
+    """Gravar o progresso de forma atômica (arquivo temporário + rename)"""
+    temporary = f"{path}.tmp"
+    with open(temporary, "w") as checkpoint_file:
+        json.dump(state, checkpoint_file)
+    os.replace(temporary, path)
+
+
+def check_balances(repair: bool = False, chunk_size: int = 500, pause: float = 0.5,
+                   checkpoint: str = DEFAULT_CHECKPOINT, max_chunks: int = None,
+                   session_factory=SessionLocal) -> dict:
+    """
+    Verificar as contas a partir do checkpoint. Retorna o estado final:
+    last_id, checked, drift, repaired e finished.
+    """
+    state = {"last_id": 0, "checked": 0, "drift": 0, "repaired": 0,
+             **load_checkpoint(checkpoint)}
+    if state["last_id"]:
+        print(f"Retomando a partir da conta {state['last_id']} "
+              f"({state['checked']} ja verificada(s))")
+
+    chunks = 0
+    while True:
+        db = session_factory()
+        try:
+            audits = crud.audit_accounts_chunk(db, state["last_id"], chunk_size)
+            db.rollback()  # encerra a transação de leitura antes da pausa
+
+            drifted = [audit for audit in audits if not audit["is_consistent"]]
+            for audit in drifted:
+                print(f"  [DIFF] Conta {audit['account_id']}: "
+                      f"saldo={audit['current_balance']} "
+                      f"calculado={audit['calculated_balance']} "
+                      f"diferenca={audit['difference']}")
+            if repair and drifted:
+                corrections = crud.recalculate_accounts(
+                    db, [audit["account_id"] for audit in drifted]
+                )
+                state["repaired"] += len(corrections)
+        finally:
+            db.close()
+
+        if not audits:
+            break
+        state["last_id"] = audits[-1]["account_id"]
+        state["checked"] += len(audits)
+        state["drift"] += len(drifted)
+        save_checkpoint(checkpoint, state)
+        chunks += 1
+
+        if len(audits) < chunk_size:
+            break
+        if max_chunks is not None and chunks >= max_chunks:
+            print(f"Interrompido apos {chunks} lote(s); checkpoint em {checkpoint}")
+            return {**state, "finished": False}
+        time.sleep(pause)
+
+    if os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    print(f"Verificacao concluida: {state['checked']} conta(s), "
+          f"{state['drift']} divergente(s), {state['repaired']} corrigida(s)")
+    return {**state, "finished": True}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verificar saldos de todas as contas")
+    parser.add_argument("--repair", action="store_true", help="corrigir contas divergentes")
+    parser.add_argument("--chunk-size", type=int, default=500, help="contas por lote")
+    parser.add_argument("--pause", type=float, default=0.5, help="segundos entre lotes")
+    parser.add_argument("--max-chunks", type=int, help="parar depois de N lotes")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="arquivo de progresso")
+    parser.add_argument("--restart", action="store_true", help="ignorar o checkpoint")
+    args = parser.parse_args()
+
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+    result = check_balances(
+        repair=args.repair, chunk_size=args.chunk_size, pause=args.pause,
+        checkpoint=args.checkpoint, max_chunks=args.max_chunks
+    )
+    if not args.repair and result["drift"]:
+        sys.exit(1)
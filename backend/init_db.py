@@ -1,30 +1,70 @@
-# Script para inicializar o banco de dados SQLite
-from app.database import engine, Base
+#!/usr/bin/env python3
+"""
+Inicialização do banco, uma vez por deploy (antes de subir o servidor):
+aplica as migrações pendentes e cria o usuário padrão se não houver nenhum.
+
+Uso:
+    python init_db.py            # migrações + usuário padrão
+    python init_db.py --no-seed  # apenas migrações
+
+O servidor não cria tabelas nem usuários ao importar/subir; com
+DB_AUTO_MIGRATE=false ele só confere a versão do esquema.
+"""
+
+import argparse
 import os
 import sys
 import traceback
 
 sys.path.insert(0, os.path.dirname(__file__))
 
-from app import models  # noqa: F401
+from app import migrations  # noqa: E402
+from app.database import engine, SessionLocal  # noqa: E402
+from app.models import User  # noqa: E402
+from app.utils import hash_password  # noqa: E402
 
 
-def init_db():
-    """Criar todas as tabelas no banco de dados"""
+def init_default_users():
+    """Criar usuário padrão se nenhum usuário existir no banco"""
+    db = SessionLocal()
+    try:
+        if db.query(User.id).first() is None:
+            print("Criando usuário padrão...")
+            db.add(User(
+                username='bruno',
+                hashed_password=hash_password('123456'),
+                email='bruno@example.com',
+                full_name='Bruno'
+            ))
+            db.commit()
+            print("Usuario padrao 'bruno' criado com sucesso")
+        else:
+            print("Banco de dados ja contem usuarios")
+    finally:
+        db.close()
+
+
+def init_db(seed: bool = True):
+    """Aplicar migrações (e criar o usuário padrão)"""
     print("[INFO] Iniciando banco de dados...")
 
     try:
-        # Criar todas as tabelas
-        Base.metadata.create_all(bind=engine)
-        print("[OK] Banco de dados criado com sucesso!")
-        print("[OK] Arquivo: finance.db (na pasta backend/)")
+        applied = migrations.upgrade(engine)
+        print(f"[OK] Esquema na versao {migrations.LATEST_VERSION} "
+              f"({len(applied)} migracao(oes) aplicada(s))")
+        if seed:
+            init_default_users()
         return True
     except Exception as e:
-        print(f"[ERRO] Falha ao criar banco de dados: {e}")
+        print(f"[ERRO] Falha ao inicializar banco de dados: {e}")
         traceback.print_exc()
         return False
 
 
 if __name__ == "__main__":
-    success = init_db()
+    parser = argparse.ArgumentParser(description="Inicializar o banco de dados")
+    parser.add_argument("--no-seed", action="store_true", help="não criar o usuário padrão")
+    args = parser.parse_args()
+
+    success = init_db(seed=not args.no_seed)
     sys.exit(0 if success else 1)
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Script para aplicar as migrações versionadas do banco (app/migrations.py).
+
+Uso:
+    python migrate.py            # aplica as migrações pendentes
+    python migrate.py --status   # mostra a versão atual e o que está pendente
+
+Substitui add_indexes.py, migrate_accounts.py e migrate_user_fields.py.
+Pode rodar a cada deploy: com o esquema em dia não executa nenhum DDL.
+"""
+
+import argparse
+import sys
+
+from app import migrations
+from app.database import engine
+
+
+def show_status() -> int:
+    """Listar versão atual e migrações pendentes. Retorna nº de pendentes"""
+    with engine.connect() as conn:
+        version = migrations.current_version(conn)
+        pending = migrations.pending_migrations(conn)
+    print(f"Versao do esquema: {version} (ultima: {migrations.LATEST_VERSION})")
+    for migration in pending:
+        print(f"  [PENDENTE] {migration.version:03d} {migration.name}")
+    return len(pending)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aplicar migrações do banco de dados")
+    parser.add_argument("--status", action="store_true", help="apenas mostrar a versão atual")
+    args = parser.parse_args()
+
+    if args.status:
+        show_status()
+        sys.exit(0)
+
+    applied = migrations.upgrade(engine)
+    if applied:
+        print(f"Migracoes aplicadas: {len(applied)} (versao {migrations.LATEST_VERSION})")
+    else:
+        print(f"Esquema em dia (versao {migrations.LATEST_VERSION})")
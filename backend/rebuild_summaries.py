@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Script para recalcular do zero os agregados materializados por usuário:
+resumo do dashboard (user_summaries), rollup mensal (transaction_monthly_totals)
+e sugestões de descrição (description_suggestions).
+
+Uso:
+    python rebuild_summaries.py           # recalcula e grava todos os resumos
+    python rebuild_summaries.py --check   # apenas verifica, sem gravar
+
+Em ambos os modos compara o resumo armazenado com o valor calculado a partir
+das tabelas de origem e lista as divergências. No modo --check o script sai
+com código 1 se houver alguma divergência.
+
+O esquema vem das migrações versionadas (app/migrations.py): o recálculo aplica
+as pendentes antes de começar; o --check, que não grava, se recusa a rodar com
+o esquema atrasado.
+"""
+
+import argparse
+import sys
+
+from app import crud, migrations, models
+from app.database import SessionLocal, engine
+
+
+def rebuild_summaries(check_only: bool = False) -> int:
+    """Recalcular (ou verificar) o resumo de todos os usuários. Retorna nº de divergências"""
+    if check_only:
+        with engine.connect() as conn:
+            version = migrations.current_version(conn)
+        if version < migrations.LATEST_VERSION:
+            print(f"[ERRO] Esquema na versao {version}, esperada {migrations.LATEST_VERSION}: "
+                  "execute python init_db.py")
+            return -1
+    else:
+        migrations.upgrade(engine)
+    db = SessionLocal()
+    mismatches = 0
+
+    try:
+        user_ids = [row.id for row in db.query(models.User.id).order_by(models.User.id)]
+        print(f"Verificando resumo de {len(user_ids)} usuario(s)...")
+
+        for user_id in user_ids:
+            values = crud.compute_user_summary(db, user_id)
+            summary = db.get(models.UserSummary, user_id)
+
+            if summary is None:
+                print(f"  [MISSING] Usuario {user_id}: resumo ainda nao materializado")
+                mismatches += 1
+            else:
+                differences = crud.diff_user_summary(summary, values)
+                if differences:
+                    mismatches += 1
+                    for field, (stored, expected) in differences.items():
+                        print(f"  [DIFF] Usuario {user_id}: {field} armazenado={stored} calculado={expected}")
+
+                monthly_differences = crud.diff_monthly_totals(
+                    db, user_id, crud.compute_monthly_totals(db, user_id)
+                )
+                if monthly_differences:
+                    mismatches += 1
+                    for year_month, category_id, transaction_type in monthly_differences:
+                        print(f"  [DIFF] Usuario {user_id}: rollup {year_month} "
+                              f"categoria={category_id} tipo={transaction_type}")
+
+                suggestion_differences = crud.diff_description_suggestions(
+                    db, user_id, crud.compute_description_suggestions(db, user_id)
+                )
+                if suggestion_differences:
+                    mismatches += 1
+                    for transaction_type, category_id, description in suggestion_differences:
+                        print(f"  [DIFF] Usuario {user_id}: sugestao {description!r} "
+                              f"categoria={category_id} tipo={transaction_type}")
+
+            if not check_only:
+                totals = crud.rebuild_monthly_totals(db, user_id)
+                suggestions = crud.rebuild_description_suggestions(db, user_id)
+                rebuilt = crud.rebuild_user_summary(db, user_id)
+                # Conferir que o valor gravado bate com o cálculo do zero
+                if crud.diff_user_summary(rebuilt, crud.compute_user_summary(db, user_id)) \
+                        or crud.diff_monthly_totals(db, user_id, totals) \
+                        or crud.diff_description_suggestions(db, user_id, suggestions):
+                    print(f"  [ERRO] Usuario {user_id}: agregados divergem apos recalculo")
+                    return -1
+
+        if check_only:
+            print(f"Verificacao concluida: {mismatches} resumo(s) divergente(s)")
+        else:
+            print(f"Resumos recalculados: {len(user_ids)} ({mismatches} corrigido(s))")
+        return mismatches
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recalcular agregados materializados")
+    parser.add_argument("--check", action="store_true", help="apenas verificar, sem gravar")
+    args = parser.parse_args()
+
+    result = rebuild_summaries(check_only=args.check)
+    if result < 0 or (args.check and result > 0):
+        sys.exit(1)
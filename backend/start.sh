@@ -19,7 +19,7 @@ fi
 
 echo ""
 echo "🔄 Executando migrações do banco de dados..."
-python migrate_user_fields.py || echo "⚠️  Migrações podem já ter sido executadas"
+python init_db.py
 echo ""
 
 echo "🌐 Iniciando servidor na rede (0.0.0.0:8000)..."
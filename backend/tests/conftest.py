@@ -1,25 +1,45 @@
 """Configuração pytest - Fixtures e setup global"""
 
+import os
+import tempfile
+
 import pytest
-from sqlalchemy import create_engine
+
+# Antes de importar o app: tokens.py só aceita a chave fixa de desenvolvimento
+# com ENVIRONMENT em development/test
+os.environ.setdefault("ENVIRONMENT", "test")
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 from sqlalchemy.orm import sessionmaker, Session
 from fastapi.testclient import TestClient
 
-from app.database import Base, get_db
+from app import crud
+from app.hashing import password_hasher
+from app.ratelimit import login_throttle
+from app.database import Base, get_db, get_async_db, build_engine
 from app.main import app
 
 
-# Usar banco de dados em memória para testes
-SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///:memory:"
+# Banco SQLite em arquivo temporário: as rotas síncronas (get_db) e as
+# assíncronas (get_async_db, aiosqlite) precisam enxergar os mesmos dados
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+SQLALCHEMY_TEST_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
+
+engine = build_engine(SQLALCHEMY_TEST_DATABASE_URL)
 
-engine = create_engine(
-    SQLALCHEMY_TEST_DATABASE_URL,
-    connect_args={"check_same_thread": False},
+# NullPool: o TestClient abre um event loop por requisição e conexões
+# aiosqlite não podem ser reaproveitadas entre loops
+async_engine = create_async_engine(
+    f"sqlite+aiosqlite:///{TEST_DB_PATH}", poolclass=NullPool
 )
 
 TestingSessionLocal = sessionmaker(
     autocommit=False, autoflush=False, bind=engine
 )
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession
+)
 
 
 def override_get_db():
@@ -31,10 +51,29 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    """Override da dependency get_async_db para usar banco de teste"""
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture(scope="session", autouse=True)
+def shutdown_password_hasher():
+    """Encerrar os processos do pool de hash ao fim da sessão de testes"""
+    yield
+    password_hasher.shutdown()
+
+
 @pytest.fixture(scope="function")
 def db() -> Session:
     """Fixture do banco de dados para cada teste"""
     Base.metadata.create_all(bind=engine)
+    # IDs se repetem entre testes: caches em memória não podem sobreviver ao banco
+    crud.popular_descriptions_cache.clear()
+    crud.popular_account_names.clear()
+    crud.popular_category_names.clear()
+    crud.token_revocations.clear()
+    login_throttle.clear()
     yield TestingSessionLocal()
     Base.metadata.drop_all(bind=engine)
 
@@ -43,6 +82,7 @@ def db() -> Session:
 def client(db: Session) -> TestClient:
     """Fixture do cliente HTTP para testes"""
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     return TestClient(app)
 
 
@@ -58,9 +98,13 @@ def test_user(client: TestClient):
 
 
 @pytest.fixture(scope="function")
-def auth_headers(test_user) -> dict:
+def auth_headers(client: TestClient, test_user) -> dict:
     """Fixture para headers de autenticação"""
-    return {"Authorization": f"Bearer {test_user['token']}"}
+    response = client.post("/auth/login", json={
+        "username": "testuser",
+        "password": "testpass123"
+    })
+    return {"Authorization": f"Bearer {response.json()['token']}"}
 
 
 @pytest.fixture(scope="function")
@@ -122,9 +166,13 @@ def other_user(client: TestClient):
 
 
 @pytest.fixture(scope="function")
-def other_user_headers(other_user) -> dict:
+def other_user_headers(client: TestClient, other_user) -> dict:
     """Fixture para headers de autenticação do outro usuário"""
-    return {"Authorization": f"Bearer {other_user['token']}"}
+    response = client.post("/auth/login", json={
+        "username": "otheruser",
+        "password": "otherpass123"
+    })
+    return {"Authorization": f"Bearer {response.json()['token']}"}
 
 
 @pytest.fixture(scope="function")
@@ -1,7 +1,13 @@
 """Testes para endpoints de contas"""
 
+from concurrent.futures import ThreadPoolExecutor
+
 from fastapi.testclient import TestClient
 import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, schemas
+from app.query_counter import count_queries
 
 
 class TestAccounts:
@@ -213,6 +219,27 @@ class TestAccountSuggestions:
         # Não deve conter a conta do próprio usuário
         assert unique_name not in data
 
+    def test_account_suggestions_subtracts_own_names_from_cache(
+        self, client: TestClient, auth_headers, other_user_headers
+    ):
+        """Teste: top global vem do cache e os nomes do usuário são removidos na leitura"""
+        for name in ("Nubank", "Inter", "Itaú"):
+            client.post("/accounts/", json={"name": name, "account_type": "checking"},
+                        headers=other_user_headers)
+
+        first = client.get("/accounts/suggestions", headers=auth_headers).json()
+        assert set(first) >= {"Nubank", "Inter", "Itaú"}
+
+        # Conta criada depois do cache carregado também é removida (sem diferenciar caixa)
+        client.post("/accounts/", json={"name": "NUBANK", "account_type": "checking"},
+                    headers=auth_headers)
+        with count_queries() as counter:
+            second = client.get("/accounts/suggestions", headers=auth_headers).json()
+
+        assert "Nubank" not in second
+        assert "Inter" in second
+        assert not any("GROUP BY" in s for s in counter.statements)
+
 
 class TestAccountAudit:
     """Testes para auditoria de contas"""
@@ -281,6 +308,111 @@ class TestAccountAudit:
             assert "is_consistent" in audit
             assert "difference" in audit
 
+    def test_audit_all_accounts_single_query(
+        self, client: TestClient, db, auth_headers, test_user, test_account_with_transactions
+    ):
+        """Teste: auditoria de todas as contas roda em uma query, com contas vazias"""
+        client.post("/accounts/", json={"name": "Poupança", "account_type": "savings",
+                                        "initial_balance": 300.0}, headers=auth_headers)
+
+        with count_queries() as counter:
+            audits = crud.audit_all_user_accounts(db, test_user["id"])
+
+        assert counter.count == 1
+        assert [audit["total_transactions"] for audit in audits] == [3, 0]
+        assert all(audit["is_consistent"] for audit in audits)
+
+    def test_recalculate_all_accounts(
+        self, client: TestClient, db, auth_headers, test_account_with_transactions
+    ):
+        """Teste: recálculo em lote corrige só as contas inconsistentes e o resumo"""
+        from sqlalchemy import text
+
+        account_id = test_account_with_transactions["id"]
+        other = client.post("/accounts/", json={"name": "Poupança", "account_type": "savings",
+                                                "initial_balance": 300.0},
+                            headers=auth_headers).json()
+        expected = crud.audit_account_balance(db, account_id)["calculated_balance"]
+        db.execute(text("UPDATE accounts SET balance = balance + 1234 WHERE id = :id"),
+                   {"id": account_id})
+        db.commit()
+
+        response = client.post("/accounts/recalculate/all", headers=auth_headers)
+
+        assert response.status_code == 200
+        corrections = response.json()
+        assert [c["account_id"] for c in corrections] == [account_id]
+        assert corrections[0]["balance_after"] == float(expected)
+        assert corrections[0]["balance_before"] == float(expected) + 12.34
+        audits = client.get("/accounts/audit/all", headers=auth_headers).json()
+        assert all(audit["is_consistent"] for audit in audits)
+        assert client.get(f"/accounts/{other['id']}", headers=auth_headers).json()["balance"] == 300.0
+        assert client.post("/accounts/recalculate/all", headers=auth_headers).json() == []
+
+    def test_audit_chunks_and_repair_across_users(
+        self, client: TestClient, db, auth_headers, test_account_with_transactions,
+        other_user_account
+    ):
+        """Teste: auditoria em lotes por id cobre todos os usuários e o reparo corrige a deriva"""
+        from sqlalchemy import text
+
+        ids = [test_account_with_transactions["id"], other_user_account["id"]]
+        db.execute(text("UPDATE accounts SET balance = balance - 500"))
+        db.commit()
+
+        first = crud.audit_accounts_chunk(db, after_id=0, limit=1)
+        second = crud.audit_accounts_chunk(db, after_id=first[-1]["account_id"], limit=1)
+        assert [audit["account_id"] for audit in first + second] == ids
+        assert crud.audit_accounts_chunk(db, after_id=ids[-1], limit=1) == []
+        assert not any(audit["is_consistent"] for audit in first + second)
+
+        corrections = crud.recalculate_accounts(db, ids)
+
+        assert [c["account_id"] for c in corrections] == ids
+        assert all(audit["is_consistent"] for audit in crud.audit_accounts_chunk(db))
+        assert crud.recalculate_accounts(db, ids) == []
+
+    def test_concurrent_transactions_keep_audit_consistent(
+        self, client: TestClient, db, auth_headers, test_user,
+        test_account_with_transactions, test_category
+    ):
+        """Teste: lançamentos simultâneos não perdem atualizações de saldo nem do resumo"""
+        session_factory = sessionmaker(autoflush=False, bind=db.get_bind())
+        account_id = test_account_with_transactions["id"]
+        crud.get_user_summary(db, test_user["id"])  # Resumo materializado antes da carga
+
+        def post(worker):
+            session = session_factory()
+            try:
+                for i in range(20):
+                    created = crud.create_transaction(session, schemas.TransactionCreate(
+                        amount=-(worker + i + 1.0), date="2025-11-22",
+                        description=f"Compra {worker}-{i}", transaction_type="expense",
+                        category_id=test_category["id"], account_id=account_id
+                    ), test_user["id"])
+                    if i % 4 == 1:
+                        crud.update_transaction(session, created.id, schemas.TransactionCreate(
+                            amount=-1.0, date="2025-11-22", description=created.description,
+                            transaction_type="expense", category_id=test_category["id"],
+                            account_id=account_id
+                        ))
+                    elif i % 4 == 2:
+                        crud.delete_transaction(session, created.id)
+            finally:
+                session.close()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(post, range(8)))
+
+        audit = crud.audit_account_balance(db, account_id)
+        assert audit["is_consistent"] is True
+        assert audit["total_transactions"] == 3 + 8 * 15
+        assert audit["current_balance"] == pytest.approx(audit["calculated_balance"])
+        expected = crud.compute_user_summary(db, test_user["id"])
+        dashboard = client.get("/dashboard", headers=auth_headers).json()
+        for field in ("total_balance", "total_income", "total_expense", "total_transactions"):
+            assert dashboard[field] == float(expected[field]), field
+
     def test_audit_nonexistent_account(self, client: TestClient, auth_headers):
         """Teste: erro ao auditar conta inexistente"""
         response = client.get(
@@ -1,6 +1,16 @@
 """Testes para endpoints de autenticação"""
 
+import hashlib
+import os
+
 from fastapi.testclient import TestClient
+from jose import jwt
+import pytest
+from sqlalchemy import event
+
+from app import crud, tokens, utils
+from app.hashing import password_hasher
+from app.main import app
 
 
 class TestAuth:
@@ -63,3 +73,196 @@ class TestAuth:
 
         assert response.status_code == 401
         assert "inválidos" in response.json()["detail"]
+
+class TestTokenPrincipal:
+    """Testes para o usuário autenticado vindo das claims do JWT"""
+
+    def _count_user_selects(self, db, action):
+        statements = []
+
+        def before_execute(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement:
+                statements.append(statement)
+
+        engine = db.get_bind()
+        event.listen(engine, "before_cursor_execute", before_execute)
+        try:
+            action()
+        finally:
+            event.remove(engine, "before_cursor_execute", before_execute)
+        return statements
+
+    def test_authenticated_requests_skip_users_table(
+        self, client: TestClient, db, auth_headers
+    ):
+        """Teste: requisições autenticadas não consultam a tabela users"""
+        client.get("/accounts/", headers=auth_headers)
+
+        statements = self._count_user_selects(
+            db, lambda: client.get("/accounts/", headers=auth_headers)
+        )
+
+        assert statements == []
+
+    def test_deleted_user_is_rejected(
+        self, client: TestClient, auth_headers, test_user
+    ):
+        """Teste: usuário removido deixa de autenticar"""
+        assert client.get("/accounts/", headers=auth_headers).status_code == 200
+
+        client.delete(f"/users/{test_user['id']}")
+
+        response = client.get("/accounts/", headers=auth_headers)
+        assert response.status_code == 401
+
+
+class TestPasswordHashing:
+    """Testes para hash de senha no pool e atualização transparente"""
+
+    def _legacy_hash(self, password):
+        salt = os.urandom(32)
+        return salt.hex() + hashlib.pbkdf2_hmac(
+            'sha256', password.encode('utf-8'), salt, 100000
+        ).hex()
+
+    def test_new_hash_uses_configured_scheme(self, client: TestClient, db, test_user):
+        """Teste: cadastro grava hash no formato do passlib"""
+        db_user = crud.get_user(db, test_user["id"])
+
+        assert db_user.hashed_password.startswith("$pbkdf2-sha256$")
+        assert password_hasher.stats()["completed"] >= 1
+
+    def test_legacy_hash_upgraded_on_login(self, client: TestClient, db, test_user):
+        """Teste: hash no formato antigo é refeito no login"""
+        db_user = crud.get_user(db, test_user["id"])
+        crud.set_user_password_hash(db, db_user, self._legacy_hash("testpass123"))
+
+        response = client.post("/auth/login", json={
+            "username": "testuser", "password": "testpass123"
+        })
+
+        assert response.status_code == 200
+        db.refresh(db_user)
+        assert db_user.hashed_password.startswith("$pbkdf2-sha256$")
+        assert utils.verify_password("testpass123", db_user.hashed_password)
+
+    def test_weaker_rounds_are_upgraded(self):
+        """Teste: hash com menos iterações que o configurado pede atualização"""
+        weak = utils.pwd_context.handler("pbkdf2_sha256").using(rounds=1000).hash("abc")
+
+        valid, new_hash = utils.verify_and_update_password("abc", weak)
+        assert valid
+        assert f"${utils.PASSWORD_PBKDF2_ROUNDS}$" in new_hash
+        assert utils.verify_and_update_password("abd", weak) == (False, None)
+
+    def test_queue_full_returns_503(self, client: TestClient, monkeypatch):
+        """Teste: fila de hash cheia responde 503 em vez de enfileirar sem limite"""
+        monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+        response = client.post("/auth/register", json={
+            "username": "fila", "password": "senha123"
+        })
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
+        assert password_hasher.stats()["rejected"] >= 1
+
+
+class TestTokens:
+    """Testes para JWT de acesso, refresh e revogação"""
+
+    def _login(self, client):
+        return client.post("/auth/login", json={
+            "username": "testuser", "password": "testpass123"
+        }).json()
+
+    def _headers(self, token):
+        return {"Authorization": f"Bearer {token}"}
+
+    def test_login_returns_signed_tokens(self, client: TestClient, test_user):
+        """Teste: login devolve JWT de acesso e refresh com id e username"""
+        data = self._login(client)
+
+        claims = tokens.decode_token(data["token"])
+        assert claims["user_id"] == test_user["id"]
+        assert claims["username"] == "testuser"
+        assert tokens.decode_token(data["refresh_token"], tokens.REFRESH)["user_id"] == test_user["id"]
+        assert data["expires_in"] == tokens.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+    def test_forged_and_legacy_tokens_rejected(self, client: TestClient, test_user):
+        """Teste: token antigo (token_id_nome), assinatura errada ou expirado retornam 401"""
+        forged = jwt.encode(
+            {"sub": str(test_user["id"]), "username": "testuser", "type": "access",
+             "jti": "x", "exp": 9999999999},
+            "outra-chave", algorithm=tokens.ALGORITHM
+        )
+        expired = jwt.encode(
+            {"sub": str(test_user["id"]), "username": "testuser", "type": "access",
+             "jti": "y", "exp": 1},
+            tokens.SECRET_KEY, algorithm=tokens.ALGORITHM
+        )
+        refresh = self._login(client)["refresh_token"]
+
+        for token in (f"token_{test_user['id']}_testuser", forged, expired, refresh):
+            response = client.get("/accounts/", headers=self._headers(token))
+            assert response.status_code == 401
+
+    def test_refresh_rotates_tokens(self, client: TestClient, test_user):
+        """Teste: refresh gera novo par e o refresh usado não vale de novo"""
+        refresh_token = self._login(client)["refresh_token"]
+
+        response = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+        assert response.status_code == 200
+        new_pair = response.json()
+        assert client.get("/accounts/", headers=self._headers(new_pair["token"])).status_code == 200
+
+        reused = client.post("/auth/refresh", json={"refresh_token": refresh_token})
+        assert reused.status_code == 401
+
+    def test_logout_revokes_tokens(self, client: TestClient, test_user):
+        """Teste: depois do logout, token de acesso e refresh deixam de valer"""
+        data = self._login(client)
+        headers = self._headers(data["token"])
+
+        response = client.post(
+            "/auth/logout", json={"refresh_token": data["refresh_token"]}, headers=headers
+        )
+
+        assert response.status_code == 200
+        assert client.get("/accounts/", headers=headers).status_code == 401
+        assert client.post(
+            "/auth/refresh", json={"refresh_token": data["refresh_token"]}
+        ).status_code == 401
+
+    def test_revocation_loaded_from_database(self, client: TestClient, db, test_user):
+        """Teste: revogação gravada por outro processo vale após recarregar a lista"""
+        data = self._login(client)
+        crud.revoke_token(db, tokens.decode_token(data["token"]))
+        crud.token_revocations.clear()
+
+        response = client.get("/accounts/", headers=self._headers(data["token"]))
+        assert response.status_code == 401
+
+    def test_startup_requires_secret_key(self, monkeypatch):
+        """Teste: sem SECRET_KEY (fora de desenvolvimento/testes) o servidor não sobe"""
+        monkeypatch.setattr(tokens, "SECRET_KEY", None)
+
+        with pytest.raises(RuntimeError, match="SECRET_KEY"):
+            with TestClient(app):
+                pass
+
+    def test_change_password_revokes_previous_tokens(
+        self, client: TestClient, auth_headers, test_user
+    ):
+        """Teste: trocar a senha derruba tokens antigos e devolve um novo par"""
+        response = client.post("/auth/change-password", json={
+            "current_password": "testpass123", "new_password": "novasenha456"
+        }, headers=auth_headers)
+
+        assert response.status_code == 200
+        assert client.get("/accounts/", headers=auth_headers).status_code == 401
+        new_headers = self._headers(response.json()["token"])
+        assert client.get("/accounts/", headers=new_headers).status_code == 200
+        assert client.post("/auth/login", json={
+            "username": "testuser", "password": "novasenha456"
+        }).status_code == 200
@@ -0,0 +1,118 @@
+"""Testes para os caches em memória (TTLCache e StaleWhileRevalidate)"""
+
+import pytest
+
+from app.cache import TTLCache, StaleWhileRevalidate
+
+
+class FakeClock:
+    """Relógio controlado manualmente"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    """Testes para expiração e descarte LRU"""
+
+    def test_get_and_set(self):
+        """Teste: valor gravado é retornado"""
+        cache = TTLCache(maxsize=10, ttl=30)
+        cache.set("a", 1)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_expiration(self):
+        """Teste: valor expira após o ttl"""
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=30, clock=clock)
+        cache.set("a", 1)
+
+        clock.now = 29.9
+        assert cache.get("a") == 1
+        clock.now = 30.0
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        """Teste: item usado há mais tempo é descartado quando cheio"""
+        cache = TTLCache(maxsize=2, ttl=30)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_invalidate(self):
+        """Teste: invalidate remove a chave"""
+        cache = TTLCache()
+        cache.set("a", 1)
+        cache.invalidate("a")
+        cache.invalidate("inexistente")
+
+        assert cache.get("a") is None
+
+
+class TestStaleWhileRevalidate:
+    """Testes para o valor global recalculado em segundo plano"""
+
+    def test_cold_load_then_fresh(self):
+        """Teste: primeira leitura carrega; leituras dentro do ttl não chamam o loader"""
+        calls = []
+        cache = StaleWhileRevalidate(ttl=60, clock=FakeClock(), background=False)
+
+        def loader():
+            calls.append(1)
+            return ["a"]
+
+        assert cache.get(loader) == ["a"]
+        assert cache.get(loader) == ["a"]
+        assert len(calls) == 1
+
+    def test_stale_value_served_while_refreshing(self):
+        """Teste: após o ttl a leitura devolve o valor antigo e dispara o recálculo"""
+        clock = FakeClock()
+        cache = StaleWhileRevalidate(ttl=60, clock=clock, background=False)
+        values = iter([["velho"], ["novo"]])
+        loader = lambda: next(values)
+
+        cache.get(loader)
+        clock.now = 61
+        assert cache.get(loader) == ["velho"]
+        assert cache.get(loader) == ["novo"]
+        assert cache.stats()["stale_reads"] == 1
+        assert cache.stats()["refreshes"] == 2
+
+    def test_failed_refresh_keeps_old_value(self):
+        """Teste: erro no recálculo mantém o valor antigo"""
+        clock = FakeClock()
+        cache = StaleWhileRevalidate(ttl=60, clock=clock, background=False)
+        cache.get(lambda: ["ok"])
+
+        def broken():
+            raise RuntimeError("banco fora do ar")
+
+        clock.now = 61
+        assert cache.get(broken) == ["ok"]
+        assert cache.get(lambda: ["recalculado"]) == ["ok"]
+        assert cache.get(lambda: ["outro"]) == ["recalculado"]
+
+    def test_cold_load_error_propagates(self):
+        """Teste: sem valor anterior, o erro do loader chega ao chamador"""
+        cache = StaleWhileRevalidate(background=False)
+
+        def broken():
+            raise RuntimeError("banco fora do ar")
+
+        with pytest.raises(RuntimeError):
+            cache.get(broken)
+        assert cache.get(lambda: [1]) == [1]
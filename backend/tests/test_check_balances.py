@@ -0,0 +1,70 @@
+"""Testes para a verificação de saldos em lotes (check_balances.py)"""
+
+import json
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+import check_balances
+from app import crud
+
+
+class TestCheckBalances:
+    """Testes para checkpoint, retomada, --max-chunks e pausa entre lotes"""
+
+    def _create_accounts(self, client, headers, count):
+        return [
+            client.post("/accounts/", json={
+                "name": f"Conta {i}", "account_type": "checking", "initial_balance": 100.0
+            }, headers=headers).json()["id"]
+            for i in range(count)
+        ]
+
+    def test_stops_after_max_chunks_and_resumes_from_checkpoint(
+        self, client: TestClient, db, auth_headers, tmp_path, monkeypatch
+    ):
+        """Teste: para após N lotes com checkpoint, retoma dele até o fim e remove o arquivo"""
+        ids = self._create_accounts(client, auth_headers, 5)
+        db.execute(text("UPDATE accounts SET balance = balance + 100 WHERE id IN (:a, :b)"),
+                   {"a": ids[0], "b": ids[4]})
+        db.commit()
+        sleeps = []
+        monkeypatch.setattr(check_balances.time, "sleep", sleeps.append)
+        checkpoint = tmp_path / "checkpoint.json"
+        options = {
+            "chunk_size": 2, "pause": 0, "checkpoint": str(checkpoint),
+            "session_factory": sessionmaker(autoflush=False, bind=db.get_bind()),
+        }
+
+        first = check_balances.check_balances(max_chunks=2, **options)
+
+        assert first["finished"] is False
+        assert json.loads(checkpoint.read_text()) == {
+            "last_id": ids[3], "checked": 4, "drift": 1, "repaired": 0
+        }
+        assert sleeps == [0]  # Pausa entre lotes, não depois do último
+
+        resumed = check_balances.check_balances(repair=True, **options)
+
+        assert resumed["finished"] is True
+        assert (resumed["checked"], resumed["drift"], resumed["repaired"]) == (5, 2, 1)
+        assert not checkpoint.exists()
+        assert [audit["account_id"] for audit in crud.audit_accounts_chunk(db)
+                if not audit["is_consistent"]] == [ids[0]]
+
+    def test_restart_without_checkpoint_covers_all_accounts(
+        self, client: TestClient, db, auth_headers, tmp_path
+    ):
+        """Teste: sem checkpoint a varredura começa do início e repara tudo"""
+        self._create_accounts(client, auth_headers, 3)
+        db.execute(text("UPDATE accounts SET balance = 0"))
+        db.commit()
+
+        result = check_balances.check_balances(
+            repair=True, chunk_size=2, pause=0, checkpoint=str(tmp_path / "checkpoint.json"),
+            session_factory=sessionmaker(autoflush=False, bind=db.get_bind())
+        )
+
+        assert (result["checked"], result["drift"], result["repaired"]) == (3, 3, 3)
+        assert all(audit["is_consistent"] for audit in crud.audit_accounts_chunk(db))
@@ -0,0 +1,152 @@
+"""Testes para o dashboard e o resumo materializado por usuário"""
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, schemas
+from app.query_counter import count_queries
+
+
+class TestDashboard:
+    """Testes para o endpoint /dashboard"""
+
+    def test_dashboard_empty(self, client: TestClient, auth_headers):
+        """Teste: dashboard de usuário sem dados"""
+        response = client.get("/dashboard", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_accounts"] == 0
+        assert data["total_transactions"] == 0
+        assert data["net_balance"] == 0.0
+
+    def test_dashboard_with_transactions(
+        self, client: TestClient, auth_headers, test_account_with_transactions
+    ):
+        """Teste: dashboard reflete contas, categorias e transações"""
+        response = client.get("/dashboard", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_accounts"] == 1
+        assert data["total_categories"] == 1
+        assert data["total_transactions"] == 3
+        assert data["total_balance"] == 1000.0 + 200.0 - 50.0 - 30.0
+        assert data["total_income"] == 200.0
+        assert data["total_expense"] == 80.0
+        assert data["net_balance"] == 120.0
+
+    def test_dashboard_materializes_with_one_aggregate_query(
+        self, client: TestClient, db, test_user, test_account_with_transactions
+    ):
+        """Teste: cálculo do resumo do zero é um único SELECT"""
+        with count_queries() as counter:
+            values = crud.compute_user_summary(db, test_user["id"])
+
+        assert counter.count == 1
+        assert values["total_transactions"] == 3
+        assert values["total_income"] == 200.0
+        assert values["total_expense"] == 80.0
+
+
+class TestUserSummary:
+    """Testes para manutenção incremental do resumo"""
+
+    def _assert_summary_consistent(self, db, user_id):
+        summary = db.get(models.UserSummary, user_id)
+        db.refresh(summary)
+        values = crud.compute_user_summary(db, user_id)
+        assert crud.diff_user_summary(summary, values) == {}
+
+    def test_summary_follows_crud_operations(
+        self, client: TestClient, db, auth_headers, test_user,
+        test_category, test_account
+    ):
+        """Teste: resumo continua igual ao cálculo do zero após cada operação"""
+        user_id = test_user["id"]
+        transaction_data = {
+            "amount": -40.0,
+            "date": "2025-11-22",
+            "description": "Mercado",
+            "transaction_type": "expense",
+            "category_id": test_category["id"],
+            "account_id": test_account["id"]
+        }
+        response = client.post(
+            "/transactions/", json=transaction_data, headers=auth_headers
+        )
+        transaction_id = response.json()["id"]
+        self._assert_summary_consistent(db, user_id)
+
+        transaction_data.update(amount=300.0, transaction_type="income")
+        client.put(
+            f"/transactions/{transaction_id}",
+            json=transaction_data, headers=auth_headers
+        )
+        self._assert_summary_consistent(db, user_id)
+
+        client.put(
+            f"/accounts/{test_account['id']}",
+            json={"is_active": False}, headers=auth_headers
+        )
+        self._assert_summary_consistent(db, user_id)
+
+        client.put(
+            f"/accounts/{test_account['id']}",
+            json={"is_active": True}, headers=auth_headers
+        )
+        client.delete(f"/transactions/{transaction_id}", headers=auth_headers)
+        self._assert_summary_consistent(db, user_id)
+
+        client.delete(f"/accounts/{test_account['id']}", headers=auth_headers)
+        client.delete(
+            f"/categories/{test_category['id']}", headers=auth_headers
+        )
+        self._assert_summary_consistent(db, user_id)
+
+    def test_summary_built_on_first_read(
+        self, client: TestClient, db, auth_headers, test_user,
+        test_account_with_transactions
+    ):
+        """Teste: resumo ausente é calculado do zero na primeira leitura"""
+        db.query(models.UserSummary).delete()
+        db.commit()
+
+        response = client.get("/dashboard", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.json()["total_transactions"] == 3
+        assert db.get(models.UserSummary, test_user["id"]) is not None
+
+    def test_concurrent_sessions_do_not_lose_summary_updates(
+        self, client: TestClient, db, test_user, test_category
+    ):
+        """Teste: sessão com resumo já carregado não sobrescreve o delta de outra"""
+        session_factory = sessionmaker(autoflush=False, bind=db.get_bind())
+        first, second = session_factory(), session_factory()
+        try:
+            # Resumo lido antes do commit da outra sessão (e mantido no identity map)
+            stale = first.get(models.UserSummary, test_user["id"])
+            for session, amount in ((second, 10.0), (first, 5.0)):
+                crud.create_transaction(session, schemas.TransactionCreate(
+                    amount=amount, date="2025-11-22", description="Receita",
+                    transaction_type="income", category_id=test_category["id"]
+                ), test_user["id"])
+        finally:
+            first.close()
+            second.close()
+
+        assert stale is not None
+        self._assert_summary_consistent(db, test_user["id"])
+
+    def test_rebuild_fixes_drift(self, db, client: TestClient, test_user):
+        """Teste: rebuild_user_summary corrige resumo divergente"""
+        summary = db.get(models.UserSummary, test_user["id"])
+        summary.total_transactions = 42
+        db.commit()
+
+        rebuilt = crud.rebuild_user_summary(db, test_user["id"])
+
+        assert rebuilt.total_transactions == 0
+        values = crud.compute_user_summary(db, test_user["id"])
+        assert crud.diff_user_summary(rebuilt, values) == {}
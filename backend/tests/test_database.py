@@ -0,0 +1,53 @@
+"""Testes para a configuração do engine e do pool de conexões"""
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app import database
+
+
+class TestEngineConfig:
+    """Testes para PRAGMAs do SQLite e estatísticas do pool"""
+
+    def test_sqlite_pragmas_applied(self, tmp_path):
+        """Teste: conexão SQLite em WAL, synchronous=NORMAL, mmap e busy_timeout"""
+        engine = database.build_engine(f"sqlite:///{tmp_path}/pragmas.db")
+        try:
+            with engine.connect() as conn:
+                pragma = lambda name: conn.execute(text(f"PRAGMA {name}")).scalar()
+                assert pragma("journal_mode") == "wal"
+                assert pragma("synchronous") == 1  # NORMAL
+                assert pragma("mmap_size") == database.SQLITE_PRAGMAS["mmap_size"]
+                assert pragma("busy_timeout") == database.SQLITE_PRAGMAS["busy_timeout"]
+        finally:
+            engine.dispose()
+
+    def test_pool_stats_counts_checked_out(self, tmp_path):
+        """Teste: pool_stats mostra conexões em uso e overflow"""
+        engine = database.build_engine(f"sqlite:///{tmp_path}/pool.db")
+        try:
+            with engine.connect():
+                stats = database.pool_stats(engine)
+                assert stats["pool"] == "QueuePool"
+                assert stats["checkedout"] == 1
+            assert database.pool_stats(engine)["checkedout"] == 0
+            assert "overflow" in stats
+        finally:
+            engine.dispose()
+
+    def test_async_database_url(self):
+        """Teste: URL síncrona vira a equivalente com driver assíncrono"""
+        assert database.async_database_url("sqlite:///./finance.db") == \
+            "sqlite+aiosqlite:///./finance.db"
+        assert database.async_database_url("postgresql://u:p@host:5432/db") == \
+            "postgresql+asyncpg://u:p@host:5432/db"
+        assert database.async_database_url("postgres://u:p@host/db") == \
+            "postgresql+asyncpg://u:p@host/db"
+
+    def test_health_db_endpoint(self, client: TestClient):
+        """Teste: GET /health/db expõe o estado do pool"""
+        response = client.get("/health/db")
+
+        assert response.status_code == 200
+        assert "pool" in response.json()
+        assert "status" in response.json()
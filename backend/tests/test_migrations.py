@@ -0,0 +1,130 @@
+"""Testes para as migrações versionadas do esquema"""
+
+from decimal import Decimal
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.orm import Session
+
+from app import database, migrations, models
+
+
+LEGACY_SCHEMA = [
+    # Esquema anterior às migrações: sem perfil, sem saldo inicial, sem índices
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR, hashed_password VARCHAR, "
+    "email VARCHAR, full_name VARCHAR, cpf VARCHAR, avatar TEXT)",
+    "CREATE TABLE accounts (id INTEGER PRIMARY KEY, name VARCHAR, account_type VARCHAR, "
+    "balance REAL, currency VARCHAR, user_id INTEGER)",
+    "CREATE TABLE categories (id INTEGER PRIMARY KEY, name VARCHAR, icon VARCHAR, user_id INTEGER)",
+    "CREATE TABLE transactions (id INTEGER PRIMARY KEY, amount REAL, date DATE, "
+    "description VARCHAR, transaction_type VARCHAR, category_id INTEGER, "
+    "account_id INTEGER, user_id INTEGER)",
+    "INSERT INTO users (id, username) VALUES (1, 'antigo')",
+    "INSERT INTO accounts (id, name, balance, user_id) VALUES (1, 'Carteira', 250.29, 1)",
+    "INSERT INTO transactions (id, amount, date, transaction_type, account_id, user_id) "
+    "VALUES (1, -0.29, '2025-01-10', 'expense', 1, 1)",
+]
+
+
+def capture_statements(engine):
+    """Lista que recebe cada SQL executado no engine"""
+    statements = []
+    event.listen(engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+class TestMigrations:
+    """Testes para upgrade() em banco novo, banco em dia e banco antigo"""
+
+    def test_fresh_database_applies_all_versions(self, tmp_path):
+        """Teste: banco vazio recebe todas as migrações, em ordem"""
+        engine = database.build_engine(f"sqlite:///{tmp_path}/fresh.db")
+        try:
+            applied = migrations.upgrade(engine, log=lambda message: None)
+
+            assert applied == [migration.version for migration in migrations.MIGRATIONS]
+            with engine.connect() as conn:
+                assert migrations.current_version(conn) == migrations.LATEST_VERSION
+                assert inspect(conn).has_table("revoked_tokens")
+        finally:
+            engine.dispose()
+
+    def test_current_schema_runs_no_ddl(self, tmp_path):
+        """Teste: com o esquema em dia, upgrade não executa DDL nem pega o lock"""
+        engine = database.build_engine(f"sqlite:///{tmp_path}/current.db")
+        try:
+            migrations.upgrade(engine, log=lambda message: None)
+            statements = capture_statements(engine)
+
+            assert migrations.upgrade(engine) == []
+            executed = " ".join(statements).upper()
+            assert "CREATE" not in executed
+            assert "ALTER" not in executed
+            assert "BEGIN IMMEDIATE" not in executed
+        finally:
+            engine.dispose()
+
+    def test_legacy_database_is_upgraded(self, tmp_path):
+        """Teste: banco antigo ganha colunas, índices e valores em centavos"""
+        engine = database.build_engine(f"sqlite:///{tmp_path}/legacy.db")
+        try:
+            with engine.begin() as conn:
+                for statement in LEGACY_SCHEMA:
+                    conn.execute(text(statement))
+
+            migrations.upgrade(engine, log=lambda message: None)
+
+            with engine.connect() as conn:
+                inspector = inspect(conn)
+                user_columns = {column["name"] for column in inspector.get_columns("users")}
+                account_columns = {column["name"] for column in inspector.get_columns("accounts")}
+                indexes = {index["name"] for index in inspector.get_indexes("transactions")}
+                initial_balance = conn.execute(text(
+                    "SELECT initial_balance FROM accounts WHERE id = 1"
+                )).scalar()
+
+            assert {"cpf", "phone", "birth_date", "address", "avatar_hash"} <= user_columns
+            assert {"initial_balance", "is_active", "created_at", "updated_at"} <= account_columns
+            assert {"ix_transactions_user_id", "ix_transactions_user_date_id"} <= indexes
+            assert initial_balance == 25029  # centavos
+            with Session(engine) as db:
+                assert db.get(models.Account, 1).balance == Decimal("250.29")
+                assert db.get(models.Transaction, 1).amount == Decimal("-0.29")
+        finally:
+            engine.dispose()
+
+    def test_money_columns_already_in_cents_are_kept(self, tmp_path):
+        """Teste: banco criado com colunas inteiras não tem os valores multiplicados"""
+        engine = database.build_engine(f"sqlite:///{tmp_path}/cents.db")
+        try:
+            database.Base.metadata.create_all(bind=engine)
+            with Session(engine) as db:
+                db.add(models.Account(id=1, name="Conta", account_type="checking",
+                                      initial_balance=Decimal("10.05"),
+                                      balance=Decimal("10.05"), user_id=1))
+                db.commit()
+
+            migrations.upgrade(engine, log=lambda message: None)
+
+            with Session(engine) as db:
+                assert db.get(models.Account, 1).balance == Decimal("10.05")
+        finally:
+            engine.dispose()
+
+    def test_new_migration_applies_only_pending(self, tmp_path, monkeypatch):
+        """Teste: nova versão roda uma vez só, sem repetir as anteriores"""
+        engine = database.build_engine(f"sqlite:///{tmp_path}/pending.db")
+        try:
+            migrations.upgrade(engine, log=lambda message: None)
+            calls = []
+            extra = migrations.Migration(
+                migrations.LATEST_VERSION + 1, "extra", lambda conn: calls.append(conn)
+            )
+            monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [extra])
+            monkeypatch.setattr(migrations, "LATEST_VERSION", extra.version)
+
+            assert migrations.upgrade(engine, log=lambda message: None) == [extra.version]
+            assert migrations.upgrade(engine, log=lambda message: None) == []
+            assert len(calls) == 1
+        finally:
+            engine.dispose()
@@ -0,0 +1,37 @@
+"""Testes para os valores monetários em centavos"""
+
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import func, select, text
+
+from app import models
+from app.money import from_cents, quantize, to_cents
+
+
+class TestMoney:
+    """Testes para conversão reais/centavos e para o tipo Money"""
+
+    def test_conversions(self):
+        """Teste: float e string viram centavos exatos, meio centavo arredonda para cima"""
+        assert to_cents(0.1) == 10
+        assert to_cents("1234.56") == 123456
+        assert to_cents(-10.005) == -1001
+        assert quantize(0.1 + 0.2) == Decimal("0.30")
+        assert from_cents(123456) == Decimal("1234.56")
+        assert from_cents(25029.0) == Decimal("250.29")  # coluna REAL antiga do SQLite
+
+    def test_column_stores_integer_cents(self, db, test_user):
+        """Teste: o banco guarda inteiros e a SUM volta em Decimal exato"""
+        for _ in range(10):
+            db.add(models.Transaction(
+                amount=Decimal("0.10"), date=date(2025, 1, 1),
+                transaction_type="income", user_id=test_user["id"]
+            ))
+        db.commit()
+
+        raw = db.execute(text("SELECT SUM(amount) FROM transactions")).scalar()
+        total = db.execute(select(func.sum(models.Transaction.amount))).scalar()
+
+        assert raw == 100
+        assert total == Decimal("1.00")
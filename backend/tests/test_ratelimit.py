@@ -0,0 +1,150 @@
+"""Testes para o limite de tentativas de login (janela deslizante)"""
+
+from fastapi.testclient import TestClient
+
+from app.hashing import password_hasher
+from app.main import app
+from app.proxy_headers import TrustedProxies
+from app.ratelimit import LoginThrottle, SlidingWindowLimiter, login_throttle
+
+
+class FakeClock:
+    """Relógio controlado manualmente"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSlidingWindowLimiter:
+    """Testes para a janela deslizante"""
+
+    def test_blocks_after_limit_and_slides(self):
+        """Teste: bloqueia na tentativa além do limite e libera conforme a janela anda"""
+        clock = FakeClock()
+        limiter = SlidingWindowLimiter(limit=3, window=60, clock=clock)
+        for second in (0, 10, 20):
+            clock.now = 1000 + second
+            assert limiter.retry_after("k") == 0
+            limiter.hit("k")
+
+        clock.now = 1030
+        assert limiter.retry_after("k") == 30  # a tentativa de t=0 sai em t=60
+        clock.now = 1060
+        assert limiter.retry_after("k") == 0
+        assert limiter.retry_after("outra") == 0
+
+    def test_lru_bounds_memory(self):
+        """Teste: número de chaves guardadas é limitado"""
+        clock = FakeClock()
+        limiter = SlidingWindowLimiter(limit=1, window=60, clock=clock)
+        limiter.backend.max_keys = 2
+        for key in ("a", "b", "c"):
+            limiter.hit(key)
+
+        assert limiter.retry_after("a") == 0
+        assert limiter.retry_after("c") == 60
+
+
+class TestLoginThrottle:
+    """Testes para os limites por IP e por username"""
+
+    def test_user_failures_then_success_resets(self):
+        """Teste: falhas por username bloqueiam; login correto zera"""
+        throttle = LoginThrottle(ip_limit=100, user_limit=2, window=60, clock=FakeClock())
+        for _ in range(2):
+            assert throttle.check("1.1.1.1", "Maria") == 0
+            throttle.failure("maria")
+
+        assert throttle.check("2.2.2.2", "MARIA") > 0
+        throttle.success("maria")
+        assert throttle.check("2.2.2.2", "maria") == 0
+        assert throttle.stats()["rejected_user"] == 1
+        assert throttle.stats()["failures"] == 2
+
+    def test_ip_limit_counts_every_attempt(self):
+        """Teste: limite por IP conta todas as tentativas, com ou sem sucesso"""
+        clock = FakeClock()
+        throttle = LoginThrottle(ip_limit=3, user_limit=100, window=60, clock=clock)
+        for name in ("a", "b", "c"):
+            assert throttle.check("9.9.9.9", name) == 0
+
+        assert throttle.check("9.9.9.9", "d") == 60
+        assert throttle.check("8.8.8.8", "d") == 0
+        clock.now += 60
+        assert throttle.check("9.9.9.9", "d") == 0
+
+
+class TestLoginRateLimitEndpoint:
+    """Testes para o 429 em /auth/login"""
+
+    def test_rejected_before_hashing(self, client: TestClient, test_user, monkeypatch):
+        """Teste: depois do limite, a rota responde 429 sem calcular hash"""
+        monkeypatch.setattr(login_throttle.by_user, "limit", 3)
+        wrong = {"username": "testuser", "password": "errada"}
+        for _ in range(3):
+            assert client.post("/auth/login", json=wrong).status_code == 401
+
+        hashed_before = password_hasher.stats()["completed"]
+        response = client.post("/auth/login", json={
+            "username": "testuser", "password": "testpass123"
+        })
+
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) > 0
+        assert password_hasher.stats()["completed"] == hashed_before
+        assert client.get("/health/login-throttle").json()["rejected_user"] == 1
+
+    def _login_from(self, client, forwarded_for):
+        return client.post(
+            "/auth/login", json={"username": "ninguem", "password": "x"},
+            headers={"X-Forwarded-For": forwarded_for}
+        ).status_code
+
+    def test_ip_from_trusted_proxy(self, client: TestClient, monkeypatch):
+        """Teste: atrás de proxy confiável, cada cliente tem o próprio limite por IP"""
+        monkeypatch.setattr(login_throttle.by_ip, "limit", 2)
+        proxied = TestClient(app, client=("127.0.0.1", 50000))  # TRUSTED_PROXIES padrão
+
+        for _ in range(2):
+            assert self._login_from(proxied, "203.0.113.1") == 401
+            assert self._login_from(proxied, "203.0.113.2") == 401
+        assert self._login_from(proxied, "203.0.113.1") == 429
+
+    def test_spoofed_leftmost_forwarded_for_keeps_ip_bucket(
+        self, client: TestClient, monkeypatch
+    ):
+        """Teste: entradas forjadas à esquerda do X-Forwarded-For não trocam o IP"""
+        monkeypatch.setattr(login_throttle.by_ip, "limit", 2)
+        proxied = TestClient(app, client=("127.0.0.1", 50000))
+
+        assert self._login_from(proxied, "6.6.6.6, 203.0.113.9") == 401
+        assert self._login_from(proxied, "7.7.7.7, 203.0.113.9") == 401
+        assert self._login_from(proxied, "8.8.8.8, 203.0.113.9") == 429
+
+    def test_any_peer_trusts_only_last_hop(self):
+        """Teste: com "*" vale a última entrada (a do proxy), não a primeira"""
+        trusted = TrustedProxies("*")
+
+        assert trusted.client_host("10.0.0.5", "6.6.6.6, 203.0.113.9") == "203.0.113.9"
+        assert trusted.client_host("10.0.0.5", "203.0.113.9") == "203.0.113.9"
+        assert trusted.client_host("10.0.0.5", "") == "10.0.0.5"
+
+    def test_skips_trusted_hops_from_the_right(self):
+        """Teste: pula os proxies confiáveis (IP ou CIDR) a partir da direita"""
+        trusted = TrustedProxies("127.0.0.1, 10.0.0.0/8")
+
+        assert trusted.client_host("127.0.0.1", "6.6.6.6, 203.0.113.9, 10.1.2.3") == "203.0.113.9"
+        assert trusted.client_host("198.51.100.7", "203.0.113.9") == "198.51.100.7"
+
+    def test_forwarded_for_ignored_from_untrusted_peer(
+        self, client: TestClient, monkeypatch
+    ):
+        """Teste: X-Forwarded-For de quem não é proxy confiável não troca o IP"""
+        monkeypatch.setattr(login_throttle.by_ip, "limit", 2)
+
+        assert self._login_from(client, "203.0.113.1") == 401
+        assert self._login_from(client, "203.0.113.2") == 401
+        assert self._login_from(client, "203.0.113.3") == 429
@@ -0,0 +1,281 @@
+"""Testes para importação e exportação de extratos (CSV/OFX/JSON Lines)"""
+
+import io
+import json
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud, statements
+
+
+OFX_SGML = """OFXHEADER:100
+DATA:OFXSGML
+
+<OFX>
+<BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20250105120000[-3:BRT]
+<TRNAMT>-45.90
+<FITID>1
+<MEMO>Supermercado
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20250110
+<TRNAMT>3000.00
+<FITID>2
+<NAME>Salario
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1>
+</OFX>
+"""
+
+
+class TestStatementParsers:
+    """Testes para os parsers de extrato"""
+
+    def test_parse_amount_formats(self):
+        """Teste: valores em formato brasileiro e americano"""
+        assert statements.parse_amount("1234.56") == Decimal("1234.56")
+        assert statements.parse_amount("-1.234,56") == Decimal("-1234.56")
+        assert statements.parse_amount("R$ 10,00") == Decimal("10.00")
+        assert statements.parse_amount("1,234.56") == Decimal("1234.56")
+        for invalid in ("abc", "nan", "inf", "-Infinity", "1e400"):
+            with pytest.raises(ValueError):
+                statements.parse_amount(invalid)
+
+    def test_csv_semicolon_with_errors(self):
+        """Teste: CSV com ';', tipo opcional e linhas inválidas"""
+        lines = io.StringIO(
+            "Data;Descrição;Valor;Tipo\n"
+            "05/01/2025;Mercado;45,90;despesa\n"
+            "\n"
+            "10/01/2025;Salário;3.000,00;\n"
+            "31/02/2025;Inválida;1,00;\n"
+            "11/01/2025;Sem valor;;\n"
+        )
+        rows = list(statements.iter_csv_rows(lines))
+
+        assert rows[0] == (2, {
+            "date": date(2025, 1, 5), "amount": Decimal("-45.90"),
+            "description": "Mercado", "transaction_type": "expense"
+        }, None)
+        assert rows[1][1]["amount"] == Decimal("3000.00")
+        assert rows[1][1]["transaction_type"] == "income"
+        assert [(line, error is not None) for line, _, error in rows[2:]] == [
+            (5, True), (6, True)
+        ]
+
+    def test_csv_missing_columns(self):
+        """Teste: cabeçalho sem colunas obrigatórias"""
+        rows = list(statements.iter_csv_rows(["descricao,outra\n", "x,y\n"]))
+        assert len(rows) == 1
+        assert rows[0][1] is None
+
+    def test_ofx_sgml(self):
+        """Teste: lançamentos de OFX 1.x (SGML)"""
+        rows = list(statements.iter_ofx_rows(io.StringIO(OFX_SGML)))
+
+        assert [fields for _, fields, _ in rows] == [
+            {"date": date(2025, 1, 5), "amount": Decimal("-45.90"),
+             "description": "Supermercado", "transaction_type": "expense"},
+            {"date": date(2025, 1, 10), "amount": Decimal("3000.00"),
+             "description": "Salario", "transaction_type": "income"},
+        ]
+
+    def test_text_lines_across_blocks(self):
+        """Teste: decodificação incremental preserva linhas e acentos"""
+        content = ("Descrição ção\n" * 20000).encode("utf-8")
+        lines = list(statements.iter_text_lines(io.BytesIO(content)))
+        assert len(lines) == 20000
+        assert set(lines) == {"Descrição ção\n"}
+
+
+class TestStatementImport:
+    """Testes para POST /transactions/import"""
+
+    def _import(self, client, auth_headers, content, filename="extrato.csv", **data):
+        response = client.post(
+            "/transactions/import",
+            files={"file": (filename, content.encode("utf-8"))},
+            data=data, headers=auth_headers
+        )
+        events = [json.loads(line) for line in response.text.splitlines()]
+        return response, events
+
+    def test_import_csv_in_chunks(
+        self, client: TestClient, db, auth_headers, test_user,
+        test_category, test_account
+    ):
+        """Teste: CSV gravado em lotes com progresso, erros e saldo atualizado"""
+        lines = ["date,description,amount"]
+        lines += [f"2025-03-{1 + i % 28:02d},Compra {i},-{i + 1}.00" for i in range(25)]
+        lines.insert(5, "2025-13-01,Mês inválido,-1.00")
+
+        response, events = self._import(
+            client, auth_headers, "\n".join(lines) + "\n",
+            category_id=test_category["id"], account_id=test_account["id"],
+            chunk_size=10
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        errors = [e for e in events if e["event"] == "error"]
+        progress = [e for e in events if e["event"] == "progress"]
+        assert [e["line"] for e in errors] == [6]
+        assert [e["created"] for e in progress] == [10, 20, 25]
+        assert events[-1] == {
+            "event": "done", "processed": 26, "created": 25,
+            "duplicates": 0, "errors": 1
+        }
+
+        account = client.get(
+            f"/accounts/{test_account['id']}", headers=auth_headers
+        ).json()
+        assert account["balance"] == pytest.approx(1000.0 - sum(range(1, 26)))
+
+        totals = crud.compute_monthly_totals(db, test_user["id"])
+        assert crud.diff_monthly_totals(db, test_user["id"], totals) == []
+
+    def test_import_reports_non_finite_and_huge_amounts_per_line(
+        self, client: TestClient, auth_headers, test_category
+    ):
+        """Teste: 'nan', 'inf' e valores enormes viram erro da linha, e o stream chega ao fim"""
+        content = ("date,amount\n2025-01-01,nan\n2025-01-02,inf\n"
+                   "2025-01-03,1e400\n2025-01-04,1e20\n2025-01-05,-10.00\n")
+
+        response, events = self._import(
+            client, auth_headers, content, category_id=test_category["id"]
+        )
+
+        assert response.status_code == 200
+        assert [e["line"] for e in events if e["event"] == "error"] == [2, 3, 4, 5]
+        assert events[-1] == {
+            "event": "done", "processed": 5, "created": 1,
+            "duplicates": 0, "errors": 4
+        }
+
+    def test_reimport_reports_duplicates(
+        self, client: TestClient, auth_headers, test_category
+    ):
+        """Teste: reenviar o mesmo extrato não duplica lançamentos"""
+        _, first = self._import(
+            client, auth_headers, OFX_SGML, filename="extrato.ofx",
+            category_id=test_category["id"]
+        )
+        _, second = self._import(
+            client, auth_headers, OFX_SGML, filename="extrato.ofx",
+            category_id=test_category["id"]
+        )
+
+        assert first[-1]["created"] == 2
+        assert second[-1]["created"] == 0
+        assert second[-1]["duplicates"] == 2
+        assert len(client.get("/transactions/", headers=auth_headers).json()) == 2
+
+    def test_import_unknown_format(
+        self, client: TestClient, auth_headers, test_category
+    ):
+        """Teste: formato não suportado retorna 400"""
+        response, _ = self._import(
+            client, auth_headers, "x", filename="extrato.pdf",
+            category_id=test_category["id"]
+        )
+        assert response.status_code == 400
+
+    def test_import_foreign_category(
+        self, client: TestClient, auth_headers, other_user_headers
+    ):
+        """Teste: categoria de outro usuário retorna 403"""
+        other_category = client.post(
+            "/categories/", json={"name": "Alheia"}, headers=other_user_headers
+        ).json()
+        response, _ = self._import(
+            client, auth_headers, "date,amount\n2025-01-01,-1\n",
+            category_id=other_category["id"]
+        )
+        assert response.status_code == 403
+
+
+class TestTransactionExport:
+    """Testes para GET /transactions/export"""
+
+    ROWS = [
+        ("2025-01-05", -45.9, "expense", "Mercado"),
+        ("2025-01-10", 3000.0, "income", "Salário"),
+        ("2025-02-03", -120.0, "expense", "Luz"),
+    ]
+
+    def _create_all(self, client, auth_headers, category_id):
+        for day, amount, transaction_type, description in self.ROWS:
+            client.post("/transactions/", json={
+                "amount": amount,
+                "date": day,
+                "description": description,
+                "transaction_type": transaction_type,
+                "category_id": category_id
+            }, headers=auth_headers)
+
+    def test_export_csv(self, client: TestClient, auth_headers, test_category):
+        """Teste: CSV com cabeçalho e transações da mais antiga para a mais nova"""
+        self._create_all(client, auth_headers, test_category["id"])
+
+        response = client.get("/transactions/export", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "attachment" in response.headers["content-disposition"]
+        lines = response.text.splitlines()
+        assert lines[0] == ",".join(crud.EXPORT_COLUMNS)
+        assert [line.split(",")[1] for line in lines[1:]] == [r[0] for r in self.ROWS]
+        assert "Salário" in lines[2]
+        assert test_category["name"] in lines[1]
+
+    def test_export_jsonl_with_filters(
+        self, client: TestClient, auth_headers, test_category
+    ):
+        """Teste: JSON Lines respeitando período e tipo"""
+        self._create_all(client, auth_headers, test_category["id"])
+
+        response = client.get(
+            "/transactions/export?format=jsonl&start=2025-01-01&end=2025-01-31"
+            "&transaction_type=expense",
+            headers=auth_headers
+        )
+
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert len(records) == 1
+        assert records[0]["description"] == "Mercado"
+        assert records[0]["date"] == "2025-01-05"
+        assert records[0]["amount"] == -45.9
+
+    def test_export_only_own_transactions(
+        self, client: TestClient, auth_headers, other_user_headers, test_category
+    ):
+        """Teste: exportação não inclui transações de outros usuários"""
+        self._create_all(client, auth_headers, test_category["id"])
+
+        response = client.get(
+            "/transactions/export?format=jsonl", headers=other_user_headers
+        )
+        assert response.text == ""
+
+    def test_export_invalid_format(self, client: TestClient, auth_headers):
+        """Teste: formato inválido retorna 400"""
+        response = client.get("/transactions/export?format=xls", headers=auth_headers)
+        assert response.status_code == 400
+
+    def test_serializers_emit_in_batches(self):
+        """Teste: serializadores geram um pedaço por lote de linhas"""
+        rows = [(i, date(2025, 1, 1)) for i in range(5)]
+
+        chunks = list(statements.iter_csv_export(iter(rows), ("id", "date"), batch_size=2))
+        assert len(chunks) == 3
+        assert "".join(chunks).splitlines()[1] == "0,2025-01-01"
+
+        chunks = list(statements.iter_jsonl_export(iter(rows), ("id", "date"), batch_size=2))
+        assert len(chunks) == 3
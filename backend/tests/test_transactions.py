@@ -1,6 +1,13 @@
 """Testes para endpoints de transações"""
 
+from datetime import date, timedelta
+
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app import crud
+from app.query_counter import count_queries
 
 
 class TestTransactions:
@@ -69,6 +76,20 @@ class TestTransactions:
 
         assert response.status_code == 422
 
+    def test_create_transaction_amount_out_of_range(
+        self, client: TestClient, auth_headers, test_category
+    ):
+        """Teste: valor além do BIGINT de centavos é 422, não 500"""
+        response = client.post("/transactions/", json={
+            "amount": 1e20,
+            "date": "2025-11-22",
+            "description": "Teste",
+            "transaction_type": "income",
+            "category_id": test_category["id"]
+        }, headers=auth_headers)
+
+        assert response.status_code == 422
+
     def test_get_transaction(
         self, client: TestClient, test_category
     ):
@@ -392,3 +413,649 @@ class TestTransactionWithAccounts:
         )
         data = response.json()
         assert data["balance"] == initial_balance
+
+class TestTransactionPagination:
+    """Testes de paginação por cursor (keyset)"""
+
+    def _create_transactions(self, client, auth_headers, category_id, dates):
+        for i, day in enumerate(dates):
+            client.post("/transactions/", json={
+                "amount": 10.0 + i,
+                "date": day,
+                "description": f"Paginada {i}",
+                "transaction_type": "expense",
+                "category_id": category_id
+            }, headers=auth_headers)
+
+    def test_cursor_pagination_walks_all_rows(
+        self, client: TestClient, auth_headers, test_category
+    ):
+        """Teste: cursor percorre todas as linhas sem repetir nem pular"""
+        dates = ["2025-11-20"] * 4 + ["2025-11-21"] * 3 + ["2025-11-19"] * 2
+        self._create_transactions(
+            client, auth_headers, test_category["id"], dates
+        )
+
+        seen = []
+        cursor = None
+        while True:
+            url = "/transactions/?limit=2"
+            if cursor:
+                url += f"&cursor={cursor}"
+            response = client.get(url, headers=auth_headers)
+            assert response.status_code == 200
+            page = response.json()
+            seen.extend(page)
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        ids = [t["id"] for t in seen]
+        assert len(ids) == len(dates)
+        assert len(set(ids)) == len(dates)
+
+        keys = [(t["date"], t["id"]) for t in seen]
+        assert keys == sorted(keys, reverse=True)
+
+    def test_last_page_has_no_cursor(
+        self, client: TestClient, auth_headers, test_category
+    ):
+        """Teste: página incompleta não retorna X-Next-Cursor"""
+        self._create_transactions(
+            client, auth_headers, test_category["id"], ["2025-11-20"] * 3
+        )
+
+        response = client.get("/transactions/?limit=5", headers=auth_headers)
+
+        assert response.status_code == 200
+        assert len(response.json()) == 3
+        assert "X-Next-Cursor" not in response.headers
+
+    def test_invalid_cursor(self, client: TestClient, auth_headers):
+        """Teste: erro com cursor inválido"""
+        response = client.get(
+            "/transactions/?cursor=nao-e-um-cursor", headers=auth_headers
+        )
+
+        assert response.status_code == 400
+        assert "inválido" in response.json()["detail"]
+
+class TestTransactionTotals:
+    """Testes para totais por período e por categoria (rollup mensal)"""
+
+    TRANSACTIONS = [
+        ("2024-12-31", 500.0, "income"),
+        ("2025-01-15", -100.0, "expense"),
+        ("2025-02-01", 1000.0, "income"),
+        ("2025-02-14", -25.5, "expense"),
+        ("2025-02-28", -74.5, "expense"),
+        ("2025-03-10", 300.0, "income"),
+        ("2025-04-30", -60.0, "expense"),
+    ]
+
+    def _create_all(self, client, auth_headers, category_id):
+        ids = []
+        for day, amount, transaction_type in self.TRANSACTIONS:
+            response = client.post("/transactions/", json={
+                "amount": amount,
+                "date": day,
+                "description": "Total",
+                "transaction_type": transaction_type,
+                "category_id": category_id
+            }, headers=auth_headers)
+            ids.append(response.json()["id"])
+        return ids
+
+    def _expected(self, start, end):
+        rows = [t for t in self.TRANSACTIONS if start <= t[0] <= end]
+        income = sum(abs(a) for _, a, t in rows if t == "income")
+        expense = sum(abs(a) for _, a, t in rows if t == "expense")
+        return income, expense, len(rows)
+
+    def test_totals_by_period_partial_and_full_months(
+        self, client: TestClient, auth_headers, test_category
+    ):
+        """Teste: totais por período combinam rollup e pontas parciais"""
+        self._create_all(client, auth_headers, test_category["id"])
+
+        periods = [
+            ("2024-12-01", "2025-12-31"),  # Apenas meses completos
+            ("2025-01-10", "2025-04-15"),  # Pontas parciais dos dois lados
+            ("2025-02-01", "2025-02-28"),  # Exatamente um mês
+            ("2025-02-02", "2025-02-27"),  # Dentro de um único mês
+            ("2025-01-16", "2025-03-09"),  # Meio de mês a meio de mês
+            ("2025-05-01", "2025-04-01"),  # Período invertido
+        ]
+        for start, end in periods:
+            response = client.get(
+                f"/transactions/totals/by-period?start={start}&end={end}",
+                headers=auth_headers
+            )
+            assert response.status_code == 200
+            data = response.json()
+            income, expense, count = self._expected(start, end)
+            assert data["total_income"] == pytest.approx(income), (start, end)
+            assert data["total_expense"] == pytest.approx(expense), (start, end)
+            assert data["transaction_count"] == count, (start, end)
+
+    def test_totals_by_category(
+        self, client: TestClient, auth_headers, test_category
+    ):
+        """Teste: totais por categoria"""
+        self._create_all(client, auth_headers, test_category["id"])
+
+        response = client.get(
+            "/transactions/totals/by-category", headers=auth_headers
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data) == 1
+        assert data[0]["category_id"] == test_category["id"]
+        assert data[0]["total_income"] == pytest.approx(1800.0)
+        assert data[0]["total_expense"] == pytest.approx(260.0)
+        assert data[0]["transaction_count"] == len(self.TRANSACTIONS)
+
+    def test_totals_are_exact_cents(
+        self, client: TestClient, auth_headers, test_category, test_account
+    ):
+        """Teste: somas de centavos sem erro de ponto flutuante (0.1 + 0.2 == 0.3)"""
+        for amount in [0.1, 0.2] * 50:
+            client.post("/transactions/", json={
+                "amount": -amount,
+                "date": "2025-05-10",
+                "description": "Centavos",
+                "transaction_type": "expense",
+                "category_id": test_category["id"],
+                "account_id": test_account["id"]
+            }, headers=auth_headers)
+
+        period = client.get(
+            "/transactions/totals/by-period?start=2025-05-01&end=2025-05-31",
+            headers=auth_headers
+        ).json()
+        audit = client.get(
+            f"/accounts/{test_account['id']}/audit", headers=auth_headers
+        ).json()
+
+        assert period["total_expense"] == 15.0
+        assert period["balance"] == -15.0
+        assert audit["current_balance"] == 985.0
+        assert audit["difference"] == 0
+        assert audit["is_consistent"] is True
+
+    def test_rollup_follows_update_and_delete(
+        self, client: TestClient, db, auth_headers, test_user, test_category
+    ):
+        """Teste: rollup mensal igual ao cálculo do zero após update e delete"""
+        ids = self._create_all(client, auth_headers, test_category["id"])
+
+        client.put(f"/transactions/{ids[1]}", json={
+            "amount": 42.0,
+            "date": "2025-06-05",
+            "description": "Movida",
+            "transaction_type": "income",
+            "category_id": test_category["id"]
+        }, headers=auth_headers)
+        client.delete(f"/transactions/{ids[3]}", headers=auth_headers)
+
+        totals = crud.compute_monthly_totals(db, test_user["id"])
+        assert crud.diff_monthly_totals(db, test_user["id"], totals) == []
+
+    def test_rollup_keeps_row_on_update_in_place(
+        self, client: TestClient, auth_headers, test_category
+    ):
+        """Teste: editar só o valor mantém a linha do rollup (mesmo mês, categoria e tipo)"""
+        transaction = client.post("/transactions/", json={
+            "amount": -100.0,
+            "date": "2025-01-15",
+            "description": "Mercado",
+            "transaction_type": "expense",
+            "category_id": test_category["id"]
+        }, headers=auth_headers).json()
+
+        client.put(f"/transactions/{transaction['id']}", json={
+            "amount": -80.0,
+            "date": "2025-01-20",
+            "description": "Mercado",
+            "transaction_type": "expense",
+            "category_id": test_category["id"]
+        }, headers=auth_headers)
+
+        data = client.get("/transactions/totals/by-category", headers=auth_headers).json()
+        assert len(data) == 1
+        assert data[0]["total_expense"] == 80.0
+        assert data[0]["transaction_count"] == 1
+
+class TestTransactionListExpand:
+    """Testes para a listagem compacta e ?expand="""
+
+    def _create(self, client, auth_headers, category_id, account_id=None):
+        client.post("/transactions/", json={
+            "amount": -20.0,
+            "date": "2025-11-22",
+            "description": "Compacta",
+            "transaction_type": "expense",
+            "category_id": category_id,
+            "account_id": account_id
+        }, headers=auth_headers)
+
+    def test_list_is_compact_by_default(
+        self, client: TestClient, auth_headers, test_category, test_account
+    ):
+        """Teste: listagem traz apenas IDs dos relacionamentos"""
+        self._create(client, auth_headers, test_category["id"], test_account["id"])
+
+        response = client.get("/transactions/", headers=auth_headers)
+
+        assert response.status_code == 200
+        item = response.json()[0]
+        assert item["category_id"] == test_category["id"]
+        assert item["account_id"] == test_account["id"]
+        assert "category" not in item
+        assert "account" not in item
+        assert "user" not in item
+
+    def test_list_expand(
+        self, client: TestClient, auth_headers, test_category
+    ):
+        """Teste: expand inclui apenas os relacionamentos pedidos"""
+        self._create(client, auth_headers, test_category["id"])
+
+        response = client.get(
+            "/transactions/?expand=category,account", headers=auth_headers
+        )
+
+        assert response.status_code == 200
+        item = response.json()[0]
+        assert item["category"]["name"] == test_category["name"]
+        assert item["account"] is None
+        assert "user" not in item
+
+    def test_list_invalid_expand(self, client: TestClient, auth_headers):
+        """Teste: erro com expand desconhecido"""
+        response = client.get(
+            "/transactions/?expand=category,senha", headers=auth_headers
+        )
+
+        assert response.status_code == 400
+        assert "senha" in response.json()["detail"]
+
+class TestTransactionQueryCount:
+    """Testes contra regressões N+1 (header X-Query-Count)"""
+
+    def _create_with_distinct_relations(self, client, auth_headers, count, offset=0):
+        for i in range(offset, offset + count):
+            category = client.post(
+                "/categories/", json={"name": f"Cat {i}"}, headers=auth_headers
+            ).json()
+            account = client.post("/accounts/", json={
+                "name": f"Conta {i}", "account_type": "checking"
+            }, headers=auth_headers).json()
+            client.post("/transactions/", json={
+                "amount": -5.0,
+                "date": "2025-11-22",
+                "description": f"N+1 {i}",
+                "transaction_type": "expense",
+                "category_id": category["id"],
+                "account_id": account["id"]
+            }, headers=auth_headers)
+
+    def _query_count(self, client, url, auth_headers):
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200
+        return int(response.headers["X-Query-Count"])
+
+    def test_list_query_count_does_not_grow_with_rows(
+        self, client: TestClient, auth_headers
+    ):
+        """Teste: listagem expandida usa número fixo de queries"""
+        url = "/transactions/?expand=category,account,user"
+        self._create_with_distinct_relations(client, auth_headers, 2)
+        few = self._query_count(client, url, auth_headers)
+
+        self._create_with_distinct_relations(client, auth_headers, 10, offset=2)
+        many = self._query_count(client, url, auth_headers)
+
+        assert many == few
+        assert many <= 4  # listagem + um SELECT IN por relacionamento
+
+    def test_detail_loads_relations_in_one_query(
+        self, client: TestClient, auth_headers
+    ):
+        """Teste: detalhe carrega category, account e user em uma query"""
+        self._create_with_distinct_relations(client, auth_headers, 1)
+        transaction_id = client.get(
+            "/transactions/", headers=auth_headers
+        ).json()[0]["id"]
+
+        count = self._query_count(
+            client, f"/transactions/{transaction_id}", auth_headers
+        )
+
+        assert count == 1
+
+
+class TestTransactionBulk:
+    """Testes para importação em lote (POST /transactions/bulk)"""
+
+    def _rows(self, count, category_id, account_id=None):
+        rows = []
+        for i in range(count):
+            income = i % 3 == 0
+            rows.append({
+                "amount": 100.0 if income else -(10.0 + i),
+                "date": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+                "description": f"Extrato {i}",
+                "transaction_type": "income" if income else "expense",
+                "category_id": category_id,
+                "account_id": account_id
+            })
+        return rows
+
+    def test_bulk_create(
+        self, client: TestClient, db, auth_headers, test_user,
+        test_category, test_account
+    ):
+        """Teste: lote cria transações, ajusta saldo e mantém agregados"""
+        rows = self._rows(50, test_category["id"], test_account["id"])
+        response = client.post(
+            "/transactions/bulk", json={"transactions": rows}, headers=auth_headers
+        )
+
+        assert response.status_code == 201
+        data = response.json()
+        expected_balance = 1000.0 + sum(row["amount"] for row in rows)
+        assert data["created"] == 50
+        assert data["account_balances"][str(test_account["id"])] == \
+            pytest.approx(expected_balance)
+
+        account = client.get(
+            f"/accounts/{test_account['id']}", headers=auth_headers
+        ).json()
+        assert account["balance"] == pytest.approx(expected_balance)
+
+        listed = client.get("/transactions/?limit=100", headers=auth_headers).json()
+        assert len(listed) == 50
+
+        summary = crud.get_user_summary(db, test_user["id"])
+        db.refresh(summary)
+        assert crud.diff_user_summary(
+            summary, crud.compute_user_summary(db, test_user["id"])
+        ) == {}
+        totals = crud.compute_monthly_totals(db, test_user["id"])
+        assert crud.diff_monthly_totals(db, test_user["id"], totals) == []
+
+    def test_bulk_query_count_independent_of_rows(
+        self, client: TestClient, auth_headers, test_category, test_account
+    ):
+        """Teste: número de queries não cresce com o tamanho do lote"""
+        counts = []
+        for size in (200, 10, 200):  # o primeiro lote cria as linhas do rollup
+            rows = self._rows(size, test_category["id"], test_account["id"])
+            response = client.post(
+                "/transactions/bulk", json={"transactions": rows},
+                headers=auth_headers
+            )
+            assert response.status_code == 201
+            counts.append(int(response.headers["X-Query-Count"]))
+
+        assert counts[1] == counts[2]
+
+    def test_bulk_rejects_foreign_category(
+        self, client: TestClient, auth_headers, other_user_headers, test_category
+    ):
+        """Teste: categoria de outro usuário rejeita o lote inteiro"""
+        other_category = client.post(
+            "/categories/", json={"name": "Alheia"}, headers=other_user_headers
+        ).json()
+        rows = self._rows(3, test_category["id"])
+        rows[1]["category_id"] = other_category["id"]
+
+        response = client.post(
+            "/transactions/bulk", json={"transactions": rows}, headers=auth_headers
+        )
+
+        assert response.status_code == 403
+        assert client.get("/transactions/", headers=auth_headers).json() == []
+
+    def test_bulk_rejects_foreign_account(
+        self, client: TestClient, auth_headers, test_category, other_user_account
+    ):
+        """Teste: conta de outro usuário rejeita o lote"""
+        rows = self._rows(2, test_category["id"], other_user_account["id"])
+        response = client.post(
+            "/transactions/bulk", json={"transactions": rows}, headers=auth_headers
+        )
+        assert response.status_code == 403
+
+    def test_bulk_missing_category(
+        self, client: TestClient, auth_headers, test_category
+    ):
+        """Teste: categoria inexistente retorna 404"""
+        rows = self._rows(2, 99999)
+        response = client.post(
+            "/transactions/bulk", json={"transactions": rows}, headers=auth_headers
+        )
+        assert response.status_code == 404
+
+    def test_bulk_empty(self, client: TestClient, auth_headers):
+        """Teste: lote vazio retorna 400"""
+        response = client.post(
+            "/transactions/bulk", json={"transactions": []}, headers=auth_headers
+        )
+        assert response.status_code == 400
+
+
+class TestTransactionFilters:
+    """Testes para os filtros da listagem (aplicados no banco)"""
+
+    def _create_all(self, client, auth_headers, test_category, test_account):
+        other_category = client.post(
+            "/categories/", json={"name": "Outra"}, headers=auth_headers
+        ).json()
+        rows = [
+            ("2025-01-05", -45.9, "expense", "Mercado Central", test_category["id"], test_account["id"]),
+            ("2025-01-20", 3000.0, "income", "Salário", test_category["id"], None),
+            ("2025-02-03", -120.0, "expense", "Conta de luz", other_category["id"], test_account["id"]),
+            ("2025-02-15", -8.5, "expense", "Mercadinho 100%", other_category["id"], None),
+        ]
+        for day, amount, transaction_type, description, category_id, account_id in rows:
+            client.post("/transactions/", json={
+                "amount": amount,
+                "date": day,
+                "description": description,
+                "transaction_type": transaction_type,
+                "category_id": category_id,
+                "account_id": account_id
+            }, headers=auth_headers)
+        return other_category
+
+    def _descriptions(self, client, auth_headers, query):
+        response = client.get(f"/transactions/?{query}", headers=auth_headers)
+        assert response.status_code == 200
+        return [t["description"] for t in response.json()]
+
+    def test_filters(
+        self, client: TestClient, auth_headers, test_category, test_account
+    ):
+        """Teste: cada filtro e combinações retornam apenas as linhas esperadas"""
+        other_category = self._create_all(
+            client, auth_headers, test_category, test_account
+        )
+
+        cases = [
+            ("start=2025-02-01", ["Mercadinho 100%", "Conta de luz"]),
+            ("end=2025-01-31", ["Salário", "Mercado Central"]),
+            ("transaction_type=income", ["Salário"]),
+            (f"category_id={other_category['id']}", ["Mercadinho 100%", "Conta de luz"]),
+            (f"account_id={test_account['id']}", ["Conta de luz", "Mercado Central"]),
+            ("min_amount=40&max_amount=200", ["Conta de luz", "Mercado Central"]),
+            ("q=MERCA", ["Mercadinho 100%", "Mercado Central"]),
+            ("q=100%25", ["Mercadinho 100%"]),
+            ("q=%25", ["Mercadinho 100%"]),
+            ("transaction_type=expense&start=2025-01-10&max_amount=50", ["Mercadinho 100%"]),
+        ]
+        for query, expected in cases:
+            assert self._descriptions(client, auth_headers, query) == expected, query
+
+    def test_filters_with_cursor(
+        self, client: TestClient, auth_headers, test_category, test_account
+    ):
+        """Teste: paginação por cursor mantém o filtro entre páginas"""
+        self._create_all(client, auth_headers, test_category, test_account)
+
+        first = client.get(
+            "/transactions/?transaction_type=expense&limit=2", headers=auth_headers
+        )
+        cursor = first.headers["X-Next-Cursor"]
+        second = client.get(
+            f"/transactions/?transaction_type=expense&limit=2&cursor={cursor}",
+            headers=auth_headers
+        )
+
+        assert [t["description"] for t in second.json()] == ["Mercado Central"]
+
+    def test_filters_use_composite_indexes(self, db, test_user):
+        """Teste: EXPLAIN mostra busca por índice, sem varrer a tabela nem ordenar em memória"""
+        cases = [
+            ({}, "ix_transactions_user_date_id"),
+            ({"start": date(2025, 1, 1), "end": date(2025, 1, 31)}, "ix_transactions_user_date_id"),
+            ({"transaction_type": "expense"}, "ix_transactions_user_type_date"),
+            ({"transaction_type": "expense", "start": date(2025, 1, 1)},
+             "ix_transactions_user_type_date"),
+            ({"category_id": 1}, "ix_transactions_user_category_date"),
+            ({"category_id": 1, "cursor": (date(2025, 1, 1), 10)},
+             "ix_transactions_user_category_date"),
+            ({"account_id": 1}, "ix_transactions_user_account_date"),
+            ({"min_amount": 10, "max_amount": 50, "q": "mer"}, "ix_transactions_user_date_id"),
+        ]
+        engine = db.get_bind()
+        for filters, index_name in cases:
+            query = crud.user_transactions_query(db, test_user["id"], **filters)
+            sql = str(query.statement.compile(
+                engine, compile_kwargs={"literal_binds": True}
+            ))
+            plan = " | ".join(
+                row[3] for row in db.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+            )
+            assert f"USING INDEX {index_name}" in plan, (filters, plan)
+            assert "SCAN" not in plan, (filters, plan)
+            assert "TEMP B-TREE" not in plan, (filters, plan)
+
+
+class TestDescriptionSuggestionIndex:
+    """Testes para as sugestões de descrição mantidas (busca por prefixo e frecency)"""
+
+    def _create(self, client, headers, category_id, description, day="2025-11-22",
+                transaction_type="expense"):
+        return client.post("/transactions/", json={
+            "amount": -10.0 if transaction_type == "expense" else 10.0,
+            "date": day,
+            "description": description,
+            "transaction_type": transaction_type,
+            "category_id": category_id
+        }, headers=headers).json()
+
+    def _suggestions(self, client, headers, query=""):
+        response = client.get(
+            f"/transactions/suggestions/descriptions?{query}", headers=headers
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    def test_prefix_search_ignores_case_and_accents(
+        self, client: TestClient, auth_headers, test_category
+    ):
+        """Teste: ?q= busca por prefixo sem diferenciar maiúsculas e acentos"""
+        for description in ["Mercado", "Mercearia", "Água", "Aluguel"]:
+            self._create(client, auth_headers, test_category["id"], description)
+
+        assert sorted(self._suggestions(client, auth_headers, "q=MER")) == \
+            ["Mercado", "Mercearia"]
+        assert self._suggestions(client, auth_headers, "q=agu") == ["Água"]
+        assert self._suggestions(client, auth_headers, "q=xyz") == []
+
+    def test_ranked_by_frecency(self, client: TestClient, auth_headers, test_category):
+        """Teste: descrições frequentes e recentes vêm primeiro"""
+        today = date.today()
+        old = (today - timedelta(days=365)).isoformat()
+        for _ in range(5):
+            self._create(client, auth_headers, test_category["id"], "Mercado antigo", old)
+        for _ in range(2):
+            self._create(
+                client, auth_headers, test_category["id"], "Mercado novo", today.isoformat()
+            )
+        self._create(client, auth_headers, test_category["id"], "Mercado raro", today.isoformat())
+
+        assert self._suggestions(client, auth_headers, "q=mercado") == [
+            "Mercado novo", "Mercado raro", "Mercado antigo"
+        ]
+
+    def test_index_follows_update_and_delete(
+        self, client: TestClient, db, auth_headers, test_user, test_category
+    ):
+        """Teste: tabela de sugestões igual ao cálculo do zero após update e delete"""
+        first = self._create(client, auth_headers, test_category["id"], "Padaria")
+        second = self._create(client, auth_headers, test_category["id"], "Padaria")
+        client.put(f"/transactions/{first['id']}", json={
+            "amount": 5.0,
+            "date": "2025-11-23",
+            "description": "Farmácia",
+            "transaction_type": "income",
+            "category_id": test_category["id"]
+        }, headers=auth_headers)
+        client.delete(f"/transactions/{second['id']}", headers=auth_headers)
+
+        suggestions = crud.compute_description_suggestions(db, test_user["id"])
+        assert crud.diff_description_suggestions(db, test_user["id"], suggestions) == []
+        assert self._suggestions(client, auth_headers, "q=pad") == []
+        assert self._suggestions(
+            client, auth_headers, "q=far&transaction_type=income"
+        ) == ["Farmácia"]
+
+    def test_index_keeps_row_on_update_in_place(
+        self, client: TestClient, auth_headers, test_category
+    ):
+        """Teste: editar só o valor mantém a sugestão (mesma descrição, tipo e categoria)"""
+        created = self._create(client, auth_headers, test_category["id"], "Padaria")
+        client.put(f"/transactions/{created['id']}", json={
+            "amount": -12.0,
+            "date": "2025-11-22",
+            "description": "Padaria",
+            "transaction_type": "expense",
+            "category_id": test_category["id"]
+        }, headers=auth_headers)
+
+        assert self._suggestions(client, auth_headers, "q=pad") == ["Padaria"]
+
+    def test_completed_with_popular_from_other_users(
+        self, client: TestClient, auth_headers, other_user_headers, test_category
+    ):
+        """Teste: populares de outros usuários completam a lista, após as próprias"""
+        other_category = client.post(
+            "/categories/", json={"name": "Outra"}, headers=other_user_headers
+        ).json()
+        for _ in range(3):
+            self._create(client, other_user_headers, other_category["id"], "Mercadão")
+        self._create(client, other_user_headers, other_category["id"], "Salário",
+                     transaction_type="income")
+        self._create(client, auth_headers, test_category["id"], "Mercado da esquina")
+
+        assert self._suggestions(client, auth_headers, "q=merc") == [
+            "Mercado da esquina", "Mercadão"
+        ]
+        assert self._suggestions(
+            client, auth_headers, "transaction_type=income"
+        ) == ["Salário"]
+
+    def test_suggestions_do_not_scan_transactions(
+        self, client: TestClient, auth_headers, test_category
+    ):
+        """Teste: sugestões não consultam a tabela de transações"""
+        self._create(client, auth_headers, test_category["id"], "Mercado")
+
+        with count_queries() as counter:
+            self._suggestions(client, auth_headers, "q=mer")
+
+        assert not any("FROM transactions" in sql for sql in counter.statements)
@@ -1,6 +1,12 @@
 """Testes para endpoints de usuários"""
 
+import base64
+
 from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app import crud, models, utils
+from app.migrations import migrate_legacy_avatars
 
 
 class TestUsers:
@@ -74,3 +80,130 @@ class TestUsers:
 
         assert response.status_code == 404
         assert "não encontrado" in response.json()["detail"]
+
+# PNG 1x1 transparente
+PNG_BYTES = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+PNG_DATA_URL = "data:image/png;base64," + base64.b64encode(PNG_BYTES).decode()
+
+
+class TestUserAvatar:
+    """Testes para o armazenamento de avatares"""
+
+    def test_upload_avatar_returns_url(
+        self, client: TestClient, auth_headers, test_user
+    ):
+        """Teste: usuário retorna apenas a URL do avatar"""
+        response = client.put(
+            "/users/profile", json={"avatar": PNG_DATA_URL}, headers=auth_headers
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert "avatar" not in data
+        assert data["avatar_url"].startswith(f"/users/{test_user['id']}/avatar?v=")
+
+    def test_get_avatar_with_cache_headers(
+        self, client: TestClient, auth_headers
+    ):
+        """Teste: avatar servido com ETag, Cache-Control e 304"""
+        user = client.put(
+            "/users/profile", json={"avatar": PNG_DATA_URL}, headers=auth_headers
+        ).json()
+
+        response = client.get(user["avatar_url"])
+
+        assert response.status_code == 200
+        assert response.content == PNG_BYTES
+        assert response.headers["content-type"] == "image/png"
+        assert response.headers["x-content-type-options"] == "nosniff"
+        assert response.headers["content-disposition"] == "inline"
+        assert "immutable" in response.headers["cache-control"]
+        etag = response.headers["etag"]
+
+        response = client.get(
+            f"/users/{user['id']}/avatar", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.headers["cache-control"] == "public, no-cache"
+
+    def test_identical_avatars_stored_once(
+        self, client: TestClient, db, auth_headers, other_user_headers
+    ):
+        """Teste: imagens idênticas ocupam uma única linha"""
+        client.put("/users/profile", json={"avatar": PNG_DATA_URL}, headers=auth_headers)
+        client.put("/users/profile", json={"avatar": PNG_DATA_URL}, headers=other_user_headers)
+
+        assert db.query(models.Avatar).count() == 1
+
+    def test_remove_avatar(self, client: TestClient, auth_headers, test_user):
+        """Teste: avatar vazio remove a imagem do usuário"""
+        client.put("/users/profile", json={"avatar": PNG_DATA_URL}, headers=auth_headers)
+
+        response = client.put("/users/profile", json={"avatar": ""}, headers=auth_headers)
+
+        assert response.json()["avatar_url"] is None
+        assert client.get(f"/users/{test_user['id']}/avatar").status_code == 404
+
+    def test_invalid_avatar(self, client: TestClient, auth_headers):
+        """Teste: erro ao enviar avatar que não é imagem"""
+        response = client.put(
+            "/users/profile",
+            json={"avatar": "data:text/plain;base64,b2k="},
+            headers=auth_headers
+        )
+
+        assert response.status_code == 400
+        assert "inválido" in response.json()["detail"]
+
+    def test_svg_avatar_rejected(self, client: TestClient, auth_headers):
+        """Teste: SVG (pode conter script) é recusado mesmo declarado como image/*"""
+        svg = base64.b64encode(b'<svg xmlns="http://www.w3.org/2000/svg" onload="alert(1)"/>')
+        response = client.put(
+            "/users/profile",
+            json={"avatar": "data:image/svg+xml;base64," + svg.decode()},
+            headers=auth_headers
+        )
+
+        assert response.status_code == 400
+        assert "inválido" in response.json()["detail"]
+
+    def test_avatar_type_from_content(self, client: TestClient, auth_headers):
+        """Teste: tipo servido vem dos bytes, não do media type declarado"""
+        user = client.put(
+            "/users/profile",
+            json={"avatar": PNG_DATA_URL.replace("image/png", "image/svg+xml")},
+            headers=auth_headers
+        ).json()
+
+        response = client.get(user["avatar_url"])
+        assert response.headers["content-type"] == "image/png"
+
+    def test_avatar_too_large(self, client: TestClient, auth_headers, monkeypatch):
+        """Teste: avatar acima de AVATAR_MAX_BYTES é recusado"""
+        monkeypatch.setattr(utils, "AVATAR_MAX_BYTES", len(PNG_BYTES) - 1)
+        response = client.put(
+            "/users/profile", json={"avatar": PNG_DATA_URL}, headers=auth_headers
+        )
+
+        assert response.status_code == 400
+        assert "grande" in response.json()["detail"]
+
+    def test_migrate_legacy_avatars(self, db, test_user):
+        """Teste: migração move avatar base64 da tabela users"""
+        engine = db.get_bind()
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE users ADD COLUMN avatar TEXT"))
+            conn.execute(
+                text("UPDATE users SET avatar = :avatar WHERE id = :id"),
+                {"avatar": PNG_DATA_URL, "id": test_user["id"]}
+            )
+            moved = migrate_legacy_avatars(conn)
+            legacy = conn.execute(text("SELECT avatar FROM users")).scalar()
+
+        assert moved == 1
+        assert legacy is None
+        user = db.get(models.User, test_user["id"])
+        db.refresh(user)
+        assert crud.get_avatar(db, user.avatar_hash).data == PNG_BYTES
@@ -1,6 +1,7 @@
 import React, { useState } from 'react'
 import { Link, useNavigate, useLocation } from 'react-router-dom'
 import { useAuth } from '../context/AuthContext'
+import { getAvatarSrc } from '../services/api'
 import {
   LayoutDashboard,
   Plus,
@@ -81,9 +82,9 @@ export default function Sidebar() {
           >
             <div className="flex items-center space-x-3">
               {/* Avatar */}
-              {user.avatar ? (
+              {user.avatar_url ? (
                 <img
-                  src={user.avatar}
+                  src={getAvatarSrc(user)}
                   alt={user.username}
                   className="w-12 h-12 rounded-full object-cover border-2 border-blue-500"
                 />
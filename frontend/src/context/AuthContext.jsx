@@ -1,5 +1,9 @@
 import React, { createContext, useState, useContext, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
+import { authAPI } from '../services/api';
+
+// Renovar o token de acesso um minuto antes de expirar (padrão: 15 min)
+const DEFAULT_EXPIRES_IN = 900;
 
 const AuthContext = createContext();
 
@@ -19,15 +23,42 @@ export const AuthProvider = ({ children }) => {
     setLoading(false);
   }, []);
 
-  const login = (userData, authToken) => {
+  useEffect(() => {
+    if (!token || !localStorage.getItem('refresh_token')) return undefined;
+    const expiresIn = Number(localStorage.getItem('token_expires_in')) || DEFAULT_EXPIRES_IN;
+    const timer = setTimeout(async () => {
+      try {
+        const pair = await authAPI.refresh(localStorage.getItem('refresh_token'));
+        storeTokens(pair.token, pair.refresh_token, pair.expires_in);
+      } catch (error) {
+        // Refresh expirado ou revogado: sessão encerrada
+        logout();
+      }
+    }, Math.max(expiresIn - 60, 30) * 1000);
+    return () => clearTimeout(timer);
+  }, [token]);
+
+  const storeTokens = (authToken, refreshToken, expiresIn) => {
     localStorage.setItem('token', authToken);
+    if (refreshToken) localStorage.setItem('refresh_token', refreshToken);
+    if (expiresIn) localStorage.setItem('token_expires_in', String(expiresIn));
+    setToken(authToken);
+  };
+
+  const login = (userData, authToken, refreshToken, expiresIn) => {
     localStorage.setItem('user', JSON.stringify(userData));
     setUser(userData);
-    setToken(authToken);
+    storeTokens(authToken, refreshToken, expiresIn);
   };
 
   const logout = () => {
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (localStorage.getItem('token')) {
+      authAPI.logout(refreshToken).catch(() => {});
+    }
     localStorage.removeItem('token');
+    localStorage.removeItem('refresh_token');
+    localStorage.removeItem('token_expires_in');
     localStorage.removeItem('user');
     setUser(null);
     setToken(null);
@@ -39,7 +70,7 @@ export const AuthProvider = ({ children }) => {
   };
 
   return (
-    <AuthContext.Provider value={{ user, token, login, logout, updateUser, loading, isAuthenticated: !!token }}>
+    <AuthContext.Provider value={{ user, token, login, logout, updateUser, storeTokens, loading, isAuthenticated: !!token }}>
       {children}
     </AuthContext.Provider>
   );
@@ -27,7 +27,7 @@ export default function Login() {
       console.log('Login bem-sucedido:', response)
 
       // Atualizar o contexto de autenticação
-      login(response.user, response.token)
+      login(response.user, response.token, response.refresh_token, response.expires_in)
 
       setUsername('')
       setPassword('')
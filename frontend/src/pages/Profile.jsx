@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react'
-import { usersAPI } from '../services/api'
+import { usersAPI, getAvatarSrc } from '../services/api'
 import { Camera, Save } from 'lucide-react'
 import { useAuth } from '../context/AuthContext'
 
@@ -50,7 +50,7 @@ export default function Profile() {
       setFormData({
         fullName: user.full_name || '',
         email: user.email || '',
-        avatar: user.avatar || null,
+        avatar: getAvatarSrc(user),
         cpf: user.cpf ? formatCPF(user.cpf) : '',
         phone: user.phone ? formatPhone(user.phone) : '',
         birthDate: user.birth_date || '',
@@ -100,7 +100,8 @@ export default function Profile() {
       const profileData = {
         full_name: formData.fullName?.trim() || null,
         email: formData.email?.trim() || null,
-        avatar: formData.avatar || null,
+        // Enviar avatar apenas quando uma nova imagem foi escolhida (data URL)
+        avatar: formData.avatar?.startsWith('data:') ? formData.avatar : undefined,
         cpf: formData.cpf?.replace(/\D/g, '') || null, // Remove formatação antes de enviar
         phone: formData.phone?.replace(/\D/g, '') || null, // Remove formatação antes de enviar
         birth_date: formData.birthDate || null,
@@ -118,7 +119,7 @@ export default function Profile() {
       setFormData({
         fullName: updatedUser.full_name || '',
         email: updatedUser.email || '',
-        avatar: updatedUser.avatar || null,
+        avatar: getAvatarSrc(updatedUser),
         cpf: updatedUser.cpf ? formatCPF(updatedUser.cpf) : '',
         phone: updatedUser.phone ? formatPhone(updatedUser.phone) : '',
         birthDate: updatedUser.birth_date || '',
@@ -2,9 +2,11 @@ import React, { useState } from 'react'
 import { Settings, Lock, Bell, Moon, Shield, Globe } from 'lucide-react'
 import { authAPI } from '../services/api'
 import { useTheme } from '../context/ThemeContext'
+import { useAuth } from '../context/AuthContext'
 
 export default function SettingsPage() {
   const { darkMode, toggleTheme } = useTheme()
+  const { storeTokens } = useAuth()
   const [settings, setSettings] = useState({
     notifications: true,
     twoFactor: false,
@@ -60,7 +62,9 @@ export default function SettingsPage() {
 
     setLoading(true)
     try {
-      await authAPI.changePassword(password.currentPassword, password.newPassword)
+      // A troca revoga os tokens atuais: guardar o novo par retornado
+      const pair = await authAPI.changePassword(password.currentPassword, password.newPassword)
+      storeTokens(pair.token, pair.refresh_token, pair.expires_in)
       setSuccess('Senha alterada com sucesso!')
       setPassword({ currentPassword: '', newPassword: '', confirmPassword: '' })
     } catch (err) {
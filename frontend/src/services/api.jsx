@@ -25,6 +25,10 @@ const handleResponse = async (response) => {
   return response.json();
 };
 
+// URL absoluta do avatar (o backend retorna apenas o caminho em avatar_url)
+export const getAvatarSrc = (user) =>
+  user?.avatar_url ? `${API_URL}${user.avatar_url}` : null;
+
 // Auth API
 export const authAPI = {
   login: async (username, password) => {
@@ -55,6 +59,30 @@ export const authAPI = {
     }
   },
 
+  // Troca o refresh token por um novo par (o usado deixa de valer)
+  refresh: async (refreshToken) => {
+    const response = await fetch(`${API_URL}/auth/refresh`, {
+      method: "POST",
+      headers: getHeaders(false),
+      body: JSON.stringify({ refresh_token: refreshToken }),
+    });
+    return handleResponse(response);
+  },
+
+  logout: async (refreshToken) => {
+    try {
+      const response = await fetch(`${API_URL}/auth/logout`, {
+        method: "POST",
+        headers: getHeaders(true),
+        body: JSON.stringify({ refresh_token: refreshToken }),
+      });
+      return handleResponse(response);
+    } catch (error) {
+      console.error("Logout error:", error);
+      throw error;
+    }
+  },
+
   changePassword: async (currentPassword, newPassword) => {
     try {
       const response = await fetch(`${API_URL}/auth/change-password`, {
@@ -276,7 +304,8 @@ export const transactionsAPI = {
         }
       }
 
-      const response = await fetch(`${API_URL}/transactions/?limit=50`, {
+      // Listagem compacta + categoria (usada nas telas); conta e usuário ficam como IDs
+      const response = await fetch(`${API_URL}/transactions/?limit=50&expand=category`, {
         method: "GET",
         headers: getHeaders(true),
       });
@@ -291,6 +320,33 @@ export const transactionsAPI = {
     }
   },
 
+  // Paginação por cursor: passe o nextCursor da página anterior (null na primeira)
+  // filters: { start, end, transaction_type, category_id, account_id, min_amount, max_amount, q }
+  getPage: async (cursor = null, limit = 50, filters = {}) => {
+    try {
+      const params = new URLSearchParams();
+      params.append('limit', limit);
+      params.append('expand', 'category');
+      if (cursor) params.append('cursor', cursor);
+      Object.entries(filters).forEach(([key, value]) => {
+        if (value !== null && value !== undefined && value !== '') params.append(key, value);
+      });
+
+      const response = await fetch(`${API_URL}/transactions/?${params}`, {
+        method: "GET",
+        headers: getHeaders(true),
+      });
+      const items = await handleResponse(response);
+      return {
+        items,
+        nextCursor: response.headers.get("X-Next-Cursor"),
+      };
+    } catch (error) {
+      console.error("Get transactions page error:", error);
+      throw error;
+    }
+  },
+
   create: async (data) => {
     try {
       const response = await fetch(`${API_URL}/transactions/`, {
@@ -308,6 +364,63 @@ export const transactionsAPI = {
     }
   },
 
+  // Importação em lote: transactions no mesmo formato de create
+  bulkCreate: async (transactions) => {
+    try {
+      const response = await fetch(`${API_URL}/transactions/bulk`, {
+        method: "POST",
+        headers: getHeaders(true),
+        body: JSON.stringify({ transactions }),
+      });
+      const result = await handleResponse(response);
+      transactionsCache.clear();
+      return result;
+    } catch (error) {
+      console.error("Bulk create transactions error:", error);
+      throw error;
+    }
+  },
+
+  // Importar extrato CSV/OFX; onEvent recebe cada evento NDJSON (progresso, erros)
+  importStatement: async (file, categoryId, accountId = null, onEvent = () => {}) => {
+    try {
+      const form = new FormData();
+      form.append("file", file);
+      form.append("category_id", categoryId);
+      if (accountId) form.append("account_id", accountId);
+
+      const headers = getHeaders(true);
+      delete headers["Content-Type"]; // o navegador define o boundary do multipart
+      const response = await fetch(`${API_URL}/transactions/import`, {
+        method: "POST",
+        headers,
+        body: form,
+      });
+      if (!response.ok) return handleResponse(response);
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let last = null;
+      for (;;) {
+        const { done, value } = await reader.read();
+        buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+        const lines = buffer.split("\n");
+        buffer = lines.pop();
+        for (const line of lines.filter(Boolean)) {
+          last = JSON.parse(line);
+          onEvent(last);
+        }
+        if (done) break;
+      }
+      transactionsCache.clear();
+      return last;
+    } catch (error) {
+      console.error("Import statement error:", error);
+      throw error;
+    }
+  },
+
   update: async (id, data) => {
     try {
       const response = await fetch(`${API_URL}/transactions/${id}`, {
@@ -341,12 +454,30 @@ export const transactionsAPI = {
     }
   },
 
-  getDescriptionSuggestions: async (transactionType = null, categoryId = null, limit = 10) => {
+  // Baixar o histórico completo como Blob (format: 'csv' ou 'jsonl'; filtros opcionais)
+  exportAll: async (format = "csv", filters = {}) => {
+    try {
+      const params = new URLSearchParams({ format, ...filters });
+      const response = await fetch(`${API_URL}/transactions/export?${params}`, {
+        method: "GET",
+        headers: getHeaders(true),
+      });
+      if (!response.ok) return handleResponse(response);
+      return response.blob();
+    } catch (error) {
+      console.error("Export transactions error:", error);
+      throw error;
+    }
+  },
+
+  // q: prefixo digitado (opcional); o backend ordena por uso frequente e recente
+  getDescriptionSuggestions: async (transactionType = null, categoryId = null, limit = 10, q = null) => {
     try {
       const params = new URLSearchParams();
       if (transactionType) params.append('transaction_type', transactionType);
       if (categoryId) params.append('category_id', categoryId);
       if (limit) params.append('limit', limit);
+      if (q) params.append('q', q);
 
       const response = await fetch(`${API_URL}/transactions/suggestions/descriptions?${params}`, {
         method: "GET",
@@ -29,6 +29,7 @@ fi
 start_backend() {
     cd backend
     source venv/bin/activate
+    python init_db.py
     echo -e "${GREEN}Iniciando servidor FastAPI na porta 8000...${NC}"
     uvicorn app.main:app --reload --port 8000
 }